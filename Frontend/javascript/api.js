@@ -75,6 +75,16 @@ export async function fetchZoneHeatmap() {
   return res.json();
 }
 
+// Pickups per hour (byWeekday: per weekday and hour) and LocationID as a
+// Uint32Array; counts[hour * shape[1] + locationId] for the hourly array
+export async function fetchZoneHourlyHeatmap(byWeekday = false) {
+  const by = byWeekday ? "weekday" : "hour";
+  const res = await fetch(`${BASE_URL}/api/zones/heatmap/hourly?by=${by}&format=binary`);
+  const shape = res.headers.get("X-Heatmap-Shape").split(",").map(Number);
+  const counts = new Uint32Array(await res.arrayBuffer());
+  return { shape, counts };
+}
+
 export async function fetchTipDistribution() {
   const res = await fetch(`${BASE_URL}/api/tips/distribution`);
   return res.json();
@@ -1,9 +1,18 @@
 import pandas as pd
+from pathlib import Path
+import sys
+
+backend_dir = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(backend_dir))
+
+from utils.helpers import memory_usage_mb
 
 """
 phase1: Remove the missing critical values
 """
 
+CRITICAL_COLUMNS = ['PULocationID', 'DOLocationID', 'trip_distance', 'fare_amount']
+
 def remove_missing_values(dl):
     """
     this function will remove the missing rows from the loaded dataset given
@@ -12,8 +21,7 @@ def remove_missing_values(dl):
     before_rows = dl.shape[0]
 
     # Remove rows with missing values in critical columns
-    critical_columns = ['PULocationID', 'DOLocationID', 'trip_distance', 'fare_amount']
-    dl_cleaned = dl.dropna(subset=critical_columns)
+    dl_cleaned = dl.dropna(subset=CRITICAL_COLUMNS)
 
     after_rows = dl_cleaned.shape[0]
     print(f"Removed {before_rows - after_rows} rows with missing critical values.")
@@ -41,108 +49,95 @@ def remove_duplicates(dl):
 phase3: remove the logical outliers
 """
 
-def remove_outliners(dl):
+FARE_COMPONENT_COLUMNS = ['extra', 'mta_tax', 'tip_amount', 'tolls_amount', 'improvement_surcharge',
+                          'congestion_surcharge']
 
-    """
-    this function will remove all the logical inconsistencies in the critical columns
-    """
 
-    before_rows = dl.shape[0]
-    print("Removing the logical outliers ...")
+def _fare_components(dl):
+    return [c for c in FARE_COMPONENT_COLUMNS if c in dl.columns]
 
-    excluded_records = []
 
-    # convert datetime first
-    dl['tpep_pickup_datetime'] = pd.to_datetime(dl['tpep_pickup_datetime'], errors='coerce')
-    dl['tpep_dropoff_datetime'] = pd.to_datetime(dl['tpep_dropoff_datetime'], errors='coerce')
+def _duration_seconds(dl):
+    return (dl['tpep_dropoff_datetime'] - dl['tpep_pickup_datetime']).dt.total_seconds()
 
-    # Remove invalid datetime conversions 
-    mask = dl['tpep_pickup_datetime'].notna() & dl['tpep_dropoff_datetime'].notna()
-    excluded_records.append(('Invalid datetiime', (~mask).sum()))
-    dl_cleaned = dl[mask].copy()
 
+# (reason, check) in the order remove_outliners applies them. check returns
+# the mask of rows that pass, or None when the frame lacks the rule's columns.
+# logging_manager evaluates every rule on the rejected rows for the audit log.
+OUTLIER_RULES = [
+    ('Invalid datetiime',
+     lambda dl: dl['tpep_pickup_datetime'].notna() & dl['tpep_dropoff_datetime'].notna()),
     # 1. zero/negative trip distance
-    mask = dl_cleaned['trip_distance'] > 0
-    excluded_records.append(('Zero/Negative trip distance', (~mask).sum()))
-    dl_cleaned = dl_cleaned[mask]
-
-    # 2. zero/negative fare amount 
-    mask = dl_cleaned['fare_amount'] > 0
-    excluded_records.append(('Zero/Negative fare amount', (~mask).sum()))
-    dl_cleaned = dl_cleaned[mask]
-
+    ('Zero/Negative trip distance', lambda dl: dl['trip_distance'] > 0),
+    # 2. zero/negative fare amount
+    ('Zero/Negative fare amount', lambda dl: dl['fare_amount'] > 0),
     # 3. Dropoff before pickup
-    mask = dl_cleaned['tpep_dropoff_datetime'] >= dl_cleaned['tpep_pickup_datetime']
-    excluded_records.append(('Dropoff before pickup', (~mask).sum()))
-    dl_cleaned = dl_cleaned[mask]
-
-    # 4.  Trip duration valdation (1 min to 24 hours) - 
-    trip_duration_minutes = (dl_cleaned['tpep_dropoff_datetime'] - dl_cleaned['tpep_pickup_datetime']).dt.total_seconds() / 60
-    mask = (trip_duration_minutes >= 1) & (trip_duration_minutes <= 24 * 60)
-    excluded_records.append(('Unrealistic trip duration', (~mask).sum()))
-    dl_cleaned = dl_cleaned[mask]
-
+    ('Dropoff before pickup', lambda dl: dl['tpep_dropoff_datetime'] >= dl['tpep_pickup_datetime']),
+    # 4. Trip duration valdation (1 min to 24 hours)
+    ('Unrealistic trip duration', lambda dl: (_duration_seconds(dl) / 60).between(1, 24 * 60)),
     # 5. Unrealistic distances (> 100 miles)
-    mask = dl_cleaned['trip_distance'] <= 100
-    excluded_records.append(('Unrealistic trip distance', (~mask).sum()))
-    dl_cleaned = dl_cleaned[mask]
-
+    ('Unrealistic trip distance', lambda dl: dl['trip_distance'] <= 100),
     # 6. Excessive fare amounts (> $500)
-    mask = dl_cleaned['fare_amount'] <= 500
-    excluded_records.append(('Excessive fare amount', (~mask).sum()))
-    dl_cleaned = dl_cleaned[mask]
-
+    ('Excessive fare amount', lambda dl: dl['fare_amount'] <= 500),
     # 7. passenger count validation (1 to 6)
-    if 'passenger_count' in dl_cleaned.columns:
-        mask = dl_cleaned['passenger_count'].between(1, 6)
-        excluded_records.append(('Invalid passenger count', (~mask).sum()))
-        dl_cleaned = dl_cleaned[mask]
-
+    ('Invalid passenger count',
+     lambda dl: dl['passenger_count'].between(1, 6) if 'passenger_count' in dl.columns else None),
     # 8. Average speed validation (<= 100 mph)
-    trip_duration_hours = (
-        dl_cleaned['tpep_dropoff_datetime'] - dl_cleaned['tpep_pickup_datetime']
-    ).dt.total_seconds() / 3600
-
-    average_speed = dl_cleaned['trip_distance'] / trip_duration_hours
-    mask = average_speed <= 100
-    excluded_records.append(('Unrealistic average speed', (~mask).sum()))
-    dl_cleaned = dl_cleaned[mask]
-    
-    # 9 . Fare component validation
+    ('Unrealistic average speed', lambda dl: dl['trip_distance'] / (_duration_seconds(dl) / 3600) <= 100),
+    # 9. Fare component validation: no negative values ...
+    ('Negative values in fare components',
+     lambda dl: ((dl[['fare_amount', 'total_amount'] + _fare_components(dl)] >= 0).all(axis=1)
+                 if 'total_amount' in dl.columns else None)),
+    # ... and total_amount consistent with the components
+    ('Inconsistent total_amount',
+     lambda dl: ((dl['total_amount'] - dl[['fare_amount'] + _fare_components(dl)].sum(axis=1)).abs() <= 1.0
+                 if 'total_amount' in dl.columns else None)),
+    # 10. cash payment with tips
+    ('Cash payment with tips',
+     lambda dl: (~((dl['payment_type'] == 2) & (dl['tip_amount'] > 1.0))
+                 if 'payment_type' in dl.columns and 'tip_amount' in dl.columns else None)),
+    # 11. zero distance with significant fare
+    ('Zero distance with significant fare', lambda dl: ~((dl['trip_distance'] == 0) & (dl['fare_amount'] > 5))),
+]
 
-    fare_col = ['extra','mta_tax', 'tip_amount', 'tolls_amount', 'improvement_surcharge', 'congestion_surcharge']
 
-    if 'total_amount' in dl_cleaned.columns:
-        # get only the existing columns and fill the NaN with 0
-        existing_cols = [c for c in fare_col if c in dl_cleaned.columns]
-        dl_cleaned[existing_cols] = dl_cleaned[existing_cols].fillna(0)
+def prepare_outlier_columns(dl):
+    """
+    Parse the datetime columns and fill missing fare components with 0
+    (in place), as the outlier rules expect.
+    """
+    dl['tpep_pickup_datetime'] = pd.to_datetime(dl['tpep_pickup_datetime'], errors='coerce')
+    dl['tpep_dropoff_datetime'] = pd.to_datetime(dl['tpep_dropoff_datetime'], errors='coerce')
+    if 'total_amount' in dl.columns:
+        existing_cols = _fare_components(dl)
+        dl[existing_cols] = dl[existing_cols].fillna(0)
+    return dl
 
-        # Remove any negative values in fare components
 
-        all_fare_cols = ['fare_amount', 'total_amount'] + existing_cols
-        mask = (dl_cleaned[all_fare_cols] >= 0).all(axis=1)
-        excluded_records.append(('Negative values in fare components', (~mask).sum()))
-        dl_cleaned = dl_cleaned[mask]
+def remove_outliners(dl):
 
-        # validate total_amount consistency
+    """
+    this function will remove all the logical inconsistencies in the critical columns
+    """
 
-        calculated_total = dl_cleaned[['fare_amount'] + existing_cols].sum(axis=1)
-        mask = abs(dl_cleaned['total_amount'] - calculated_total) <= 1.0
-        excluded_records.append(('Inconsistent total_amount', (~mask).sum()))
-        dl_cleaned = dl_cleaned[mask]
+    before_rows = dl.shape[0]
+    print("Removing the logical outliers ...")
 
+    excluded_records = []
 
-    # 10. cash payment with tips
-    if 'payment_type' in dl_cleaned.columns and 'tip_amount' in dl_cleaned.columns:
-        mask = ~((dl_cleaned['payment_type'] == 2) & (dl_cleaned['tip_amount'] > 1.0))
-        excluded_records.append(('Cash payment with tips', (~mask).sum()))
+    # convert datetime first
+    dl = prepare_outlier_columns(dl)
+
+    # each rule only sees the rows that passed the previous ones, so every
+    # excluded row is counted once, under the first rule it fails
+    dl_cleaned = dl
+    for reason, check in OUTLIER_RULES:
+        mask = check(dl_cleaned)
+        if mask is None:
+            continue
+        excluded_records.append((reason, (~mask).sum()))
         dl_cleaned = dl_cleaned[mask]
-
-
-    # 11. zero distance with significant fare
-    mask = ~((dl_cleaned['trip_distance'] == 0) & (dl_cleaned['fare_amount'] > 5))
-    excluded_records.append(('Zero distance with significant fare', (~mask).sum()))
-    dl_cleaned = dl_cleaned[mask]
+    dl_cleaned = dl_cleaned.copy()
 
     after_rows = dl_cleaned.shape[0]
 
@@ -171,38 +166,44 @@ phase4: standardize the data types
 def standardize_data_types(dl):
     """
     this function will standardize the data types of the critical columns
+    to the most compact types that hold their values
     """
 
     print("Standardizing data types ...")
+    before_mb = memory_usage_mb(dl)
 
-    # Convert PULocationID and DOLocationID to integers
-    dl['PULocationID'] = dl['PULocationID'].astype(int)
-    dl['DOLocationID'] = dl['DOLocationID'].astype(int)
+    # Zone IDs (1-265) fit in int16
+    dl['PULocationID'] = dl['PULocationID'].astype('int16')
+    dl['DOLocationID'] = dl['DOLocationID'].astype('int16')
 
-    # Convert trip_distance and fare_amount to floats
-    dl['trip_distance'] = dl['trip_distance'].astype(float)
-    dl['fare_amount'] = dl['fare_amount'].astype(float)
+    # distances and money as float32
+    dl['trip_distance'] = dl['trip_distance'].astype('float32')
+    dl['fare_amount'] = dl['fare_amount'].astype('float32')
 
     # convert other fare components 
-    fare_cols = ['extra', 'mta_tax', 'tip_amount', 'tolls_amount', 'total_amount', 'improvement_surcharge', 'congestion_surcharge']
+    fare_cols = ['extra', 'mta_tax', 'tip_amount', 'tolls_amount', 'total_amount', 'improvement_surcharge', 'congestion_surcharge', 'airport_fee']
     for col in fare_cols:
         if col in dl.columns:
-            dl[col] = dl[col].astype(float)
+            dl[col] = dl[col].astype('float32')
 
-    # convert integer columns
+    # small code columns: uint8, or nullable UInt8 if values are still missing
     int_cols = ['passenger_count', 'payment_type', 'RatecodeID', 'VendorID']
     for col in int_cols:
         if col in dl.columns:
-            dl[col] = dl[col].astype(int)
+            dl[col] = dl[col].astype('UInt8' if dl[col].isna().any() else 'uint8')
 
+    if 'store_and_fwd_flag' in dl.columns:
+        dl['store_and_fwd_flag'] = dl['store_and_fwd_flag'].astype('category')
 
-
-    # Ensure datetime columns are in the datetime format
+    # Datetime columns were already parsed in remove_outliners; only parse
+    # if this function is called on a frame that skipped that step
     datetime_cols = ['tpep_pickup_datetime', 'tpep_dropoff_datetime']
     for col in datetime_cols:
-        if col in dl.columns:
+        if col in dl.columns and not pd.api.types.is_datetime64_any_dtype(dl[col]):
             dl[col] = pd.to_datetime(dl[col], errors='coerce')
 
+    after_mb = memory_usage_mb(dl)
+    print(f"Memory usage: {before_mb:,.1f} MB -> {after_mb:,.1f} MB")
     print("Data type standardization complete.")
     return dl
 
@@ -13,18 +13,28 @@ backend_dir = Path(__file__).resolve().parents[1]
 project_root = Path(__file__).resolve().parents[2]
 sys.path.insert(0, str(backend_dir))
 
-from config import PROCESSED_DATA_PATH
+from config import (LOG_DIR, TRIP_DATA_PATH, ZONE_LOOKUP_PATH, ZONES_GEOJSON_PATH, SAMPLE_PROCESSED_PATH,
+                    SAMPLE_ESTIMATOR_TABLE_PATH)
+from utils.helpers import memory_usage_mb
+from utils import geography
 from .data_loader import load_trip_data, load_zone_lookup
-from .data_cleaning import clean_data
-from .feature_engineering import engineer_features
-
-def save_exclusion_log(exclusion_log):
+from .zone_assignment import assign_zones
+from . import data_cleaning, feature_engineering
+from .data_cleaning import remove_missing_values, remove_duplicates, remove_outliners, standardize_data_types
+from .logging_manager import rejection_records, save_rejection_log
+from .feature_engineering import engineer_features, add_zone_features
+from .processed_store import write_processed_trips
+from .stage_cache import Stage, StageCache
+from .sampling import sample_trip_file
+from analytics import estimator
+
+def save_exclusion_log(exclusion_log, log_dir=None):
     #Save excluded records to CSV in logs directory
     if not exclusion_log:
         print("No exclusions to log.")
         return
     
-    log_dir = project_root / LOG_DIR
+    log_dir = Path(log_dir) if log_dir else project_root / LOG_DIR
     log_dir.mkdir(parents=True, exist_ok=True)
     
     timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
@@ -38,42 +48,96 @@ def save_exclusion_log(exclusion_log):
     print(f"  Total exclusion reasons: {len(exclusion_log)}")
 
 
-def intergrate_data():
+def merge_zones(trip_data, zone_lookup):
+    """
+    this function merges the two data sets together using the PULocationID,
+    after adding the zone features (borough codes, airport flag).
+    """
+    trip_data = add_zone_features(trip_data, zone_lookup)
+    merged_data = trip_data.merge(zone_lookup,
+            left_on = "PULocationID",
+            right_on = "LocationID",
+            how = "left"
+        )
+    # keep the zone strings as categories after the merge
+    for col in ['Borough', 'Zone', 'service_zone']:
+        merged_data[col] = merged_data[col].astype('category')
+    return merged_data
+
+
+def build_stages(trip_path=None, zone_path=None, zones_geojson_path=None):
+    """
+    The pipeline as a DAG of cached stages, by name; 'merge' is the last one.
+    Each stage is keyed by its input files, the modules of its code and its
+    upstream stages.
+    """
+    trip_path = Path(trip_path or project_root / TRIP_DATA_PATH)
+    zone_path = Path(zone_path or project_root / ZONE_LOOKUP_PATH)
+    zones_geojson_path = Path(zones_geojson_path or project_root / ZONES_GEOJSON_PATH)
+
+    load = Stage('load', load_trip_data, kwargs={'path': trip_path}, files=[trip_path])
+    # the polygons only matter for coordinate-based trip files, but hashing
+    # them whenever they exist keeps the key independent of the file's columns
+    zones = Stage('zones', assign_zones, deps=[load], kwargs={'zones_path': zones_geojson_path},
+                  files=[zones_geojson_path] if zones_geojson_path.exists() else [])
+    missing = Stage('missing', remove_missing_values, deps=[zones])
+    duplicates = Stage('duplicates', remove_duplicates, deps=[missing])
+    outliers = Stage('outliers', remove_outliners, deps=[duplicates])
+    rejections = Stage('rejections', rejection_records, deps=[zones, outliers], code=[data_cleaning])
+    types = Stage('types', standardize_data_types, deps=[outliers])
+    features = Stage('features', engineer_features, deps=[types], code=[geography])
+    lookup = Stage('zone_lookup', load_zone_lookup, kwargs={'path': zone_path}, files=[zone_path])
+    merge = Stage('merge', merge_zones, deps=[features, lookup], code=[feature_engineering, geography])
+    estimates = Stage('estimates', estimator.estimator_cells, deps=[merge], code=[geography])
+    return {stage.name: stage for stage in (load, zones, missing, duplicates, outliers, rejections,
+                                            types, features, lookup, merge, estimates)}
+
+
+def intergrate_data(trip_path=None, zone_path=None, output_path=None, log_dir=None,
+                    zones_geojson_path=None, use_cache=True, sample_fraction=None,
+                    estimator_path=None):
     
     """
-    this function merges the two data sets together using the PULocationID.
+    this function cleans the trip data, engineers the features and merges
+    the zone lookup onto it using the PULocationID.
+    Files with pickup/dropoff coordinates instead of LocationIDs get their
+    zones assigned from the zone polygons first.
+    Stage outputs are cached (see stage_cache.py), so a re-run only
+    recomputes the stages whose inputs or code changed; use_cache=False
+    runs every stage and writes nothing to the cache.
+    With sample_fraction the pipeline runs on a stratified sample of the
+    trip file (see sampling.py) and writes to SAMPLE_PROCESSED_PATH and
+    SAMPLE_ESTIMATOR_TABLE_PATH unless output_path/estimator_path are given.
+    The duration/fare estimator table (analytics/estimator.py) is built
+    from the merged trips and written to estimator_path.
+    The paths default to the ones in config.py; the benchmarks pass their own.
     """
 
     print("Integrating datasets ...")
 
-    trip_data = load_trip_data()
-
-    print(f"STEP 2: Type of trip_data AFTER load: {type(trip_data)}")
-    
-    print("STEP 3: About to call clean_data...")
-    
-    trip_data, exclusion_log = clean_data(trip_data)
-    save_exclusion_log(exclusion_log)
-    # engineer new features
-    trip_data = engineer_features(trip_data)
-    print(f"   Result: {trip_data.shape[0]:,} rows & {trip_data.shape[1]} columns")
+    if sample_fraction:
+        trip_path = sample_trip_file(sample_fraction, trip_path, zone_path)
+        output_path = output_path or project_root / SAMPLE_PROCESSED_PATH
+        estimator_path = estimator_path or project_root / SAMPLE_ESTIMATOR_TABLE_PATH
 
-    zone_lookup = load_zone_lookup()
+    stages = build_stages(trip_path, zone_path, zones_geojson_path)
+    cache = StageCache(enabled=use_cache)
 
-    print(f"STEP 5: Zone lookup type: {type(zone_lookup)}")
+    merged_data = cache.run(stages['merge'])
+    _, exclusion_log = cache.run(stages['outliers'])
+    rejections = cache.run(stages['rejections'])
+    estimates = cache.run(stages['estimates'])
+    cache.print_report()
+    save_exclusion_log(exclusion_log, log_dir)
+    save_rejection_log(rejections, stages['load'].kwargs['path'], log_dir)
 
-    merged_data = trip_data.merge(zone_lookup,
-            left_on = "PULocationID",
-            right_on = "LocationID",
-            how = "left"
-        )
     print(f"Integration complete: {merged_data.shape[0]} rows, {merged_data.shape[1]} columns")
+    print(f"Memory usage: {memory_usage_mb(merged_data):,.1f} MB")
 
-     # Save cleaned and merged data to processed folder
-    output_path = project_root / PROCESSED_DATA_PATH
-    output_path.parent.mkdir(parents=True, exist_ok=True)
-    merged_data.to_csv(output_path, index=False)
+     # Save cleaned and merged data to the partitioned processed store
+    output_path = write_processed_trips(merged_data, output_path)
     print(f"Saved cleaned data to: {output_path}")
+    estimator.write_estimator_table(estimates, estimator_path)
 
 
     return merged_data
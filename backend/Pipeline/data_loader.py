@@ -12,24 +12,60 @@ project_root = Path(__file__).resolve().parents[2]
 sys.path.insert(0, str(backend_dir))
 
 from config import TRIP_DATA_PATH, ZONE_LOOKUP_PATH
+from utils.helpers import memory_usage_mb
 
+# Compact dtypes applied while parsing. Columns that can still hold NaN at
+# this point stay float32; standardize_data_types narrows them after cleaning.
+TRIP_DTYPES = {
+    'VendorID': 'float32',
+    'passenger_count': 'float32',
+    'trip_distance': 'float32',
+    'RatecodeID': 'float32',
+    'store_and_fwd_flag': 'category',
+    'PULocationID': 'float32',
+    'DOLocationID': 'float32',
+    'payment_type': 'float32',
+    'fare_amount': 'float32',
+    'extra': 'float32',
+    'mta_tax': 'float32',
+    'tip_amount': 'float32',
+    'tolls_amount': 'float32',
+    'improvement_surcharge': 'float32',
+    'total_amount': 'float32',
+    'congestion_surcharge': 'float32',
+    'airport_fee': 'float32',
+    # coordinate-based files (see zone_assignment.py); float64 keeps ~1 cm precision
+    'pickup_longitude': 'float64',
+    'pickup_latitude': 'float64',
+    'dropoff_longitude': 'float64',
+    'dropoff_latitude': 'float64',
+}
 
-def load_trip_data():
+ZONE_DTYPES = {
+    'LocationID': 'int16',
+    'Borough': 'category',
+    'Zone': 'category',
+    'service_zone': 'category',
+}
+
+
+def load_trip_data(path=None):
     """
     Load trip parquet data.
+    An explicit path can be given (e.g. a synthetic benchmark file).
     """
     print("load trip data")
-    tp = pd.read_csv(project_root / TRIP_DATA_PATH)
-    print("trip data loaded")
+    tp = pd.read_csv(path or project_root / TRIP_DATA_PATH, dtype=TRIP_DTYPES)
+    print(f"trip data loaded ({memory_usage_mb(tp):,.1f} MB in memory)")
     print(tp.head())
     return tp
 
-def load_zone_lookup():
+def load_zone_lookup(path=None):
     """
     Load zone lookup csv.
     """
     print("Loading zone lookup data")
-    zl = pd.read_csv(project_root / ZONE_LOOKUP_PATH)
+    zl = pd.read_csv(path or project_root / ZONE_LOOKUP_PATH, dtype=ZONE_DTYPES)
     print(zl.head())
     print("zone lookup data loaded")
     return zl
@@ -1,5 +1,12 @@
 import pandas as pd
 import numpy as np 
+from pathlib import Path
+import sys
+
+backend_dir = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(backend_dir))
+
+from utils.geography import BOROUGH_CODES, NO_BOROUGH_CODE, AIRPORT_SERVICE_ZONES
 
 def engineer_features(dl):
     """
@@ -14,7 +21,7 @@ def engineer_features(dl):
     initial_columns = dl.shape[1]
     # derive the time_duration of the trips in minutes
     dl['trip_duration_minutes'] = (dl['tpep_dropoff_datetime'] - dl['tpep_pickup_datetime']).dt.total_seconds() / 60
-    dl['trip_duration_minutes'] = dl['trip_duration_minutes'].round(2)
+    dl['trip_duration_minutes'] = dl['trip_duration_minutes'].round(2).astype('float32')
     print(f" Created new_feature: trip_duration_minutes[range 1-1440 min validated]")
 
     # derive the average speed of the trip in miles per hour
@@ -22,7 +29,7 @@ def engineer_features(dl):
     print("Created Average speed feature...")
     dl['trip_duration_hours'] = dl['trip_duration_minutes'] / 60
     dl['average-speed_mph'] = dl['trip_distance'] / dl['trip_duration_hours']
-    dl['average-speed_mph'] = dl['average-speed_mph'].round(2)
+    dl['average-speed_mph'] = dl['average-speed_mph'].round(2).astype('float32')
     print(f" Created a new_feature: average_speed_mph [range <= 100 mph validated]")
 
     # derive the tip percentage feature
@@ -31,10 +38,22 @@ def engineer_features(dl):
     if 'tip_amount' in dl.columns:
         # safe division since fare_amount is > 0
         dl['tip_percentage'] = (dl['tip_amount'] / dl['fare_amount']) * 100
-        dl['tip_percentage'] = dl['tip_percentage'].round(2)
+        dl['tip_percentage'] = dl['tip_percentage'].round(2).astype('float32')
         print(f" Created a new_feature: tip_percentage [range 0-100% validated]")
 
 
+    # time features, stored so queries filter and group on indexed columns
+    # instead of HOUR()/DATE() of the pickup time
+    print("Created pickup time features...")
+    pickup = dl['tpep_pickup_datetime']
+    dl['pickup_date'] = pickup.dt.normalize()
+    dl['pickup_hour'] = pickup.dt.hour.astype('uint8')
+    # 0 = Monday .. 6 = Sunday
+    dl['pickup_weekday'] = pickup.dt.weekday.astype('uint8')
+    dl['is_weekend'] = dl['pickup_weekday'] >= 5
+    print(f" Created new_features: pickup_date, pickup_hour, pickup_weekday, is_weekend")
+
+
     # feature 5: Cost per Mile
    # print("Created Cost per mile feature...")
     #dl['cost_per_mile'] = np.where(dl['trip_distance'] > 0, dl['fare_amount'] / dl['trip_distance'], 0)
@@ -50,3 +69,29 @@ def engineer_features(dl):
     print(f"feature engineering complete with {new_features} new features added")
 
     return dl
+
+
+def add_zone_features(dl, zone_lookup):
+    """
+    Add the pickup/dropoff borough codes (utils/geography.py) and the
+    airport-trip flag (pickup or dropoff in an airport zone) from the zone
+    lookup, so queries need no join with taxi_zones for them.
+    """
+    print("Created zone features...")
+    size = max(int(zone_lookup['LocationID'].max()),
+               int(dl['PULocationID'].max()), int(dl['DOLocationID'].max())) + 1
+    location_ids = zone_lookup['LocationID'].to_numpy()
+
+    borough_code = np.full(size, NO_BOROUGH_CODE, dtype=np.uint8)
+    borough_code[location_ids] = (zone_lookup['Borough'].astype(object).map(BOROUGH_CODES)
+                                  .fillna(NO_BOROUGH_CODE).to_numpy(dtype=np.uint8))
+    is_airport = np.zeros(size, dtype=bool)
+    is_airport[location_ids] = zone_lookup['service_zone'].isin(AIRPORT_SERVICE_ZONES).to_numpy()
+
+    pickup = dl['PULocationID'].to_numpy()
+    dropoff = dl['DOLocationID'].to_numpy()
+    dl['pickup_borough_code'] = borough_code[pickup]
+    dl['dropoff_borough_code'] = borough_code[dropoff]
+    dl['is_airport_trip'] = is_airport[pickup] | is_airport[dropoff]
+    print(f" Created new_features: pickup_borough_code, dropoff_borough_code, is_airport_trip")
+    return dl
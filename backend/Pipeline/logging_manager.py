@@ -0,0 +1,141 @@
+"""
+Per-row audit log of the trips excluded by the cleaning steps.
+
+Each rejected trip is stored as its row number in the source trip file and
+a bitmask of every rule it fails (bit i = REJECTION_RULES[i]): missing
+critical values, duplicate rows and each rule of remove_outliners. The
+log is a two-column Parquet file (delta-encoded row numbers, uint16
+masks), a few bytes per rejected row instead of a copy of the row; the
+rule names and the source file are kept in its metadata, so the original
+rows can be read back for any rule:
+
+    python -m Pipeline.logging_manager Data/Logs/rejections_<timestamp>.parquet
+    python -m Pipeline.logging_manager LOG --rule "Unrealistic average speed"
+"""
+
+import argparse
+from datetime import datetime
+import json
+from pathlib import Path
+import sys
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+backend_dir = Path(__file__).resolve().parents[1]
+project_root = Path(__file__).resolve().parents[2]
+sys.path.insert(0, str(backend_dir))
+
+from config import LOG_DIR
+from .data_loader import TRIP_DTYPES
+from .data_cleaning import CRITICAL_COLUMNS, OUTLIER_RULES, prepare_outlier_columns
+
+REJECTION_RULES = ['Missing critical value', 'Duplicate row'] + [reason for reason, _ in OUTLIER_RULES]
+# the masks are stored as uint16
+if len(REJECTION_RULES) > 16:
+    raise ValueError(f"{len(REJECTION_RULES)} rejection rules do not fit a 16-bit mask")
+READ_CHUNK_ROWS = 1_000_000
+
+
+def rejection_records(raw, cleaned):
+    """
+    DataFrame(row, mask) of the rows of raw (the loaded trips, indexed by
+    source row) that are not in cleaned (the trips left after the outlier
+    step), with the bit of every rule each row fails. Rows with a missing
+    critical value never reach the outlier rules, so they only get bit 0.
+    """
+    rejected_index = raw.index.difference(cleaned.index)
+    masks = np.zeros(len(rejected_index), dtype=np.uint16)
+
+    rejected = raw.loc[rejected_index]
+    missing = rejected[CRITICAL_COLUMNS].isna().any(axis=1).to_numpy()
+    masks |= missing << np.uint16(0)
+    masks |= raw.duplicated().loc[rejected_index].to_numpy() << np.uint16(1)
+
+    rejected = prepare_outlier_columns(rejected.copy())
+    for bit, (_, check) in enumerate(OUTLIER_RULES, start=2):
+        passed = check(rejected)
+        if passed is not None:
+            failed = ~passed.to_numpy(dtype=bool, na_value=False) & ~missing
+            masks |= failed << np.uint16(bit)
+
+    return pd.DataFrame({'row': rejected_index.to_numpy(dtype=np.int64), 'mask': masks})
+
+
+def save_rejection_log(records, source_path, log_dir=None):
+    """Write the records to log_dir/rejections_<timestamp>.parquet; returns the path."""
+    log_dir = Path(log_dir) if log_dir else project_root / LOG_DIR
+    log_dir.mkdir(parents=True, exist_ok=True)
+
+    timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+    log_file = log_dir / f"rejections_{timestamp}.parquet"
+
+    table = pa.Table.from_pandas(records, preserve_index=False).replace_schema_metadata({
+        'rules': json.dumps(REJECTION_RULES),
+        'source': str(Path(source_path).resolve()),
+    })
+    pq.write_table(table, log_file, compression='zstd', use_dictionary=False,
+                   column_encoding={'row': 'DELTA_BINARY_PACKED'})
+
+    print(f"✓ Rejection log saved: {log_file}")
+    print(f"  {len(records):,} rejected rows, {log_file.stat().st_size / 1024:,.1f} KB")
+    return log_file
+
+
+def read_rejection_log(log_file):
+    """(records, rules, source path) of a rejection log."""
+    table = pq.read_table(log_file)
+    metadata = table.schema.metadata
+    return table.to_pandas(), json.loads(metadata[b'rules']), metadata[b'source'].decode()
+
+
+def rule_counts(log_file):
+    """Number of rejected rows failing each rule (a row can fail several)."""
+    records, rules, _ = read_rejection_log(log_file)
+    masks = records['mask'].to_numpy()
+    return {rule: int(np.count_nonzero(masks & (1 << bit))) for bit, rule in enumerate(rules)}
+
+
+def rejected_rows(log_file, rule, trip_path=None):
+    """
+    The original rows (indexed by source row) that fail rule, read back
+    from the source trip file (or trip_path if it has moved).
+    """
+    records, rules, source = read_rejection_log(log_file)
+    if rule not in rules:
+        raise ValueError(f"Unknown rule {rule!r}; expected one of {rules}")
+    bit = rules.index(rule)
+    wanted = records['row'].to_numpy()[(records['mask'].to_numpy() & (1 << bit)) != 0]
+
+    parts = []
+    for chunk in pd.read_csv(trip_path or source, dtype=TRIP_DTYPES, chunksize=READ_CHUNK_ROWS):
+        parts.append(chunk[chunk.index.isin(wanted)])
+    return pd.concat(parts)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Inspect a rejection log.")
+    parser.add_argument('log_file')
+    parser.add_argument('--rule', help="print the original rows that fail this rule")
+    parser.add_argument('--trip-path', help="source trip file, if it has moved since ingestion")
+    parser.add_argument('--limit', type=int, default=20, help="rows to print with --rule")
+    args = parser.parse_args()
+
+    if args.rule:
+        rows = rejected_rows(args.log_file, args.rule, args.trip_path)
+        print(f"{len(rows):,} rows fail {args.rule!r}")
+        print(rows.head(args.limit).to_string())
+        return
+
+    print(f"\n{'='*60}")
+    print("REJECTED ROWS PER RULE:")
+    print(f"{'='*60}")
+    for rule, count in rule_counts(args.log_file).items():
+        print(f"  {rule:.<45} {count:>10,}")
+    print(f"{'='*60}")
+
+
+if __name__ == "__main__":
+    main()
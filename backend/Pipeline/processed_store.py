@@ -0,0 +1,164 @@
+"""
+Processed trip store.
+
+The cleaned and merged trips are written as a Parquet dataset partitioned
+by pickup year and month (hive layout: pickup_year=2024/pickup_month=1/),
+zstd-compressed and with column statistics. Readers pass the columns and
+date range they need so only the matching partitions, row groups and
+columns are read.
+"""
+
+from pathlib import Path
+import shutil
+import sys
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.dataset as ds
+
+backend_dir = Path(__file__).resolve().parents[1]
+project_root = Path(__file__).resolve().parents[2]
+sys.path.insert(0, str(backend_dir))
+
+from config import PROCESSED_DATA_PATH
+
+PARTITION_SCHEMA = pa.schema([('pickup_year', pa.int16()), ('pickup_month', pa.int8())])
+ROWS_PER_GROUP = 500_000
+
+
+def processed_path(path=None):
+    return Path(path) if path else project_root / PROCESSED_DATA_PATH
+
+
+def _partitioned_table(df):
+    pickup = df['tpep_pickup_datetime']
+    return pa.Table.from_pandas(
+        df.assign(pickup_year=pickup.dt.year.astype('int16'),
+                  pickup_month=pickup.dt.month.astype('int8')),
+        preserve_index=False,
+    )
+
+
+def _write_dataset(table, path, existing_data_behavior, basename_template):
+    file_format = ds.ParquetFileFormat()
+    ds.write_dataset(
+        table, path,
+        format=file_format,
+        partitioning=ds.partitioning(PARTITION_SCHEMA, flavor='hive'),
+        file_options=file_format.make_write_options(compression='zstd', write_statistics=True),
+        existing_data_behavior=existing_data_behavior,
+        basename_template=basename_template,
+        max_rows_per_group=ROWS_PER_GROUP,
+        max_rows_per_file=ROWS_PER_GROUP * 8,
+    )
+
+
+def write_processed_trips(df, path=None):
+    """
+    Replace the store with the processed trips, dropping every month that
+    is not in df (a full ingest). The dataset is written next to the store
+    and swapped in, so a failed write leaves the old store in place.
+    Returns the dataset directory.
+    """
+    path = processed_path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    new_path = path.with_name(path.name + '.new')
+    old_path = path.with_name(path.name + '.old')
+    for leftover in (new_path, old_path):
+        if leftover.exists():
+            shutil.rmtree(leftover)
+
+    _write_dataset(_partitioned_table(df), new_path, 'error', 'part-{i}.parquet')
+    if path.exists():
+        path.rename(old_path)
+    new_path.rename(path)
+    if old_path.exists():
+        shutil.rmtree(old_path)
+    return path
+
+
+def append_processed_trips(df, batch_name, path=None):
+    """
+    Add trips to the store as new files ({batch_name}-N.parquet), keeping
+    the trips already in their months. The batch is cast to the store's
+    schema so the dataset stays readable as one table.
+    """
+    path = processed_path(path)
+    table = _partitioned_table(df)
+    if path.exists() and any(path.iterdir()):
+        schema = open_processed_dataset(path).schema
+        table = table.select(schema.names).cast(schema)
+    path.mkdir(parents=True, exist_ok=True)
+    _write_dataset(table, path, 'overwrite_or_ignore', f'{batch_name}-{{i}}.parquet')
+    return path
+
+
+def open_processed_dataset(path=None):
+    path = processed_path(path)
+    if not path.exists():
+        raise FileNotFoundError(f"Processed trip store not found: {path}")
+    return ds.dataset(path, format='parquet', partitioning=ds.partitioning(PARTITION_SCHEMA, flavor='hive'))
+
+
+def _month_bound(year, month, lower):
+    """Partition-level filter for (year, month) >= or <= the given month."""
+    y, m = ds.field('pickup_year'), ds.field('pickup_month')
+    if lower:
+        return (y > year) | ((y == year) & (m >= month))
+    return (y < year) | ((y == year) & (m <= month))
+
+
+def build_filter(start=None, end=None, year=None, month=None):
+    """
+    Filter expression for a pickup date range and/or a single year/month.
+    Date bounds are also turned into partition bounds so whole months are
+    skipped without opening their files.
+    """
+    conditions = []
+    if year is not None:
+        conditions.append(ds.field('pickup_year') == year)
+    if month is not None:
+        conditions.append(ds.field('pickup_month') == month)
+    if start is not None:
+        start = pd.Timestamp(start)
+        conditions.append(_month_bound(start.year, start.month, lower=True))
+        conditions.append(ds.field('tpep_pickup_datetime') >= start.to_pydatetime())
+    if end is not None:
+        end = pd.Timestamp(end)
+        conditions.append(_month_bound(end.year, end.month, lower=False))
+        conditions.append(ds.field('tpep_pickup_datetime') <= end.to_pydatetime())
+
+    expression = None
+    for condition in conditions:
+        expression = condition if expression is None else expression & condition
+    return expression
+
+
+def read_processed_trips(path=None, columns=None, start=None, end=None, year=None, month=None):
+    """Read the requested columns for the requested pickup range as a DataFrame."""
+    dataset = open_processed_dataset(path)
+    table = dataset.to_table(columns=columns, filter=build_filter(start, end, year, month))
+    return table.to_pandas()
+
+
+def iter_processed_batches(path=None, columns=None, batch_size=10000,
+                           start=None, end=None, year=None, month=None):
+    """Yield the requested columns in DataFrame batches of about batch_size rows."""
+    dataset = open_processed_dataset(path)
+    scanner = dataset.scanner(columns=columns, filter=build_filter(start, end, year, month),
+                              batch_size=batch_size)
+    for batch in scanner.to_batches():
+        if batch.num_rows:
+            yield batch.to_pandas()
+
+
+def processed_months(path=None, min_rows=1):
+    """
+    Sorted (year, month) pairs present in the store with at least min_rows
+    trips (TLC files carry a few stray rows dated years away).
+    """
+    dataset = open_processed_dataset(path)
+    table = dataset.to_table(columns=['pickup_year', 'pickup_month'])
+    counts = table.group_by(['pickup_year', 'pickup_month']).aggregate([([], 'count_all')]).to_pylist()
+    return sorted((row['pickup_year'], row['pickup_month'])
+                  for row in counts if row['count_all'] >= min_rows)
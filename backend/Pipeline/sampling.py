@@ -0,0 +1,139 @@
+"""
+Stratified sample of a trip file, for fast development runs.
+
+Trips are grouped into strata by pickup month, pickup borough and rate
+code. A stratum of n rows keeps ceil(n * fraction) of them, spread evenly
+in file order: its k-th row is kept when ceil((k + 1) * fraction) >
+ceil(k * fraction). That needs one counter per stratum, so the file is
+read once in chunks and the same file and fraction always give the same
+sample. The first row of every stratum is kept, so rare boroughs and rate
+codes are still present in a 1% sample.
+
+The sample is written as a CSV with the source's columns and values, and
+intergrate_data(sample_fraction=...) runs the normal pipeline on it.
+"""
+
+import argparse
+from fractions import Fraction
+from pathlib import Path
+import os
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+backend_dir = Path(__file__).resolve().parents[1]
+project_root = Path(__file__).resolve().parents[2]
+sys.path.insert(0, str(backend_dir))
+
+from config import TRIP_DATA_PATH, ZONE_LOOKUP_PATH, SAMPLE_DATA_DIR
+from utils.geography import BOROUGH_CODES, NO_BOROUGH_CODE
+
+SAMPLE_CHUNK_ROWS = 500_000
+# fractions are applied exactly as p/q with q up to this
+MAX_DENOMINATOR = 1_000_000
+# rate codes outside 0..126 (and missing ones) share one stratum
+OTHER_RATE_CODE = 127
+
+
+def sample_path(trip_path, fraction):
+    return project_root / SAMPLE_DATA_DIR / f"{Path(trip_path).stem}_sample_{fraction:g}.csv"
+
+
+def borough_lookup(zone_path):
+    """Array mapping LocationID to borough code (NO_BOROUGH_CODE if unknown)."""
+    zones = pd.read_csv(zone_path, usecols=['LocationID', 'Borough'])
+    lookup = np.full(int(zones['LocationID'].max()) + 1, NO_BOROUGH_CODE, dtype=np.int64)
+    lookup[zones['LocationID'].to_numpy()] = zones['Borough'].map(BOROUGH_CODES).fillna(NO_BOROUGH_CODE)
+    return lookup
+
+
+def stratum_keys(chunk, boroughs):
+    """One int64 key per row combining pickup month, pickup borough and rate code."""
+    pickup = pd.to_datetime(chunk['tpep_pickup_datetime'], errors='coerce')
+    month = (pickup.dt.year * 12 + pickup.dt.month - 1).fillna(-1).to_numpy(np.int64)
+
+    borough = np.full(len(chunk), NO_BOROUGH_CODE, dtype=np.int64)
+    if 'PULocationID' in chunk:
+        location = pd.to_numeric(chunk['PULocationID'], errors='coerce').to_numpy()
+        known = (location >= 0) & (location < len(boroughs))
+        borough[known] = boroughs[location[known].astype(np.int64)]
+
+    rate = pd.to_numeric(chunk['RatecodeID'], errors='coerce').to_numpy()
+    rate = np.where((rate >= 0) & (rate < OTHER_RATE_CODE), rate, OTHER_RATE_CODE).astype(np.int64)
+
+    return (month * 16 + borough) * 128 + rate
+
+
+class StratifiedSampler:
+    """Running per-stratum counts and the keep rule for one pass over a file."""
+
+    def __init__(self, fraction):
+        if not 0 < fraction <= 1:
+            raise ValueError("sample fraction must be in (0, 1]")
+        ratio = Fraction(fraction).limit_denominator(MAX_DENOMINATOR)
+        self.numerator, self.denominator = ratio.numerator, ratio.denominator
+        self.seen = {}
+        self.kept = {}
+
+    def keep_mask(self, keys):
+        strata, inverse = np.unique(keys, return_inverse=True)
+        offsets = np.array([self.seen.get(key, 0) for key in strata.tolist()], dtype=np.int64)
+        position = offsets[inverse] + pd.Series(inverse).groupby(inverse).cumcount().to_numpy()
+
+        # ceil(a / q) is -(-a // q) in integers
+        p, q = self.numerator, self.denominator
+        keep = -(-(position + 1) * p // q) > -(-position * p // q)
+
+        seen = np.bincount(inverse, minlength=len(strata))
+        kept = np.bincount(inverse, weights=keep, minlength=len(strata)).astype(np.int64)
+        for key, n_seen, n_kept in zip(strata.tolist(), seen.tolist(), kept.tolist()):
+            self.seen[key] = self.seen.get(key, 0) + n_seen
+            self.kept[key] = self.kept.get(key, 0) + n_kept
+        return keep
+
+
+def sample_trip_file(fraction, trip_path=None, zone_path=None, output_path=None,
+                     chunksize=SAMPLE_CHUNK_ROWS):
+    """
+    Write the stratified sample of trip_path to output_path (default
+    sample_path()) in one streaming pass; returns the output path.
+    """
+    trip_path = Path(trip_path or project_root / TRIP_DATA_PATH)
+    zone_path = Path(zone_path or project_root / ZONE_LOOKUP_PATH)
+    output_path = Path(output_path or sample_path(trip_path, fraction))
+    output_path.parent.mkdir(parents=True, exist_ok=True)
+
+    print(f"Sampling {fraction:g} of {trip_path.name} by month, borough and rate code ...")
+    start = time.perf_counter()
+    boroughs = borough_lookup(zone_path)
+    sampler = StratifiedSampler(fraction)
+
+    tmp_path = output_path.with_suffix('.tmp')
+    # values are kept as text so the sample repeats the source rows exactly
+    chunks = pd.read_csv(trip_path, dtype=str, keep_default_na=False, chunksize=chunksize)
+    with open(tmp_path, 'w', newline='') as out:
+        for i, chunk in enumerate(chunks):
+            keep = sampler.keep_mask(stratum_keys(chunk, boroughs))
+            chunk[keep].to_csv(out, header=(i == 0), index=False)
+    os.replace(tmp_path, output_path)
+
+    rows, kept = sum(sampler.seen.values()), sum(sampler.kept.values())
+    print(f"  ✓ {kept:,} of {rows:,} rows from {len(sampler.seen):,} strata "
+          f"in {time.perf_counter() - start:.1f}s -> {output_path}")
+    return output_path
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Write a stratified sample of a trip file.")
+    parser.add_argument('--fraction', type=float, default=0.01)
+    parser.add_argument('--trips', help="trip CSV (default: config.TRIP_DATA_PATH)")
+    parser.add_argument('--zones', help="zone lookup CSV (default: config.ZONE_LOOKUP_PATH)")
+    parser.add_argument('--output', help="sample CSV (default: under config.SAMPLE_DATA_DIR)")
+    args = parser.parse_args()
+    sample_trip_file(args.fraction, args.trips, args.zones, args.output)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,188 @@
+"""
+Content-hashed cache of pipeline stage outputs.
+
+Each Stage names the function it runs, the stages it depends on, the
+files it reads and the parameters it takes. Its key is a hash of:
+- the key of every dependency;
+- the content of its input files;
+- its parameters;
+- the source of the module of its function and of the other modules it
+  uses, so an edited helper or constant is picked up without listing it.
+Changing a threshold in remove_outliners therefore changes the key of
+the outlier stage and of every stage after it, while the stages before
+it are read back from the cache.
+
+The cache keeps the latest entry of each stage per set of input files,
+so a sample run and a full run do not evict each other's outputs.
+
+Outputs are stored as Feather (Arrow IPC) files, which keep the compact
+dtypes (category, UInt8, float32) and load much faster than CSV. Extra
+return values (the exclusion log) go to a JSON sidecar.
+"""
+
+import hashlib
+import inspect
+import json
+import time
+from pathlib import Path
+import sys
+
+import pandas as pd
+
+backend_dir = Path(__file__).resolve().parents[1]
+project_root = Path(__file__).resolve().parents[2]
+sys.path.insert(0, str(backend_dir))
+
+from config import STAGE_CACHE_DIR
+
+HASH_CHUNK_BYTES = 8 * 1024 * 1024
+# Feather needs a default index; the frame's index (the source row number,
+# used by the rejection log) is stored in this column
+INDEX_COLUMN = '__index__'
+
+
+def file_digest(path):
+    """blake2b of a file's content."""
+    digest = hashlib.blake2b(digest_size=16)
+    with open(path, 'rb') as f:
+        while chunk := f.read(HASH_CHUNK_BYTES):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def code_version(modules):
+    """Hash of the source of modules."""
+    digest = hashlib.blake2b(digest_size=16)
+    for module in sorted(set(modules), key=lambda module: module.__name__):
+        digest.update(inspect.getsource(module).encode())
+    return digest.hexdigest()
+
+
+class Stage:
+    """
+    One pipeline step: func(*dependency outputs, **kwargs, **params).
+    kwargs (e.g. file paths) are passed but not hashed; the content of
+    files is hashed instead. code lists the modules func uses besides its
+    own. A func may return (df, extra...); its dependents then receive
+    only df.
+    """
+
+    def __init__(self, name, func, deps=(), params=None, kwargs=None, files=(), code=()):
+        self.name = name
+        self.func = func
+        self.deps = list(deps)
+        self.params = params or {}
+        self.kwargs = kwargs or {}
+        self.files = [Path(f) for f in files]
+        self.code = [inspect.getmodule(func), *code]
+        self._key = None
+        self._inputs = None
+        self._file_digests = None
+
+    def file_digests(self):
+        if self._file_digests is None:
+            self._file_digests = [file_digest(path) for path in self.files]
+        return self._file_digests
+
+    @property
+    def key(self):
+        if self._key is None:
+            digest = hashlib.blake2b(digest_size=16)
+            digest.update(self.name.encode())
+            digest.update(code_version(self.code).encode())
+            digest.update(json.dumps(self.params, sort_keys=True, default=str).encode())
+            for dep in self.deps:
+                digest.update(dep.key.encode())
+            for file_hash in self.file_digests():
+                digest.update(file_hash.encode())
+            self._key = digest.hexdigest()
+        return self._key
+
+    @property
+    def inputs(self):
+        """Hash of the files read by this stage and the stages before it."""
+        if self._inputs is None:
+            digest = hashlib.blake2b(digest_size=8)
+            for dep in self.deps:
+                digest.update(dep.inputs.encode())
+            for file_hash in self.file_digests():
+                digest.update(file_hash.encode())
+            self._inputs = digest.hexdigest()
+        return self._inputs
+
+
+class StageCache:
+    """Runs stages, reusing cached outputs whose key has not changed."""
+
+    def __init__(self, cache_dir=None, enabled=True):
+        self.cache_dir = Path(cache_dir) if cache_dir else project_root / STAGE_CACHE_DIR
+        self.enabled = enabled
+        self.report = []
+        self._results = {}
+
+    def _paths(self, stage):
+        base = self.cache_dir / f"{stage.name}-{stage.inputs}-{stage.key}"
+        return base.with_suffix('.feather'), base.with_suffix('.json')
+
+    def _load(self, stage):
+        frame_path, extra_path = self._paths(stage)
+        if not frame_path.exists():
+            return None
+        df = pd.read_feather(frame_path).set_index(INDEX_COLUMN)
+        df.index.name = None
+        if extra_path.exists():
+            with open(extra_path) as f:
+                return (df, *json.load(f))
+        return df
+
+    def _save(self, stage, result):
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        frame_path, extra_path = self._paths(stage)
+        df, extra = (result[0], list(result[1:])) if isinstance(result, tuple) else (result, None)
+
+        tmp_path = frame_path.with_suffix('.tmp')
+        df.reset_index(drop=True).assign(**{INDEX_COLUMN: df.index.to_numpy()}).to_feather(tmp_path)
+        tmp_path.replace(frame_path)
+        if extra is not None:
+            with open(extra_path, 'w') as f:
+                json.dump(extra, f, default=int)
+
+        # keep one entry per stage and input files so the cache does not
+        # grow with every edit
+        for old in self.cache_dir.glob(f"{stage.name}-{stage.inputs}-*"):
+            if old not in (frame_path, extra_path):
+                old.unlink()
+
+    def run(self, stage):
+        """Output of stage, computing only the stages whose output is not cached."""
+        if stage.name in self._results:
+            return self._results[stage.name]
+
+        started = time.perf_counter()
+        result = self._load(stage) if self.enabled else None
+        if result is not None:
+            status = "cached"
+        else:
+            inputs = [self.frame(dep) for dep in stage.deps]
+            started = time.perf_counter()
+            result = stage.func(*inputs, **stage.kwargs, **stage.params)
+            if self.enabled:
+                self._save(stage, result)
+            status = "computed"
+
+        self.report.append((stage.name, status, time.perf_counter() - started))
+        self._results[stage.name] = result
+        return result
+
+    def frame(self, stage):
+        """DataFrame output of stage (without the extra return values)."""
+        result = self.run(stage)
+        return result[0] if isinstance(result, tuple) else result
+
+    def print_report(self):
+        print(f"\n{'='*50}")
+        print("PIPELINE STAGES")
+        print(f"{'='*50}")
+        for name, status, seconds in self.report:
+            print(f"  {name:<16}{status:<10}{seconds:>8.2f}s")
+        print(f"{'='*50}")
@@ -0,0 +1,336 @@
+"""
+Micro-batch ingestion of trip files dropped into a directory.
+
+A long-running loop polls the drop directory (config.STREAM_DROP_DIR) for
+new trip CSVs and for rows appended to the ones it has seen. Each poll
+reads the complete lines added since the last one, up to max_batch_rows,
+and runs them through the same steps as intergrate_data: zone assignment,
+cleaning, type standardisation, features and zone features. The batch is
+then inserted into trips and appended to the processed store. The
+aggregate file gets the batch's counts and sums added, and an appended
+dataset version ("<load>+<batch>") is published: on its next request each
+API worker appends the new trips to its column store instead of reloading
+it.
+
+Read offsets are kept in the stream_offsets table and committed in the
+transaction that inserts the batch, so a restart continues where the
+service stopped and never inserts a batch twice. A crash after that
+commit but before the batch is appended to the processed store and the
+aggregate file leaves them without it; rebuild the aggregate file with
+python -m analytics.aggregate_file. Every batch appends a line of
+metrics to LOG_DIR/stream_metrics.jsonl: rows read, kept and inserted,
+processing time, throughput, and end-to-end latency from the last write
+of the oldest file in the batch to the publication of the new version.
+
+The estimator table needs every trip of a cell and is rebuilt by the next
+full ingest.
+
+Usage (from backend/):
+    python -m Pipeline.streaming [--drop-dir PATH] [--interval 5] [--sqlite PATH] [--once]
+"""
+
+import argparse
+import contextlib
+from datetime import datetime
+import io
+import json
+from pathlib import Path
+import sys
+import time
+
+import pandas as pd
+
+backend_dir = Path(__file__).resolve().parents[1]
+project_root = Path(__file__).resolve().parents[2]
+sys.path.insert(0, str(backend_dir))
+
+from config import STREAM_DROP_DIR, LOG_DIR, ZONE_LOOKUP_PATH, ZONES_GEOJSON_PATH
+from database import db_connection
+from database.db_connection import get_connection, close_connection
+from database.insert_data import TRIP_COLUMNS, INSERT_TRIP_SQL, prepare_trip_rows
+from database.dataset_version import dataset_version, appended_version, bump_dataset_version
+from analytics.aggregate_file import add_to_aggregates
+from analytics.column_store import TripColumnStore, LOAD_COLUMNS
+from .data_loader import load_zone_lookup, TRIP_DTYPES
+from .zone_assignment import assign_zones, has_coordinates, load_zone_polygons, ZoneGridIndex
+from .data_cleaning import remove_missing_values, remove_duplicates, remove_outliners, standardize_data_types
+from .feature_engineering import engineer_features
+from .data_integration import merge_zones
+from .processed_store import append_processed_trips
+
+POLL_INTERVAL_SECONDS = 5.0
+MAX_BATCH_ROWS = 50_000
+# read offsets per drop directory and file, committed with each batch's trips
+CREATE_OFFSETS_SQL = """
+    CREATE TABLE IF NOT EXISTS stream_offsets (
+        drop_dir VARCHAR(500) NOT NULL,
+        file_name VARCHAR(255) NOT NULL,
+        read_offset BIGINT NOT NULL,
+        header TEXT NOT NULL,
+        PRIMARY KEY (drop_dir, file_name)
+    )
+"""
+INSERT_OFFSET_SQL = """
+    INSERT INTO stream_offsets (drop_dir, file_name, read_offset, header) VALUES (%s, %s, %s, %s)
+"""
+METRICS_FILE = 'stream_metrics.jsonl'
+
+# trips columns in the column store's LOAD_COLUMNS order (the processed
+# frames call average_speed_mph 'average-speed_mph')
+LOAD_COLUMN_INDEX = [TRIP_COLUMNS.index('average-speed_mph' if name == 'average_speed_mph' else name)
+                     for name in LOAD_COLUMNS]
+
+
+class DropDirectory:
+    """
+    Trip CSVs in a directory and how far each has been read. The offsets
+    are kept in the stream_offsets table and saved with commit() in the
+    transaction that inserts the batch's trips.
+    """
+
+    def __init__(self, path):
+        self.path = Path(path)
+        self.path.mkdir(parents=True, exist_ok=True)
+        # file name -> {"offset": bytes read, "header": first line}
+        self.files = self._load_offsets()
+
+    def _load_offsets(self):
+        conn = get_connection()
+        cursor = conn.cursor()
+        try:
+            cursor.execute(CREATE_OFFSETS_SQL)
+            conn.commit()
+            cursor.execute("SELECT file_name, read_offset, header FROM stream_offsets WHERE drop_dir = %s",
+                           (str(self.path.resolve()),))
+            return {name: {'offset': int(offset), 'header': header}
+                    for name, offset, header in cursor.fetchall()}
+        finally:
+            cursor.close()
+            close_connection(conn)
+
+    def read_new_lines(self, max_rows):
+        """
+        The complete lines added to each file since the last commit, at most
+        max_rows in total, as dicts with the file name, its header line, the
+        data bytes, their start offset and the file's mtime.
+        """
+        pending = []
+        for file in sorted(self.path.glob('*.csv')):
+            if max_rows <= 0:
+                break
+            stat = file.stat()
+            state = self.files.get(file.name)
+            # a file that shrank was replaced: read it again from the start
+            if state is None or stat.st_size < state['offset']:
+                state = {'offset': 0, 'header': None}
+            if stat.st_size == state['offset']:
+                continue
+
+            with open(file, 'rb') as f:
+                f.seek(state['offset'])
+                data = f.read(stat.st_size - state['offset'])
+            # a last line without its newline is still being written
+            data = data[:data.rfind(b'\n') + 1]
+            if not data:
+                continue
+            start, header = state['offset'], state['header']
+            if header is None:
+                end = data.index(b'\n') + 1
+                header, data, start = data[:end].decode(), data[end:], start + end
+
+            lines = data.splitlines(keepends=True)[:max_rows]
+            max_rows -= len(lines)
+            pending.append({'name': file.name, 'header': header, 'data': b''.join(lines),
+                            'start': start, 'mtime': stat.st_mtime})
+        return pending
+
+    def save_offsets(self, pending, cursor):
+        """Store the offsets after the lines of pending, in cursor's transaction."""
+        drop_dir = str(self.path.resolve())
+        for entry in pending:
+            cursor.execute("DELETE FROM stream_offsets WHERE drop_dir = %s AND file_name = %s",
+                           (drop_dir, entry['name']))
+            cursor.execute(INSERT_OFFSET_SQL, (drop_dir, entry['name'], entry['start'] + len(entry['data']),
+                                               entry['header']))
+
+    def mark_read(self, pending):
+        """Continue after the lines of pending once their offsets are committed."""
+        for entry in pending:
+            self.files[entry['name']] = {'offset': entry['start'] + len(entry['data']),
+                                         'header': entry['header']}
+
+
+class MicroBatchIngestor:
+    """Cleans, inserts and publishes one batch of new trip rows at a time."""
+
+    def __init__(self, drop_dir=None, zone_path=None, zones_geojson_path=None,
+                 processed_path=None, max_batch_rows=MAX_BATCH_ROWS, verbose=False):
+        self.drop = DropDirectory(drop_dir or project_root / STREAM_DROP_DIR)
+        self.max_batch_rows = max_batch_rows
+        self.processed_path = processed_path
+        self.verbose = verbose
+        with self._quiet():
+            self.zone_lookup = load_zone_lookup(zone_path or project_root / ZONE_LOOKUP_PATH)
+        self.zones_geojson_path = Path(zones_geojson_path or project_root / ZONES_GEOJSON_PATH)
+        self._zone_index = None
+        self.metrics_path = project_root / LOG_DIR / METRICS_FILE
+        self.batches = 0
+        self.totals = {'rows_read': 0, 'rows_inserted': 0, 'seconds': 0.0}
+
+    def _quiet(self):
+        """The pipeline functions print per call; hide that unless verbose."""
+        return contextlib.nullcontext() if self.verbose else contextlib.redirect_stdout(io.StringIO())
+
+    def _read_frame(self, pending):
+        frames = [pd.read_csv(io.BytesIO(entry['header'].encode() + entry['data']), dtype=TRIP_DTYPES)
+                  for entry in pending if entry['data']]
+        return pd.concat(frames, ignore_index=True) if frames else None
+
+    def clean(self, trips):
+        """The intergrate_data steps for one batch; returns the merged frame."""
+        if has_coordinates(trips) and self._zone_index is None:
+            self._zone_index = ZoneGridIndex(load_zone_polygons(self.zones_geojson_path))
+        trips = assign_zones(trips, index=self._zone_index)
+        trips = remove_duplicates(remove_missing_values(trips))
+        trips, _ = remove_outliners(trips)
+        if trips.empty:
+            return trips
+        trips = engineer_features(standardize_data_types(trips))
+        return merge_zones(trips, self.zone_lookup)
+
+    def insert(self, trips, pending):
+        """
+        Insert the batch and the offsets after it in one transaction; returns
+        the inserted row tuples.
+        """
+        conn = get_connection()
+        cursor = conn.cursor()
+        try:
+            values = []
+            if trips is not None and not trips.empty:
+                cursor.execute("SELECT LocationID FROM taxi_zones")
+                valid_location_ids = {row[0] for row in cursor.fetchall()}
+                cursor.execute("SELECT RatecodeID FROM rate_codes")
+                valid_rate_codes = {row[0] for row in cursor.fetchall()}
+
+                values, _ = prepare_trip_rows(trips, valid_location_ids, valid_rate_codes)
+                if values:
+                    cursor.executemany(INSERT_TRIP_SQL, values)
+            self.drop.save_offsets(pending, cursor)
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+        finally:
+            cursor.close()
+            close_connection(conn)
+        self.drop.mark_read(pending)
+        return values
+
+    def publish(self, values):
+        """
+        Add the inserted rows to the aggregate file and publish an appended
+        dataset version, so the API adds them to its column store.
+        """
+        version = appended_version(dataset_version.get())
+        raw = TripColumnStore.convert_rows([tuple(row[i] for i in LOAD_COLUMN_INDEX) for row in values])
+        add_to_aggregates(raw, version)
+        bump_dataset_version(version)
+        return version
+
+    def run_once(self):
+        """Ingest the rows added since the last batch; returns the batch metrics or None."""
+        pending = self.drop.read_new_lines(self.max_batch_rows)
+        if not pending:
+            return None
+
+        started = time.time()
+        trips = self._read_frame(pending)
+        if trips is None or trips.empty:
+            # only header lines so far
+            self.insert(None, pending)
+            return None
+
+        rows_read = len(trips)
+        with self._quiet():
+            trips = self.clean(trips)
+            rows_kept = len(trips)
+            values = self.insert(trips, pending)
+            if values:
+                self.batches += 1
+                append_processed_trips(trips, f"stream-{int(started * 1000)}", self.processed_path)
+                version = self.publish(values)
+            else:
+                version = None
+        finished = time.time()
+
+        metrics = {
+            'batch_started': datetime.fromtimestamp(started).isoformat(timespec='seconds'),
+            'files': [entry['name'] for entry in pending],
+            'rows_read': rows_read,
+            'rows_kept': rows_kept,
+            'rows_inserted': len(values),
+            'seconds': round(finished - started, 3),
+            'rows_per_second': round(rows_read / (finished - started), 1),
+            # from the last write of the oldest file to the new version
+            'latency_seconds': round(finished - min(entry['mtime'] for entry in pending), 3),
+            'dataset_version': version,
+        }
+        self.totals['rows_read'] += rows_read
+        self.totals['rows_inserted'] += len(values)
+        self.totals['seconds'] += finished - started
+        self._record(metrics)
+        return metrics
+
+    def _record(self, metrics):
+        self.metrics_path.parent.mkdir(parents=True, exist_ok=True)
+        with open(self.metrics_path, 'a') as f:
+            f.write(json.dumps(metrics) + '\n')
+        print(f"  batch {', '.join(metrics['files'])}: {metrics['rows_read']:,} rows read, "
+              f"{metrics['rows_inserted']:,} inserted in {metrics['seconds']:.2f}s "
+              f"({metrics['rows_per_second']:,.0f} rows/s), latency {metrics['latency_seconds']:.1f}s")
+
+    def drain(self):
+        """Ingest batches until the directory has no new rows."""
+        while self.run_once() is not None:
+            pass
+
+    def run(self, interval=POLL_INTERVAL_SECONDS):
+        """Poll until interrupted; a poll that finds new rows is followed by another at once."""
+        print(f"Watching {self.drop.path} for trip files (every {interval:g}s, Ctrl+C to stop)")
+        try:
+            while True:
+                if self.run_once() is None:
+                    time.sleep(interval)
+        except KeyboardInterrupt:
+            pass
+        seconds = self.totals['seconds']
+        print(f"\nStopped: {self.totals['rows_read']:,} rows read, {self.totals['rows_inserted']:,} "
+              f"inserted in {self.batches} batches"
+              + (f" ({self.totals['rows_read'] / seconds:,.0f} rows/s while busy)" if seconds else ""))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Ingest trip files dropped into a directory in micro-batches.")
+    parser.add_argument('--drop-dir', help="directory to watch (default: config.STREAM_DROP_DIR)")
+    parser.add_argument('--zones', help="zone lookup CSV (default: config.ZONE_LOOKUP_PATH)")
+    parser.add_argument('--processed', help="processed store to append to (default: config.PROCESSED_DATA_PATH)")
+    parser.add_argument('--interval', type=float, default=POLL_INTERVAL_SECONDS, help="seconds between polls")
+    parser.add_argument('--max-batch-rows', type=int, default=MAX_BATCH_ROWS)
+    parser.add_argument('--sqlite', help="insert into an SQLite database file instead of MySQL")
+    parser.add_argument('--once', action='store_true', help="ingest what is there now and exit")
+    parser.add_argument('--verbose', action='store_true', help="show the pipeline output of every batch")
+    args = parser.parse_args(argv)
+
+    if args.sqlite:
+        db_connection.configure_backend("sqlite", args.sqlite)
+    ingestor = MicroBatchIngestor(args.drop_dir, args.zones, processed_path=args.processed,
+                                  max_batch_rows=args.max_batch_rows, verbose=args.verbose)
+    if args.once:
+        ingestor.drain()
+    else:
+        ingestor.run(args.interval)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,216 @@
+"""
+Zone assignment for coordinate-based trip files.
+
+Older TLC files and GPS feeds carry pickup/dropoff longitude and latitude
+instead of PULocationID/DOLocationID. ZoneGridIndex lays a uniform grid
+over the taxi zone polygons: cells that no zone boundary crosses resolve
+to a zone (or to no zone) by a table lookup, and only points in boundary
+cells are tested against the polygons of the zones touching their cell.
+Points outside every zone get NaN and are dropped by remove_missing_values.
+"""
+
+import json
+import time
+from pathlib import Path
+import sys
+
+import numpy as np
+
+backend_dir = Path(__file__).resolve().parents[1]
+project_root = Path(__file__).resolve().parents[2]
+sys.path.insert(0, str(backend_dir))
+
+from config import ZONES_GEOJSON_PATH
+
+# Raw coordinate columns -> the LocationID column they are mapped to
+COORDINATE_COLUMNS = {
+    'PULocationID': ('pickup_longitude', 'pickup_latitude'),
+    'DOLocationID': ('dropoff_longitude', 'dropoff_latitude'),
+}
+GRID_SIZE = 512
+BATCH_SIZE = 1_000_000
+# Upper bound on points x edges evaluated at once in the polygon test
+MAX_TEST_CELLS = 4_000_000
+
+NO_ZONE = -1
+
+
+def load_zone_polygons(path=None):
+    """
+    [(LocationID, [ring, ...]), ...] with every ring an (n, 2) lon/lat array.
+    Reads the GeoJSON written by scripts/convert_shapefile.py, or the
+    shapefile itself (needs geopandas).
+    """
+    path = Path(path) if path else project_root / ZONES_GEOJSON_PATH
+    if path.suffix == '.shp':
+        import geopandas as gpd
+        features = json.loads(gpd.read_file(str(path)).to_crs(epsg=4326).to_json())['features']
+    else:
+        with open(path) as f:
+            features = json.load(f)['features']
+
+    polygons = []
+    for feature in features:
+        geometry = feature['geometry']
+        if geometry is None:
+            continue
+        parts = [geometry['coordinates']] if geometry['type'] == 'Polygon' else geometry['coordinates']
+        rings = [np.asarray(ring, dtype=np.float64)[:, :2] for part in parts for ring in part]
+        polygons.append((int(feature['properties']['LocationID']), rings))
+    return polygons
+
+
+def points_in_polygon(x, y, edges):
+    """Even-odd ray casting of points (x, y) against edges (x1, y1, x2, y2)."""
+    x1, y1, x2, y2 = edges
+    inside = np.zeros(len(x), dtype=bool)
+    step = max(1, MAX_TEST_CELLS // max(1, len(x1)))
+    for start in range(0, len(x), step):
+        px = x[start:start + step, None]
+        py = y[start:start + step, None]
+        crosses = (y1 > py) != (y2 > py)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            x_cross = x1 + (py - y1) * (x2 - x1) / (y2 - y1)
+        hits = np.count_nonzero(crosses & (px < x_cross), axis=1)
+        inside[start:start + step] = hits % 2 == 1
+    return inside
+
+
+class ZoneGridIndex:
+    """Uniform grid over the zone polygons."""
+
+    def __init__(self, polygons, grid_size=GRID_SIZE):
+        self.location_ids = np.array([location_id for location_id, _ in polygons], dtype=np.int16)
+        self.grid_size = grid_size
+
+        # one edge array (x1, y1, x2, y2) per zone
+        self.edges = []
+        for _, rings in polygons:
+            starts = np.concatenate([ring[:-1] for ring in rings])
+            ends = np.concatenate([ring[1:] for ring in rings])
+            self.edges.append((starts[:, 0], starts[:, 1], ends[:, 0], ends[:, 1]))
+
+        all_points = np.concatenate([ring for _, rings in polygons for ring in rings])
+        self.min_x, self.min_y = all_points.min(axis=0)
+        self.max_x, self.max_y = all_points.max(axis=0)
+        self.cell_w = (self.max_x - self.min_x) / grid_size
+        self.cell_h = (self.max_y - self.min_y) / grid_size
+
+        self._build_cells()
+
+    def _cell_coords(self, x, y):
+        cx = np.floor((x - self.min_x) / self.cell_w).astype(np.int64)
+        cy = np.floor((y - self.min_y) / self.cell_h).astype(np.int64)
+        return np.clip(cx, 0, self.grid_size - 1), np.clip(cy, 0, self.grid_size - 1)
+
+    def _build_cells(self):
+        n = self.grid_size
+        cell_pairs = []
+        for zone, (x1, y1, x2, y2) in enumerate(self.edges):
+            cx0, cy0 = self._cell_coords(np.minimum(x1, x2), np.minimum(y1, y2))
+            cx1, cy1 = self._cell_coords(np.maximum(x1, x2), np.maximum(y1, y2))
+            # every cell of every edge's bounding box (vectorised expansion)
+            widths, heights = cx1 - cx0 + 1, cy1 - cy0 + 1
+            counts = widths * heights
+            edge = np.repeat(np.arange(len(x1)), counts)
+            offset = np.arange(counts.sum()) - np.repeat(np.cumsum(counts) - counts, counts)
+            cells = np.unique((cy0[edge] + offset // widths[edge]) * n + cx0[edge] + offset % widths[edge])
+            cell_pairs.append(np.stack([cells, np.full(len(cells), zone)], axis=1))
+
+        pairs = np.concatenate(cell_pairs)
+        pairs = pairs[np.lexsort((pairs[:, 1], pairs[:, 0]))]
+        self.boundary = np.zeros(n * n, dtype=bool)
+        self.boundary[pairs[:, 0]] = True
+        # boundary cell -> candidate zones, as CSR offsets into candidate_zones
+        self.candidate_zones = pairs[:, 1].astype(np.int32)
+        self.candidate_start = np.searchsorted(pairs[:, 0], np.arange(n * n + 1))
+
+        # interior cells: the zone containing the cell centre holds the whole cell
+        self.cell_zone = np.full(n * n, NO_ZONE, dtype=np.int32)
+        interior = np.flatnonzero(~self.boundary)
+        centre_x = self.min_x + (interior % n + 0.5) * self.cell_w
+        centre_y = self.min_y + (interior // n + 0.5) * self.cell_h
+        for zone, edges in enumerate(self.edges):
+            x1, y1, x2, y2 = edges
+            in_box = ((centre_x >= min(x1.min(), x2.min())) & (centre_x <= max(x1.max(), x2.max()))
+                      & (centre_y >= min(y1.min(), y2.min())) & (centre_y <= max(y1.max(), y2.max())))
+            candidates = np.flatnonzero(in_box)
+            if len(candidates):
+                inside = points_in_polygon(centre_x[candidates], centre_y[candidates], edges)
+                self.cell_zone[interior[candidates[inside]]] = zone
+
+    def lookup(self, x, y):
+        """LocationID per point as float32, NaN for points outside every zone."""
+        x = np.asarray(x, dtype=np.float64)
+        y = np.asarray(y, dtype=np.float64)
+        zone = np.full(len(x), NO_ZONE, dtype=np.int32)
+
+        in_bounds = ((x >= self.min_x) & (x <= self.max_x) & (y >= self.min_y) & (y <= self.max_y))
+        points = np.flatnonzero(in_bounds)
+        cx, cy = self._cell_coords(x[points], y[points])
+        cells = cy * self.grid_size + cx
+
+        on_boundary = self.boundary[cells]
+        zone[points[~on_boundary]] = self.cell_zone[cells[~on_boundary]]
+
+        # boundary points: one (point, candidate zone) pair per zone touching the cell
+        points, cells = points[on_boundary], cells[on_boundary]
+        starts = self.candidate_start[cells]
+        counts = self.candidate_start[cells + 1] - starts
+        point = np.repeat(points, counts)
+        offset = np.arange(counts.sum()) - np.repeat(np.cumsum(counts) - counts, counts)
+        candidate = self.candidate_zones[np.repeat(starts, counts) + offset]
+
+        order = np.argsort(candidate, kind='stable')
+        point, candidate = point[order], candidate[order]
+        bounds = np.searchsorted(candidate, np.arange(len(self.edges) + 1))
+        for z in np.flatnonzero(np.diff(bounds)):
+            tested = point[bounds[z]:bounds[z + 1]]
+            tested = tested[zone[tested] == NO_ZONE]
+            if len(tested):
+                inside = points_in_polygon(x[tested], y[tested], self.edges[z])
+                zone[tested[inside]] = z
+
+        result = np.full(len(x), np.nan, dtype=np.float32)
+        found = zone != NO_ZONE
+        result[found] = self.location_ids[zone[found]]
+        return result
+
+
+def has_coordinates(df):
+    return all(col in df.columns for cols in COORDINATE_COLUMNS.values() for col in cols)
+
+
+def assign_zones(df, index=None, zones_path=None, batch_size=BATCH_SIZE):
+    """
+    Fill PULocationID/DOLocationID from the pickup/dropoff coordinates (only
+    where the ID is missing) and drop the coordinate columns.
+    """
+    if not has_coordinates(df):
+        return df
+
+    print("Assigning zones from coordinates...")
+    if index is None:
+        started = time.perf_counter()
+        index = ZoneGridIndex(load_zone_polygons(zones_path))
+        print(f"  Zone grid built: {len(index.edges)} zones, "
+              f"{index.grid_size}x{index.grid_size} cells in {time.perf_counter() - started:.2f}s")
+
+    started = time.perf_counter()
+    points = 0
+    for id_col, (lon_col, lat_col) in COORDINATE_COLUMNS.items():
+        ids = (df[id_col].to_numpy(dtype=np.float32, na_value=np.nan) if id_col in df.columns
+               else np.full(len(df), np.nan, dtype=np.float32))
+        missing = np.flatnonzero(np.isnan(ids))
+        lon = df[lon_col].to_numpy(dtype=np.float64, na_value=np.nan)
+        lat = df[lat_col].to_numpy(dtype=np.float64, na_value=np.nan)
+        for start in range(0, len(missing), batch_size):
+            rows = missing[start:start + batch_size]
+            ids[rows] = index.lookup(lon[rows], lat[rows])
+        df[id_col] = ids
+        points += len(missing)
+
+    elapsed = time.perf_counter() - started
+    rate = points / elapsed if elapsed else float('inf')
+    print(f"  {points:,} points assigned in {elapsed:.2f}s ({rate:,.0f} points/s)")
+    return df.drop(columns=[col for cols in COORDINATE_COLUMNS.values() for col in cols])
@@ -0,0 +1,143 @@
+"""
+Command line entry point (run from the project root):
+
+    python -m backend serve [--port 5000] [--sqlite PATH]
+    python -m backend ingest [--trips PATH] [--zones PATH] [--no-cache] [--sample FRACTION]
+    python -m backend load-db [--processed PATH] [--sample]
+    python -m backend stream [--drop-dir PATH] [--sqlite PATH] [--once]
+    python -m backend convert-zones [--shapefile PATH]
+    python -m backend bench {pipeline,api,zones,imports} [benchmark args]
+
+Every command imports what it needs when it runs, so --help and the API
+server do not pay for pandas, pyarrow or geopandas.
+"""
+
+import argparse
+from pathlib import Path
+import sys
+
+backend_dir = Path(__file__).resolve().parent
+sys.path.insert(0, str(backend_dir))
+
+BENCHMARKS = {
+    'pipeline': 'benchmarks.pipeline_benchmark',
+    'api': 'benchmarks.api_load_test',
+    'zones': 'benchmarks.zone_assignment_benchmark',
+    'imports': 'benchmarks.import_time',
+}
+
+
+def use_sqlite(path):
+    if path:
+        from database.db_connection import configure_backend
+        configure_backend("sqlite", path)
+
+
+def cmd_serve(args):
+    use_sqlite(args.sqlite)
+    from app import app
+    print("=" * 60)
+    print("NYC Taxi Trip API Server")
+    print("=" * 60)
+    print(f"API Documentation: http://{args.host}:{args.port}/")
+    print("=" * 60)
+    app.run(debug=args.debug, host=args.host, port=args.port)
+
+
+def cmd_ingest(args):
+    from Pipeline.data_integration import intergrate_data
+    intergrate_data(args.trips, args.zones, args.output, args.log_dir, args.zones_geojson,
+                    use_cache=not args.no_cache, sample_fraction=args.sample)
+
+
+def cmd_load_db(args):
+    if args.sqlite and not Path(args.sqlite).exists():
+        from database.sqlite_compat import create_schema
+        create_schema(args.sqlite)
+    use_sqlite(args.sqlite)
+    from database.insert_data import main as insert_main
+    if args.sample and not args.processed:
+        from config import SAMPLE_PROCESSED_PATH
+        args.processed = backend_dir.parent / SAMPLE_PROCESSED_PATH
+    insert_main(args.processed)
+
+
+def cmd_stream(args):
+    from Pipeline.streaming import main as stream_main
+    sys.argv = ["backend stream"] + args.stream_args
+    stream_main()
+
+
+def cmd_convert_zones(args):
+    from scripts.convert_shapefile import convert
+    if convert(args.shapefile) is None:
+        sys.exit(1)
+
+
+def cmd_bench(args):
+    import importlib
+    module = importlib.import_module(BENCHMARKS[args.benchmark])
+    sys.argv = [f"backend bench {args.benchmark}"] + args.args
+    module.main()
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(prog="python -m backend", description="NYC taxi dashboard backend")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    serve = commands.add_parser("serve", help="run the API server")
+    serve.add_argument("--host", default="0.0.0.0")
+    serve.add_argument("--port", type=int, default=5000)
+    serve.add_argument("--debug", action="store_true", help="Flask debug mode with reloader")
+    serve.add_argument("--sqlite", help="serve from an SQLite database file instead of MySQL")
+    serve.set_defaults(func=cmd_serve)
+
+    ingest = commands.add_parser("ingest", help="clean, enrich and write the processed trip store")
+    ingest.add_argument("--trips", help="trip CSV (default: config.TRIP_DATA_PATH)")
+    ingest.add_argument("--zones", help="zone lookup CSV (default: config.ZONE_LOOKUP_PATH)")
+    ingest.add_argument("--output", help="processed store directory (default: config.PROCESSED_DATA_PATH)")
+    ingest.add_argument("--log-dir", help="exclusion log directory (default: config.LOG_DIR)")
+    ingest.add_argument("--zones-geojson", help="zone polygons for coordinate-based trip files")
+    ingest.add_argument("--no-cache", action="store_true",
+                        help="recompute every stage instead of reusing cached stage outputs")
+    ingest.add_argument("--sample", type=float, metavar="FRACTION",
+                        help="run on a stratified sample (by month, borough and rate code) of the trips, "
+                             "written to config.SAMPLE_PROCESSED_PATH and config.SAMPLE_ESTIMATOR_TABLE_PATH "
+                             "unless --output is given")
+    ingest.set_defaults(func=cmd_ingest)
+
+    load_db = commands.add_parser("load-db", help="insert the processed store into the database")
+    load_db.add_argument("--processed", help="processed store directory (default: config.PROCESSED_DATA_PATH)")
+    load_db.add_argument("--sqlite", help="load an SQLite database file (created if missing) instead of MySQL")
+    load_db.add_argument("--sample", action="store_true",
+                         help="load the sample store written by 'ingest --sample' (config.SAMPLE_PROCESSED_PATH)")
+    load_db.set_defaults(func=cmd_load_db)
+
+    # the options are Pipeline.streaming's own, passed through (see stream --help)
+    stream = commands.add_parser("stream", add_help=False,
+                                 help="ingest trip files dropped into a directory in micro-batches")
+    stream.set_defaults(func=cmd_stream)
+
+    convert_zones = commands.add_parser("convert-zones", help="convert taxi_zones.shp to GeoJSON")
+    convert_zones.add_argument("--shapefile", help="default: config.ZONES_SHP_PATH")
+    convert_zones.set_defaults(func=cmd_convert_zones)
+
+    bench = commands.add_parser("bench", help="run a benchmark (remaining args are passed through)")
+    bench.add_argument("benchmark", choices=sorted(BENCHMARKS))
+    bench.add_argument("args", nargs=argparse.REMAINDER)
+    bench.set_defaults(func=cmd_bench)
+    return parser
+
+
+def main(argv=None):
+    parser = build_parser()
+    args, extra = parser.parse_known_args(argv)
+    if args.func is cmd_stream:
+        args.stream_args = extra
+    elif extra:
+        parser.error(f"unrecognized arguments: {' '.join(extra)}")
+    args.func(args)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,416 @@
+"""
+Precomputed trip aggregates in one memory-mapped file.
+
+insert_data writes the file after every load; each API worker maps it
+read-only, so all workers share the same physical pages instead of each
+computing and holding its own copy. The layout is fixed (little-endian,
+every section 64-byte aligned, in SECTION order after the header):
+
+    header      magic, layout version, zone count, dimension bytes, dataset version
+    trips       int64   [zone, day_of_week, hour]     trips by pickup zone/weekday/hour
+    total_cents int64   [zone, day_of_week, hour]     SUM(total_amount) in cents
+    sums        float64 [metric, zone, day, hour]     SUM of each CUBE_METRICS column
+    valid       int64   [metric, zone, day, hour]     non-NULL count of each metric
+    od_trips    int64   [pickup zone, dropoff zone]   origin-destination matrix
+    od_sums     float64 [metric, pu zone, do zone]    SUM of each OD_METRICS column
+    od_valid    int64   [metric, pu zone, do zone]
+    rate_trips  int64   [RatecodeID]                  trips by rate code
+    rate_total_cents, rate_sums, rate_valid           as above, by rate code
+    tip_brackets int64  [bracket]                     stats.tip_bracket_counts()
+    dimensions  uint8   JSON of the taxi_zones and rate_codes tables
+
+The unfiltered overview, by-borough, by-hour, by-rate-code, tip
+distribution, top locations/routes and hourly heatmap are answered from
+it. The time series needs the pickup date, so it stays on each worker's
+column store (whose time index is bucketed in advance).
+
+The streaming ingestor (Pipeline/streaming.py) adds each micro-batch to
+the current file with add_to_aggregates. A new file is written next to
+the old one and swapped in with os.replace(); readers notice the new inode on their next request and map
+it, while requests still holding the old mapping finish on the old data.
+
+Usage (from backend/), to rebuild the file from the current database:
+    python -m analytics.aggregate_file [--sqlite PATH]
+"""
+
+import argparse
+import json
+import mmap
+import os
+import struct
+import threading
+import time
+from pathlib import Path
+import sys
+
+import numpy as np
+
+backend_dir = Path(__file__).resolve().parents[1]
+project_root = Path(__file__).resolve().parents[2]
+sys.path.insert(0, str(backend_dir))
+
+from config import AGGREGATE_FILE_PATH
+from database import db_connection
+from database.db_connection import get_connection, close_connection
+from analytics.column_store import TripColumnStore, pickup_hour, pickup_day_of_week
+from analytics import stats
+from analytics.stats import _round, RATE_CODES, TIP_BRACKETS
+from utils.geography import BOROUGH_CODES, BOROUGHS, NO_BOROUGH_CODE
+
+MAGIC = b'TRIPAGG\0'
+LAYOUT_VERSION = 2
+# magic, layout version, zone count, dimensions bytes, dataset version
+HEADER = struct.Struct('<8sHHxxxxQ32s')
+ALIGNMENT = 64
+
+DAYS = 7
+HOURS = 24
+CUBE_METRICS = ['fare_amount', 'trip_distance', 'trip_duration_minutes', 'tip_percentage',
+                'average_speed_mph']
+OD_METRICS = ['fare_amount', 'trip_duration_minutes']
+
+
+def aggregate_path():
+    """The file belongs to the database: next to an SQLite file, else AGGREGATE_FILE_PATH."""
+    if db_connection.DB_BACKEND == "sqlite":
+        return Path(db_connection.SQLITE_PATH).with_suffix('.aggregates')
+    return project_root / AGGREGATE_FILE_PATH
+
+
+def section_layout(n_zones, dimensions_nbytes):
+    """[(name, dtype, shape, offset)] of the sections, in file order."""
+    cube = (n_zones, DAYS, HOURS)
+    od = (n_zones, n_zones)
+    sections = [
+        ('trips', np.int64, cube),
+        ('total_cents', np.int64, cube),
+        ('sums', np.float64, (len(CUBE_METRICS),) + cube),
+        ('valid', np.int64, (len(CUBE_METRICS),) + cube),
+        ('od_trips', np.int64, od),
+        ('od_sums', np.float64, (len(OD_METRICS),) + od),
+        ('od_valid', np.int64, (len(OD_METRICS),) + od),
+        ('rate_trips', np.int64, (RATE_CODES,)),
+        ('rate_total_cents', np.int64, (RATE_CODES,)),
+        ('rate_sums', np.float64, (len(CUBE_METRICS), RATE_CODES)),
+        ('rate_valid', np.int64, (len(CUBE_METRICS), RATE_CODES)),
+        ('tip_brackets', np.int64, (len(TIP_BRACKETS) + 1,)),
+        ('dimensions', np.uint8, (dimensions_nbytes,)),
+    ]
+    layout = []
+    offset = HEADER.size
+    for name, dtype, shape in sections:
+        offset = -(-offset // ALIGNMENT) * ALIGNMENT
+        layout.append((name, np.dtype(dtype).newbyteorder('<'), shape, offset))
+        offset += int(np.prod(shape)) * np.dtype(dtype).itemsize
+    return layout
+
+
+def _sums(codes, values, size):
+    valid = ~np.isnan(values)
+    return (np.bincount(codes[valid], weights=values[valid], minlength=size),
+            np.bincount(codes[valid], minlength=size))
+
+
+def build_aggregates(raw, n_zones):
+    """Section arrays (all but dimensions) from raw trip columns (TripColumnStore.load_raw)."""
+    pickup_zone = np.nan_to_num(raw['PULocationID']).astype(np.intp)
+    dropoff_zone = np.nan_to_num(raw['DOLocationID']).astype(np.intp)
+    cube_size = n_zones * DAYS * HOURS
+    cell = (pickup_zone * DAYS + pickup_day_of_week(raw['pickup'])) * HOURS + pickup_hour(raw['pickup'])
+    route = pickup_zone * n_zones + dropoff_zone
+
+    # SUM ignores NULL, so a NULL total counts as 0 cents
+    cents = np.rint(np.nan_to_num(raw['total_amount']) * 100)
+    arrays = {
+        'trips': np.bincount(cell, minlength=cube_size),
+        'total_cents': np.bincount(cell, weights=cents, minlength=cube_size).astype(np.int64),
+        'od_trips': np.bincount(route, minlength=n_zones * n_zones),
+    }
+    sums = [_sums(cell, raw[metric], cube_size) for metric in CUBE_METRICS]
+    arrays['sums'] = np.stack([total for total, _ in sums])
+    arrays['valid'] = np.stack([count for _, count in sums])
+    od_sums = [_sums(route, raw[metric], n_zones * n_zones) for metric in OD_METRICS]
+    arrays['od_sums'] = np.stack([total for total, _ in od_sums])
+    arrays['od_valid'] = np.stack([count for _, count in od_sums])
+
+    # the column store's RatecodeID codes (NULL -> 0)
+    rate = np.nan_to_num(raw['RatecodeID']).astype(np.uint8).astype(np.intp)
+    arrays['rate_trips'] = np.bincount(rate, minlength=RATE_CODES)
+    arrays['rate_total_cents'] = np.bincount(rate, weights=cents, minlength=RATE_CODES).astype(np.int64)
+    rate_sums = [_sums(rate, raw[metric], RATE_CODES) for metric in CUBE_METRICS]
+    arrays['rate_sums'] = np.stack([total for total, _ in rate_sums])
+    arrays['rate_valid'] = np.stack([count for _, count in rate_sums])
+    arrays['tip_brackets'] = stats.tip_bracket_counts(raw['tip_percentage'])
+    return arrays
+
+
+def write_aggregate_file(path, arrays, n_zones, dimensions, dataset_version=""):
+    """Write the sections to a temporary file and atomically replace path with it."""
+    dimension_bytes = json.dumps(dimensions, default=str).encode()
+    arrays = dict(arrays, dimensions=np.frombuffer(dimension_bytes, dtype=np.uint8))
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = path.with_suffix(path.suffix + '.tmp')
+
+    with open(tmp_path, 'wb') as f:
+        f.write(HEADER.pack(MAGIC, LAYOUT_VERSION, n_zones, len(dimension_bytes),
+                            dataset_version.encode()))
+        for name, dtype, shape, offset in section_layout(n_zones, len(dimension_bytes)):
+            f.write(b'\0' * (offset - f.tell()))
+            f.write(np.ascontiguousarray(arrays[name], dtype=dtype).reshape(shape).tobytes())
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, path)
+    return path
+
+
+def load_dimensions():
+    """The taxi_zones and rate_codes tables as lists of dicts."""
+    conn = get_connection()
+    cursor = conn.cursor(dictionary=True)
+    try:
+        cursor.execute("SELECT LocationID, Borough, Zone, service_zone FROM taxi_zones ORDER BY LocationID")
+        zones = cursor.fetchall()
+        cursor.execute("SELECT RatecodeID, rate_code_name, description FROM rate_codes ORDER BY RatecodeID")
+        rate_codes = cursor.fetchall()
+    finally:
+        cursor.close()
+        close_connection(conn)
+    return {'zones': zones, 'rate_codes': rate_codes}
+
+
+def publish_aggregates(dataset_version=""):
+    """Aggregate the trips table and publish the file for the API; returns its path."""
+    started = time.perf_counter()
+    raw = TripColumnStore.load_raw()
+    dimensions = load_dimensions()
+    max_zone = max([z['LocationID'] for z in dimensions['zones']] +
+                   [int(np.nanmax(raw[col], initial=0)) for col in ('PULocationID', 'DOLocationID')])
+    n_zones = max_zone + 1
+    path = write_aggregate_file(aggregate_path(), build_aggregates(raw, n_zones), n_zones,
+                                dimensions, dataset_version)
+    print(f"  ✓ Aggregate file written: {path} ({path.stat().st_size / 1024**2:.1f} MB, "
+          f"{len(raw['pickup']):,} trips in {time.perf_counter() - started:.2f}s)")
+    return path
+
+
+def add_to_aggregates(raw, dataset_version=""):
+    """
+    Publish the current aggregate file plus the trips in raw (rows just
+    inserted); the file is rebuilt from the database when there is none
+    yet or raw has a zone beyond it. Returns its path.
+    """
+    path = aggregate_path()
+    if not path.exists():
+        return publish_aggregates(dataset_version)
+    current = AggregateFile(path)
+    zones = np.concatenate([np.nan_to_num(raw['PULocationID']), np.nan_to_num(raw['DOLocationID'])])
+    if zones.size and zones.max() >= current.n_zones:
+        return publish_aggregates(dataset_version)
+
+    batch = build_aggregates(raw, current.n_zones)
+    arrays = {name: getattr(current, name) + values.reshape(getattr(current, name).shape)
+              for name, values in batch.items()}
+    dimensions = {'zones': current.zones, 'rate_codes': current.rate_codes}
+    return write_aggregate_file(path, arrays, current.n_zones, dimensions, dataset_version)
+
+
+class AggregateFile:
+    """Read-only numpy views over a mapped aggregate file."""
+
+    def __init__(self, path):
+        with open(path, 'rb') as f:
+            self._map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, layout_version, n_zones, dimensions_nbytes, version = HEADER.unpack_from(self._map)
+        if magic != MAGIC or layout_version != LAYOUT_VERSION:
+            raise ValueError(f"{path} is not a layout {LAYOUT_VERSION} aggregate file")
+        self.n_zones = n_zones
+        self.dataset_version = version.rstrip(b'\0').decode()
+        for name, dtype, shape, offset in section_layout(n_zones, dimensions_nbytes):
+            view = np.frombuffer(self._map, dtype=dtype, count=int(np.prod(shape)), offset=offset)
+            setattr(self, name, view.reshape(shape))
+
+        dimensions = json.loads(self.dimensions.tobytes())
+        self.zones = dimensions['zones']
+        self.rate_codes = dimensions['rate_codes']
+        # (Zone, Borough) group per LocationID; the SQL endpoints group by the
+        # names, so zones sharing a name are merged. -1: not in taxi_zones
+        self.zone_groups = sorted({(z['Zone'], z['Borough']) for z in self.zones},
+                                  key=lambda group: tuple(str(name) for name in group))
+        group_codes = {group: code for code, group in enumerate(self.zone_groups)}
+        self.group_of_zone = np.full(n_zones, -1, dtype=np.intp)
+        for z in self.zones:
+            self.group_of_zone[z['LocationID']] = group_codes[(z['Zone'], z['Borough'])]
+        self.borough_of_zone = np.full(n_zones, NO_BOROUGH_CODE, dtype=np.intp)
+        for z in self.zones:
+            self.borough_of_zone[z['LocationID']] = BOROUGH_CODES.get(z['Borough'], NO_BOROUGH_CODE)
+        self.rate_code_by_id = {r['RatecodeID']: r for r in self.rate_codes}
+
+    def pickup_counts(self, by_weekday=False):
+        """Pickups per [hour, LocationID], or per [day_of_week, hour, LocationID]."""
+        if by_weekday:
+            return self.trips.transpose(1, 2, 0)
+        return self.trips.sum(axis=1).T
+
+    def overview(self):
+        """Row of the /api/stats/overview query."""
+        total_trips = int(self.trips.sum())
+        sums = self.sums.reshape(len(CUBE_METRICS), -1).sum(axis=1)
+        valid = self.valid.reshape(len(CUBE_METRICS), -1).sum(axis=1)
+        with np.errstate(invalid='ignore', divide='ignore'):
+            means = dict(zip(CUBE_METRICS, sums / valid))
+        return {
+            'total_trips': total_trips,
+            'avg_fare': _round(means['fare_amount']),
+            'avg_distance': _round(means['trip_distance']),
+            'avg_duration': _round(means['trip_duration_minutes']),
+            'total_revenue': _round(self.total_cents.sum() / 100) if total_trips else None,
+            'avg_tip_percentage': _round(means['tip_percentage']),
+        }
+
+    @staticmethod
+    def _means(sums, valid, averages):
+        """{name: mean per group} for averages (name -> CUBE_METRICS column)."""
+        with np.errstate(invalid='ignore', divide='ignore'):
+            return {name: sums[CUBE_METRICS.index(column)] / valid[CUBE_METRICS.index(column)]
+                    for name, column in averages.items()}
+
+    def borough_statistics(self):
+        """Rows of the borough_statistics view."""
+        n_groups = len(BOROUGHS) + 1
+
+        def by_borough(zone_values):
+            return np.bincount(self.borough_of_zone, weights=zone_values, minlength=n_groups)
+
+        sums = np.stack([by_borough(metric.sum(axis=(1, 2))) for metric in self.sums])
+        valid = np.stack([by_borough(metric.sum(axis=(1, 2))) for metric in self.valid])
+        counts = by_borough(self.trips.sum(axis=(1, 2))).astype(np.int64)
+        revenue = by_borough(self.total_cents.sum(axis=(1, 2))) / 100
+        return stats.borough_rows(counts, self._means(sums, valid, stats.BOROUGH_AVERAGES), revenue)
+
+    def rate_code_statistics(self):
+        """Rows of the rate_code_statistics view."""
+        means = self._means(self.rate_sums, self.rate_valid, stats.RATE_CODE_AVERAGES)
+        return stats.rate_code_rows(self.rate_trips, means, self.rate_total_cents / 100,
+                                    self.rate_code_by_id.get)
+
+    def hourly_statistics(self):
+        """Trip count, average fare and speed per pickup hour."""
+        sums = self.sums.sum(axis=(1, 2))
+        valid = self.valid.sum(axis=(1, 2))
+        means = self._means(sums, valid, {'avg_fare': 'fare_amount', 'avg_speed': 'average_speed_mph'})
+        return stats.hourly_rows(self.trips.sum(axis=(0, 1)), means['avg_fare'], means['avg_speed'])
+
+    def tip_distribution(self):
+        """Trip count and share per tip bracket."""
+        return stats.tip_rows(self.tip_brackets)
+
+    def _by_group(self, codes, counts, fare_sums, fare_valid):
+        """Counts and fare sums per group code, dropping zones outside taxi_zones (the JOIN)."""
+        known = codes >= 0
+        n_groups = int(codes.max(initial=-1)) + 1
+        return (np.bincount(codes[known], weights=counts[known], minlength=n_groups),
+                np.bincount(codes[known], weights=fare_sums[known], minlength=n_groups),
+                np.bincount(codes[known], weights=fare_valid[known], minlength=n_groups))
+
+    def top_locations(self, kind, limit):
+        """Rows of the top-pickup (kind='pickup') or top-dropoff query."""
+        fare = OD_METRICS.index('fare_amount')
+        axis = 1 if kind == 'pickup' else 0
+        counts, fare_sums, fare_valid = self._by_group(
+            self.group_of_zone, self.od_trips.sum(axis=axis),
+            self.od_sums[fare].sum(axis=axis), self.od_valid[fare].sum(axis=axis))
+
+        rows = []
+        for code in np.flatnonzero(counts):
+            zone, borough = self.zone_groups[code]
+            rows.append({
+                'Zone': zone,
+                'Borough': borough,
+                'trip_count': int(counts[code]),
+                'avg_fare': _round(fare_sums[code] / fare_valid[code]) if fare_valid[code] else None,
+            })
+        rows.sort(key=lambda row: -row['trip_count'])
+        return rows[:limit]
+
+    def top_routes(self, limit):
+        """Rows of the top-routes query."""
+        fare = OD_METRICS.index('fare_amount')
+        duration = OD_METRICS.index('trip_duration_minutes')
+        n_groups = len(self.zone_groups)
+        pickup_group = self.group_of_zone[:, None]
+        dropoff_group = self.group_of_zone[None, :]
+        codes = np.where((pickup_group >= 0) & (dropoff_group >= 0),
+                         pickup_group * n_groups + dropoff_group, -1).ravel()
+
+        counts, fare_sums, fare_valid = self._by_group(
+            codes, self.od_trips.ravel(), self.od_sums[fare].ravel(), self.od_valid[fare].ravel())
+        _, duration_sums, duration_valid = self._by_group(
+            codes, self.od_trips.ravel(), self.od_sums[duration].ravel(), self.od_valid[duration].ravel())
+
+        nonzero = np.flatnonzero(counts)
+        top = nonzero[np.argsort(-counts[nonzero], kind='stable')][:limit]
+        rows = []
+        for code in top:
+            pickup_zone, pickup_borough = self.zone_groups[code // n_groups]
+            dropoff_zone, dropoff_borough = self.zone_groups[code % n_groups]
+            rows.append({
+                'pickup_zone': pickup_zone,
+                'pickup_borough': pickup_borough,
+                'dropoff_zone': dropoff_zone,
+                'dropoff_borough': dropoff_borough,
+                'trip_count': int(counts[code]),
+                'avg_fare': _round(fare_sums[code] / fare_valid[code]) if fare_valid[code] else None,
+                'avg_duration': (_round(duration_sums[code] / duration_valid[code])
+                                 if duration_valid[code] else None),
+            })
+        return rows
+
+
+class AggregateFileCache:
+    """The mapped aggregate file of this process, remapped when a new file is published."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._identity = None
+        self._file = None
+
+    def get(self):
+        """
+        The current AggregateFile, or None if none of this layout has been
+        published for this database.
+        """
+        path = aggregate_path()
+        try:
+            stat = os.stat(path)
+        except FileNotFoundError:
+            return None
+        identity = (str(path), stat.st_ino, stat.st_mtime_ns)
+        if identity != self._identity:
+            with self._lock:
+                if identity != self._identity:
+                    try:
+                        self._file = AggregateFile(path)
+                    except ValueError as e:
+                        # written by an older layout: the endpoints fall back until it is rebuilt
+                        print(f"Aggregate file ignored: {e}")
+                        self._file = None
+                    self._identity = identity
+        return self._file
+
+
+aggregate_file = AggregateFileCache()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Rebuild the aggregate file from the database.")
+    parser.add_argument('--sqlite', help="SQLite database file instead of MySQL")
+    args = parser.parse_args()
+    if args.sqlite:
+        db_connection.configure_backend("sqlite", args.sqlite)
+    from database.dataset_version import dataset_version
+    publish_aggregates(dataset_version.get())
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,152 @@
+"""
+Bitmap indexes over the trip column store.
+
+One bit-packed bitmap (np.packbits, 1 bit per trip) is precomputed for
+every value of the low-cardinality filter dimensions: pickup borough,
+rate code, payment type, hour, day of week and fare bucket. A filter is
+answered by OR-ing the bitmaps of the requested values of each dimension
+and AND-ing the dimensions together. Because the store is sorted by
+pickup time, a date range only touches the bytes of its row slice.
+"""
+
+from pathlib import Path
+import sys
+
+import numpy as np
+
+backend_dir = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(backend_dir))
+
+from database.dimension_cache import dimension_cache
+from utils.geography import BOROUGH_CODES
+
+DIMENSIONS = ['borough', 'rate_code', 'payment_type', 'hour', 'day_of_week', 'fare_bucket']
+
+# Bucket b holds fares in [FARE_BUCKET_EDGES[b-1], FARE_BUCKET_EDGES[b]);
+# bucket 0 is below the first edge and the last bucket is open-ended
+FARE_BUCKET_EDGES = np.array([0, 5, 10, 15, 20, 30, 50, 100], dtype=np.float32)
+FARE_NULL_BUCKET = -1
+
+
+def pack(mask):
+    return np.packbits(mask)
+
+
+class Selection:
+    """Rows [lo, hi) of the store, optionally narrowed by a boolean mask over that slice."""
+
+    def __init__(self, lo, hi, mask=None):
+        self.lo = lo
+        self.hi = hi
+        self.mask = mask
+
+    @property
+    def count(self):
+        if self.mask is None:
+            return self.hi - self.lo
+        return int(np.count_nonzero(self.mask))
+
+    def rows(self):
+        """Store row numbers of the selected trips (ascending)."""
+        rows = np.arange(self.lo, self.hi)
+        return rows if self.mask is None else rows[self.mask]
+
+    def take(self, column):
+        values = column[self.lo:self.hi]
+        return values if self.mask is None else values[self.mask]
+
+
+class BitmapIndex:
+    """Packed bitmaps per (dimension, value) for one TripColumnStore."""
+
+    def __init__(self, size, bitmaps):
+        self.size = size
+        self.bitmaps = bitmaps
+
+    @classmethod
+    def build(cls, store):
+        fare = store['fare_amount']
+        fare_bucket = np.searchsorted(FARE_BUCKET_EDGES, fare, side='right').astype(np.int8)
+        fare_bucket[np.isnan(fare)] = FARE_NULL_BUCKET
+
+        bitmaps = {
+            'borough': cls._value_bitmaps(store['pickup_borough']),
+            'rate_code': cls._value_bitmaps(store['RatecodeID']),
+            'payment_type': cls._value_bitmaps(store['payment_type']),
+            'hour': cls._value_bitmaps(store['hour']),
+            'day_of_week': cls._value_bitmaps(store['day_of_week']),
+            'fare_bucket': cls._value_bitmaps(fare_bucket),
+        }
+        return cls(store.size, bitmaps)
+
+    @staticmethod
+    def _value_bitmaps(column):
+        return {int(value): pack(column == value) for value in np.unique(column)}
+
+    def nbytes(self):
+        return sum(bitmap.nbytes for values in self.bitmaps.values() for bitmap in values.values())
+
+    def _union(self, dimension, values, byte_lo, byte_hi):
+        """OR of the bitmaps of values (bytes byte_lo:byte_hi); unknown values match nothing."""
+        result = np.zeros(byte_hi - byte_lo, dtype=np.uint8)
+        for value in values:
+            bitmap = self.bitmaps[dimension].get(value)
+            if bitmap is not None:
+                np.bitwise_or(result, bitmap[byte_lo:byte_hi], out=result)
+        return result
+
+    @staticmethod
+    def _fare_buckets(min_fare, max_fare):
+        """
+        Buckets overlapping [min_fare, max_fare], and whether any of them is
+        only partly inside the range (rows then need an exact comparison).
+        """
+        low = -np.inf if min_fare is None else min_fare
+        high = np.inf if max_fare is None else max_fare
+        lowers = np.concatenate([[-np.inf], FARE_BUCKET_EDGES])
+        uppers = np.concatenate([FARE_BUCKET_EDGES, [np.inf]])
+        buckets, partial = [], False
+        for bucket, (lower, upper) in enumerate(zip(lowers, uppers)):
+            if lower <= high and upper > low:
+                buckets.append(bucket)
+                partial = partial or lower < low or upper > high
+        return buckets, partial
+
+    def select(self, store, filters):
+        """Selection of the trips matching parsed filters (see analytics.filters)."""
+        lo, hi = store.row_range(filters.get('start_date'), filters.get('end_date'))
+
+        conditions = []
+        if 'borough' in filters:
+            conditions.append(('borough', [BOROUGH_CODES.get(name) for name in filters['borough']]))
+        for dimension in ('payment_type', 'hour', 'day_of_week'):
+            if dimension in filters:
+                conditions.append((dimension, filters[dimension]))
+        if 'rate_code' in filters:
+            conditions.append(('rate_code', [dimension_cache.rate_code_id(name) for name in filters['rate_code']]))
+
+        min_fare, max_fare = filters.get('min_fare'), filters.get('max_fare')
+        refine_fare = False
+        if min_fare is not None or max_fare is not None:
+            buckets, refine_fare = self._fare_buckets(min_fare, max_fare)
+            conditions.append(('fare_bucket', buckets))
+
+        if not conditions or lo == hi:
+            return Selection(lo, hi)
+
+        byte_lo, byte_hi = lo // 8, -(-hi // 8)
+        bits = None
+        for dimension, values in conditions:
+            union = self._union(dimension, values, byte_lo, byte_hi)
+            bits = union if bits is None else np.bitwise_and(bits, union, out=bits)
+
+        offset = lo - byte_lo * 8
+        mask = np.unpackbits(bits)[offset:offset + hi - lo].view(bool)
+
+        if refine_fare:
+            fare = store['fare_amount'][lo:hi]
+            if min_fare is not None:
+                mask &= fare >= min_fare
+            if max_fare is not None:
+                mask &= fare <= max_fare
+        return Selection(lo, hi, mask)
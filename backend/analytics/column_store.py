@@ -0,0 +1,244 @@
+"""
+In-memory column store of the trips table.
+
+The columns the stats endpoints aggregate are loaded once from the
+database into compact numpy arrays, sorted by pickup time so a pickup date
+range is a contiguous slice of rows. Money sums are kept in integer cents
+so revenue totals match SQL exactly.
+
+A micro-batch from the streaming ingestor (Pipeline/streaming.py) does not
+reload the store: the trips inserted since the load (trip_id above the
+last one loaded) are read and merged into it, and the indexes rebuilt.
+"""
+
+import threading
+import time
+from datetime import datetime
+from pathlib import Path
+import sys
+
+import numpy as np
+
+backend_dir = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(backend_dir))
+
+from database.db_connection import get_connection, close_connection
+from analytics.bitmap_index import BitmapIndex
+from analytics.time_series import TimeSeriesIndex
+
+LOAD_QUERY = """
+    SELECT tpep_pickup_datetime, PULocationID, DOLocationID, RatecodeID, payment_type,
+           fare_amount, total_amount, trip_distance, trip_duration_minutes,
+           average_speed_mph, tip_percentage, pickup_borough_code, pickup_hour, pickup_weekday
+    FROM trips
+"""
+# LOAD_QUERY restricted to after_trip_id < trip_id <= up_to_trip_id
+LOAD_RANGE_QUERY = LOAD_QUERY + "    WHERE trip_id > %s AND trip_id <= %s\n"
+LOAD_COLUMNS = ['tpep_pickup_datetime', 'PULocationID', 'DOLocationID', 'RatecodeID', 'payment_type',
+                'fare_amount', 'total_amount', 'trip_distance', 'trip_duration_minutes',
+                'average_speed_mph', 'tip_percentage', 'pickup_borough_code', 'pickup_hour', 'pickup_weekday']
+FETCH_SIZE = 100_000
+
+# Code used for a NULL RatecodeID / payment_type
+NULL_CODE = 0
+
+
+def parse_datetime(text):
+    """'2024-01-10' or '2024-01-10 13:00:00' as datetime64[s]."""
+    return np.datetime64(datetime.fromisoformat(str(text)), 's')
+
+
+def pickup_hour(pickup):
+    """Hour of day (0-23) of datetime64 values."""
+    return (pickup.astype('datetime64[h]').astype(np.int64) % 24).astype(np.uint8)
+
+
+def pickup_day_of_week(pickup):
+    """Weekday of datetime64 values, 0 = Monday."""
+    # 1970-01-01 was a Thursday
+    return ((pickup.astype('datetime64[D]').astype(np.int64) + 3) % 7).astype(np.uint8)
+
+
+class TripColumnStore:
+    """Trip columns as numpy arrays, sorted by pickup time."""
+
+    def __init__(self, columns):
+        self.columns = columns
+        self.size = len(columns['pickup'])
+
+    def __getitem__(self, name):
+        return self.columns[name]
+
+    @staticmethod
+    def convert_rows(rows):
+        """DB rows in LOAD_COLUMNS order -> unsorted numpy columns."""
+        values = dict(zip(LOAD_COLUMNS, zip(*rows))) if rows else {name: () for name in LOAD_COLUMNS}
+        # the driver returns datetimes (MySQL) or ISO strings (SQLite); both parse
+        raw = {'pickup': np.array(values['tpep_pickup_datetime'], dtype='datetime64[s]')}
+        for name in LOAD_COLUMNS[1:]:
+            # Decimal -> float, None -> NaN
+            raw[name] = np.array(values[name], dtype=object).astype(np.float64)
+        return raw
+
+    @classmethod
+    def from_raw(cls, raw):
+        """Sort converted columns by pickup time and narrow them to compact dtypes."""
+        order = np.argsort(raw['pickup'], kind='stable')
+        pickup = raw['pickup'][order]
+
+        def numeric(name):
+            return raw[name][order].astype(np.float32)
+
+        def code(name, dtype):
+            return np.nan_to_num(raw[name][order], nan=NULL_CODE).astype(dtype)
+
+        def materialised(name, derived):
+            # trips loaded without the time features get them from the pickup time
+            values = raw[name][order]
+            return np.where(np.isnan(values), derived, values).astype(np.uint8)
+
+        columns = {
+            'pickup': pickup,
+            'hour': materialised('pickup_hour', pickup_hour(pickup)),
+            'day_of_week': materialised('pickup_weekday', pickup_day_of_week(pickup)),
+            # utils.geography codes; NULL is NO_BOROUGH_CODE (0)
+            'pickup_borough': code('pickup_borough_code', np.uint8),
+            'PULocationID': code('PULocationID', np.int16),
+            'DOLocationID': code('DOLocationID', np.int16),
+            'RatecodeID': code('RatecodeID', np.uint8),
+            'payment_type': code('payment_type', np.uint8),
+            'fare_amount': numeric('fare_amount'),
+            # SUM ignores NULL, so a NULL total counts as 0 cents
+            'total_cents': np.rint(np.nan_to_num(raw['total_amount'][order]) * 100).astype(np.int64),
+            'trip_distance': numeric('trip_distance'),
+            'trip_duration_minutes': numeric('trip_duration_minutes'),
+            'average_speed_mph': numeric('average_speed_mph'),
+            'tip_percentage': numeric('tip_percentage'),
+        }
+        return cls(columns)
+
+    @staticmethod
+    def last_trip_id():
+        """Highest trip_id in the database (0 when trips is empty)."""
+        conn = get_connection()
+        cursor = conn.cursor()
+        try:
+            cursor.execute("SELECT MAX(trip_id) FROM trips")
+            return int(cursor.fetchone()[0] or 0)
+        finally:
+            cursor.close()
+            close_connection(conn)
+
+    @classmethod
+    def load_raw(cls, after_trip_id=None, up_to_trip_id=None):
+        """
+        Every trip's LOAD_COLUMNS from the database as unsorted
+        float64/datetime64 columns, or only the trips with after_trip_id <
+        trip_id <= up_to_trip_id when those are given.
+        """
+        conn = get_connection()
+        cursor = conn.cursor()
+        batches = []
+        try:
+            if after_trip_id is None:
+                cursor.execute(LOAD_QUERY)
+            else:
+                cursor.execute(LOAD_RANGE_QUERY, (after_trip_id, up_to_trip_id))
+            while True:
+                rows = cursor.fetchmany(FETCH_SIZE)
+                if not rows:
+                    break
+                batches.append(cls.convert_rows(rows))
+        finally:
+            cursor.close()
+            close_connection(conn)
+
+        if not batches:
+            return cls.convert_rows([])
+        return {name: np.concatenate([batch[name] for batch in batches]) for name in batches[0]}
+
+    @classmethod
+    def load(cls):
+        """Read the store columns of every trip from the database."""
+        return cls.from_raw(cls.load_raw())
+
+    def merged(self, other):
+        """This store and other's trips as one store, sorted by pickup time."""
+        columns = {name: np.concatenate([self.columns[name], other.columns[name]])
+                   for name in self.columns}
+        order = np.argsort(columns['pickup'], kind='stable')
+        return TripColumnStore({name: array[order] for name, array in columns.items()})
+
+    def row_range(self, start=None, end=None):
+        """[lo, hi) rows with start <= pickup <= end (bounds as date/datetime strings)."""
+        pickup = self.columns['pickup']
+        lo, hi = 0, self.size
+        if start is not None:
+            lo = int(np.searchsorted(pickup, parse_datetime(start), side='left'))
+        if end is not None:
+            hi = int(np.searchsorted(pickup, parse_datetime(end), side='right'))
+        return lo, max(lo, hi)
+
+    def nbytes(self):
+        return sum(array.nbytes for array in self.columns.values())
+
+
+class TripStoreCache:
+    """Lazily loaded process-wide store with its bitmap and time series indexes."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._loaded = None
+        self._last_trip_id = 0
+        # refresh() calls requested / caught up with
+        self._refreshes = 0
+        self._refreshed = 0
+
+    def get(self):
+        """(store, bitmap index, time series index), loading them on first use."""
+        loaded = self._loaded
+        if loaded is None or self._refreshed != self._refreshes:
+            with self._lock:
+                refreshes = self._refreshes
+                if self._loaded is None:
+                    self._loaded = self._load()
+                elif self._refreshed != refreshes:
+                    self._loaded = self._append_new_trips(self._loaded[0])
+                self._refreshed = refreshes
+                loaded = self._loaded
+        return loaded
+
+    def _indexed(self, store):
+        return store, BitmapIndex.build(store), TimeSeriesIndex.build(store)
+
+    def _load(self):
+        started = time.perf_counter()
+        self._last_trip_id = TripColumnStore.last_trip_id()
+        store, index, time_index = self._indexed(
+            TripColumnStore.from_raw(TripColumnStore.load_raw(0, self._last_trip_id)))
+        print(f"Trip column store loaded: {store.size:,} trips, "
+              f"{store.nbytes() / 1024**2:.1f} MB columns + {index.nbytes() / 1024**2:.1f} MB bitmaps "
+              f"+ {time_index.nbytes() / 1024**2:.1f} MB time buckets "
+              f"in {time.perf_counter() - started:.2f}s")
+        return store, index, time_index
+
+    def _append_new_trips(self, store):
+        started = time.perf_counter()
+        last_trip_id = TripColumnStore.last_trip_id()
+        new = TripColumnStore.from_raw(TripColumnStore.load_raw(self._last_trip_id, last_trip_id))
+        self._last_trip_id = last_trip_id
+        loaded = self._indexed(store.merged(new))
+        print(f"Trip column store: {new.size:,} new trips appended "
+              f"in {time.perf_counter() - started:.2f}s")
+        return loaded
+
+    def refresh(self):
+        """Add the trips inserted since the load on the next request, keeping the loaded ones."""
+        self._refreshes += 1
+
+    def invalidate(self):
+        """Drop the loaded store; the next request reloads it."""
+        self._loaded = None
+
+
+trip_store = TripStoreCache()
@@ -0,0 +1,201 @@
+"""
+Trip duration and fare estimates by pickup zone, dropoff zone and departure time.
+
+The pipeline groups the cleaned trips into cells and keeps, per cell, the
+trip count and the 10th, 50th and 90th percentile of trip_duration_minutes
+and fare_amount:
+
+    zone          pickup zone x dropoff zone x hour of week (0 = Monday 00:00),
+                  only cells with at least MIN_CELL_TRIPS trips
+    borough_hour  pickup borough x dropoff borough x hour of week
+    borough       pickup borough x dropoff borough, any time
+
+write_estimator_table stores them as an uncompressed .npz of flat arrays.
+The zone cells are sorted by zone pair and hour, with pair_offsets[pair]
+pointing at the first cell of each pair (a pair has at most 168), so a
+lookup is an index and a search over at most 168 hours. A sparse zone
+cell falls back to the borough pair at that hour, then to the borough
+pair at any time.
+
+The API maps the file with EstimatorTableCache, which reloads it when the
+pipeline writes a new one; the file's identity is also part of the ETag of
+/api/estimate, since the table is written by the ingest and not by load-db.
+"""
+
+import os
+import threading
+from pathlib import Path
+import sys
+
+import numpy as np
+
+backend_dir = Path(__file__).resolve().parents[1]
+project_root = Path(__file__).resolve().parents[2]
+sys.path.insert(0, str(backend_dir))
+
+from config import ESTIMATOR_TABLE_PATH
+from utils.geography import BOROUGHS
+
+HOURS_OF_WEEK = 7 * 24
+MIN_CELL_TRIPS = 5
+METRICS = ['trip_duration_minutes', 'fare_amount']
+QUANTILES = [0.1, 0.5, 0.9]
+STAT_COLUMNS = [f"{metric}_p{round(q * 100)}" for metric in METRICS for q in QUANTILES]
+# borough codes run from NO_BOROUGH_CODE (0) to len(BOROUGHS)
+N_BOROUGH_CODES = len(BOROUGHS) + 1
+
+
+def estimator_path():
+    return project_root / ESTIMATOR_TABLE_PATH
+
+
+def cell_statistics(trips, level, keys):
+    """Count and quantiles per group of keys (pickup, dropoff[, hour_of_week] columns)."""
+    groups = trips.groupby(keys, observed=True, sort=True)[METRICS]
+    stats = groups.quantile(QUANTILES).unstack()
+    stats.columns = [f"{metric}_p{round(q * 100)}" for metric, q in stats.columns]
+    cells = stats[STAT_COLUMNS].astype(np.float32)
+    cells.insert(0, 'trips', groups.size())
+    cells.index.names = ['pickup', 'dropoff', 'hour_of_week'][:len(keys)]
+    cells = cells.reset_index()
+    if 'hour_of_week' not in cells:
+        cells.insert(2, 'hour_of_week', -1)
+    cells.insert(0, 'level', level)
+    return cells
+
+
+def estimator_cells(trips):
+    """
+    One row per cell of every level from the merged trips (engineered
+    duration, pickup_weekday/hour and borough codes).
+    """
+    trips = trips[['PULocationID', 'DOLocationID', 'pickup_borough_code', 'dropoff_borough_code',
+                   'pickup_weekday', 'pickup_hour'] + METRICS].assign(
+        hour_of_week=trips['pickup_weekday'].astype(np.int16) * 24 + trips['pickup_hour'])
+
+    # the API imports this module, so pandas is only imported by the pipeline
+    import pandas as pd
+
+    zone = cell_statistics(trips, 'zone', ['PULocationID', 'DOLocationID', 'hour_of_week'])
+    zone = zone[zone['trips'] >= MIN_CELL_TRIPS]
+    boroughs = ['pickup_borough_code', 'dropoff_borough_code']
+    borough_hour = cell_statistics(trips, 'borough_hour', boroughs + ['hour_of_week'])
+    borough = cell_statistics(trips, 'borough', boroughs)
+
+    cells = pd.concat([zone, borough_hour, borough], ignore_index=True)
+    for column in ('pickup', 'dropoff', 'hour_of_week'):
+        cells[column] = cells[column].astype(np.int16)
+    cells['trips'] = cells['trips'].astype(np.int32)
+    print(f" Estimator cells: {len(zone):,} zone, {len(borough_hour):,} borough-hour, "
+          f"{len(borough):,} borough")
+    return cells
+
+
+def write_estimator_table(cells, path=None):
+    """Store estimator_cells() as the lookup arrays; returns the path."""
+    path = Path(path or estimator_path())
+    path.parent.mkdir(parents=True, exist_ok=True)
+
+    zone = cells[cells['level'] == 'zone'].sort_values(['pickup', 'dropoff', 'hour_of_week'])
+    n_zones = int(max(zone['pickup'].max(), zone['dropoff'].max()) + 1) if len(zone) else 1
+    pair = zone['pickup'].to_numpy(np.int64) * n_zones + zone['dropoff'].to_numpy(np.int64)
+    arrays = {
+        'n_zones': np.array(n_zones),
+        'pair_offsets': np.searchsorted(pair, np.arange(n_zones * n_zones + 1)).astype(np.int32),
+        'zone_hour': zone['hour_of_week'].to_numpy(np.uint8),
+        'zone_trips': zone['trips'].to_numpy(np.int32),
+        'zone_stats': zone[STAT_COLUMNS].to_numpy(np.float32),
+    }
+
+    for level, shape in (('borough_hour', (N_BOROUGH_CODES, N_BOROUGH_CODES, HOURS_OF_WEEK)),
+                         ('borough', (N_BOROUGH_CODES, N_BOROUGH_CODES))):
+        rows = cells[cells['level'] == level]
+        index = (rows['pickup'].to_numpy(), rows['dropoff'].to_numpy())
+        if level == 'borough_hour':
+            index += (rows['hour_of_week'].to_numpy(),)
+        trips = np.zeros(shape, dtype=np.int32)
+        stats = np.full(shape + (len(STAT_COLUMNS),), np.nan, dtype=np.float32)
+        trips[index] = rows['trips'].to_numpy()
+        stats[index] = rows[STAT_COLUMNS].to_numpy(np.float32)
+        arrays[f'{level}_trips'] = trips
+        arrays[f'{level}_stats'] = stats
+
+    tmp_path = path.with_name(path.stem + '.tmp.npz')
+    np.savez(tmp_path, **arrays)
+    os.replace(tmp_path, path)
+    print(f" Estimator table written: {path} ({path.stat().st_size / 1024**2:.1f} MB)")
+    return path
+
+
+def _estimate(level, trips, stats):
+    values = [None if np.isnan(v) else round(float(v), 2) for v in stats]
+    result = {'level': level, 'trips': int(trips)}
+    for i, metric in enumerate(METRICS):
+        p10, p50, p90 = values[i * len(QUANTILES):(i + 1) * len(QUANTILES)]
+        result[metric] = {'median': p50, 'p10': p10, 'p90': p90}
+    return result
+
+
+class EstimatorTable:
+    """The arrays of one estimator table file."""
+
+    def __init__(self, path):
+        with np.load(path, allow_pickle=False) as data:
+            for name in data.files:
+                setattr(self, name, data[name])
+        self.n_zones = int(self.n_zones)
+
+    def estimate(self, pickup, dropoff, hour_of_week, pickup_borough, dropoff_borough):
+        """Most specific cell with enough trips, or None if the borough pair has no trips."""
+        if 0 <= pickup < self.n_zones and 0 <= dropoff < self.n_zones:
+            pair = pickup * self.n_zones + dropoff
+            lo, hi = self.pair_offsets[pair], self.pair_offsets[pair + 1]
+            i = lo + int(np.searchsorted(self.zone_hour[lo:hi], hour_of_week))
+            if i < hi and self.zone_hour[i] == hour_of_week:
+                return _estimate('zone', self.zone_trips[i], self.zone_stats[i])
+
+        boroughs = (pickup_borough, dropoff_borough)
+        if self.borough_hour_trips[boroughs + (hour_of_week,)] >= MIN_CELL_TRIPS:
+            return _estimate('borough_hour', self.borough_hour_trips[boroughs + (hour_of_week,)],
+                             self.borough_hour_stats[boroughs + (hour_of_week,)])
+        if self.borough_trips[boroughs] > 0:
+            return _estimate('borough', self.borough_trips[boroughs], self.borough_stats[boroughs])
+        return None
+
+
+class EstimatorTableCache:
+    """The estimator table of this process, reloaded when the pipeline writes a new one."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._identity = None
+        self._table = None
+
+    @staticmethod
+    def file_identity():
+        """(inode, mtime) of the table file, or None if there is none."""
+        try:
+            stat = os.stat(estimator_path())
+        except FileNotFoundError:
+            return None
+        return (stat.st_ino, stat.st_mtime_ns)
+
+    def version(self):
+        """The file identity as a string, for ETags."""
+        identity = self.file_identity()
+        return 'none' if identity is None else f"{identity[0]:x}-{identity[1]:x}"
+
+    def get(self):
+        """The current EstimatorTable, or None if the pipeline has not built one."""
+        identity = self.file_identity()
+        if identity is None:
+            return None
+        if identity != self._identity:
+            with self._lock:
+                if identity != self._identity:
+                    self._table = EstimatorTable(estimator_path())
+                    self._identity = identity
+        return self._table
+
+
+estimator_table = EstimatorTableCache()
@@ -0,0 +1,78 @@
+"""
+Trip filter parameters shared by the stats endpoints.
+
+    start_date, end_date   pickup range (inclusive), e.g. 2024-01-01
+    borough                pickup borough name(s)
+    rate_code              rate code name(s), e.g. Standard rate
+    payment_type           payment type code(s)
+    hour                   pickup hour(s), 0-23
+    day_of_week            pickup weekday(s), 0 = Monday .. 6 = Sunday
+    min_fare, max_fare     fare_amount range (inclusive)
+
+Multi-valued parameters take a comma-separated list (hour=7,8,9); values
+of one parameter are OR-ed, different parameters are AND-ed.
+"""
+
+from datetime import datetime
+
+LIST_PARAMS = {
+    'borough': str,
+    'rate_code': str,
+    'payment_type': int,
+    'hour': int,
+    'day_of_week': int,
+}
+RANGES = {'hour': (0, 23), 'day_of_week': (0, 6)}
+
+
+class FilterError(ValueError):
+    """Invalid filter parameter (reported to the client as a 400)."""
+
+
+def _parse_list(name, raw, convert):
+    values = []
+    for item in raw.split(','):
+        item = item.strip()
+        if not item:
+            continue
+        try:
+            value = convert(item)
+        except ValueError:
+            raise FilterError(f"Invalid value for {name}: {item!r}")
+        if name in RANGES:
+            low, high = RANGES[name]
+            if not low <= value <= high:
+                raise FilterError(f"{name} must be between {low} and {high}")
+        values.append(value)
+    return values
+
+
+def parse_trip_filters(args):
+    """Parsed filters from request args; parameters that are not given are left out."""
+    filters = {}
+
+    for name in ('start_date', 'end_date'):
+        raw = args.get(name)
+        if raw:
+            try:
+                datetime.fromisoformat(raw)
+            except ValueError:
+                raise FilterError(f"Invalid date for {name}: {raw!r}")
+            filters[name] = raw
+
+    for name, convert in LIST_PARAMS.items():
+        raw = args.get(name)
+        if raw:
+            values = _parse_list(name, raw, convert)
+            if values:
+                filters[name] = values
+
+    for name in ('min_fare', 'max_fare'):
+        raw = args.get(name)
+        if raw:
+            try:
+                filters[name] = float(raw)
+            except ValueError:
+                raise FilterError(f"Invalid value for {name}: {raw!r}")
+
+    return filters
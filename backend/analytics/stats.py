@@ -0,0 +1,206 @@
+"""
+Aggregations behind the stats endpoints, computed over a Selection of the
+trip column store. Each function returns the same rows (and ordering) as
+the SQL query or view it replaces.
+"""
+
+from decimal import Decimal, ROUND_HALF_UP
+from pathlib import Path
+import sys
+
+import numpy as np
+
+backend_dir = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(backend_dir))
+
+from database.dimension_cache import dimension_cache
+from utils.geography import BOROUGHS
+
+TIP_BRACKETS = ['0% (No Tip)', '1-10%', '11-15%', '16-20%', '21-25%', '25%+']
+TIP_BRACKET_EDGES = np.array([0, 10, 15, 20, 25], dtype=np.float32)
+CENT = Decimal('0.01')
+DAYS = 7
+HOURS = 24
+
+
+def _round(value):
+    """ROUND(x, 2) that maps an empty AVG (NaN) to NULL."""
+    value = float(value)
+    if np.isnan(value):
+        return None
+    # SQL rounds the exact decimal half away from zero (18.805 -> 18.81);
+    # round() would see the binary value (18.80499...) and give 18.8. 12
+    # significant digits drop the float error of summing 2-decimal amounts
+    return float(Decimal(f"{value:.12g}").quantize(CENT, rounding=ROUND_HALF_UP))
+
+
+def group_means(codes, values, n_groups):
+    """AVG per group code, ignoring NaN like SQL ignores NULL."""
+    valid = ~np.isnan(values)
+    sums = np.bincount(codes[valid], weights=values[valid].astype(np.float64), minlength=n_groups)
+    counts = np.bincount(codes[valid], minlength=n_groups)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        return sums / counts
+
+
+def group_revenue(codes, cents, n_groups):
+    """SUM(total_amount) per group code, in dollars (summed exactly in cents)."""
+    # float64 holds integer sums exactly up to 2**53 cents
+    return np.bincount(codes, weights=cents, minlength=n_groups) / 100
+
+
+def _grouped(store, selection, codes, n_groups, averages):
+    """Counts, averages of the given columns and revenue per group code."""
+    counts = np.bincount(codes, minlength=n_groups)
+    means = {name: group_means(codes, selection.take(store[column]), n_groups)
+             for name, column in averages.items()}
+    revenue = group_revenue(codes, selection.take(store['total_cents']), n_groups)
+    return counts, means, revenue
+
+
+# averages of the borough_statistics and rate_code_statistics views: name -> column
+BOROUGH_AVERAGES = {
+    'avg_fare': 'fare_amount',
+    'avg_distance': 'trip_distance',
+    'avg_tip_percentage': 'tip_percentage',
+    'avg_duration': 'trip_duration_minutes',
+}
+RATE_CODE_AVERAGES = {
+    'avg_fare': 'fare_amount',
+    'avg_tip_percentage': 'tip_percentage',
+    'avg_distance': 'trip_distance',
+    'avg_duration': 'trip_duration_minutes',
+}
+RATE_CODES = 256
+
+
+def borough_rows(counts, means, revenue):
+    """borough_statistics rows from per-borough-code counts, BOROUGH_AVERAGES means and revenue."""
+    rows = []
+    for code, name in enumerate(BOROUGHS, start=1):
+        if counts[code]:
+            rows.append({
+                'pickup_borough': name,
+                'trip_count': int(counts[code]),
+                'avg_fare': _round(means['avg_fare'][code]),
+                'avg_distance': _round(means['avg_distance'][code]),
+                'avg_tip_percentage': _round(means['avg_tip_percentage'][code]),
+                'avg_duration': _round(means['avg_duration'][code]),
+                'total_revenue': _round(revenue[code]),
+            })
+    return sorted(rows, key=lambda row: -row['trip_count'])
+
+
+def borough_statistics(store, selection):
+    """Rows of the borough_statistics view."""
+    codes = selection.take(store['pickup_borough']).astype(np.intp)
+    return borough_rows(*_grouped(store, selection, codes, len(BOROUGHS) + 1, BOROUGH_AVERAGES))
+
+
+def rate_code_rows(counts, means, revenue, rate_code):
+    """
+    rate_code_statistics rows from per-RatecodeID counts, RATE_CODE_AVERAGES
+    means and revenue; rate_code(id) is the rate_codes row (None: skipped).
+    """
+    rows = []
+    for code in np.flatnonzero(counts):
+        rate = rate_code(int(code))
+        if rate is None:
+            continue
+        rows.append({
+            'RatecodeID': int(code),
+            'rate_code_name': rate['rate_code_name'],
+            'trip_count': int(counts[code]),
+            'avg_fare': _round(means['avg_fare'][code]),
+            'avg_tip_percentage': _round(means['avg_tip_percentage'][code]),
+            'avg_distance': _round(means['avg_distance'][code]),
+            'avg_duration': _round(means['avg_duration'][code]),
+            'total_revenue': _round(revenue[code]),
+        })
+    return sorted(rows, key=lambda row: -row['trip_count'])
+
+
+def rate_code_statistics(store, selection):
+    """Rows of the rate_code_statistics view."""
+    codes = selection.take(store['RatecodeID']).astype(np.intp)
+    return rate_code_rows(*_grouped(store, selection, codes, RATE_CODES, RATE_CODE_AVERAGES),
+                          dimension_cache.rate_code)
+
+
+def hourly_rows(counts, avg_fare, avg_speed):
+    return [
+        {
+            'hour': hour,
+            'trip_count': int(counts[hour]),
+            'avg_fare': _round(avg_fare[hour]),
+            'avg_speed': _round(avg_speed[hour]),
+        }
+        for hour in range(HOURS) if counts[hour]
+    ]
+
+
+def hourly_statistics(store, selection):
+    """Trip count, average fare and speed per pickup hour."""
+    codes = selection.take(store['hour']).astype(np.intp)
+    counts = np.bincount(codes, minlength=HOURS)
+    avg_fare = group_means(codes, selection.take(store['fare_amount']), HOURS)
+    avg_speed = group_means(codes, selection.take(store['average_speed_mph']), HOURS)
+    return hourly_rows(counts, avg_fare, avg_speed)
+
+
+def pickup_counts(store, selection, by_weekday, n_locations):
+    """Pickups per [hour, LocationID] (per [day_of_week, hour, LocationID] with by_weekday)."""
+    location_ids = selection.take(store['PULocationID']).astype(np.intp)
+    cell = selection.take(store['hour']).astype(np.intp) * n_locations + location_ids
+    shape = (HOURS, n_locations)
+    if by_weekday:
+        cell += selection.take(store['day_of_week']).astype(np.intp) * HOURS * n_locations
+        shape = (DAYS,) + shape
+    return np.bincount(cell, minlength=int(np.prod(shape))).reshape(shape)
+
+
+def zone_heatmap(store, selection):
+    """Pickup count per zone, busiest first."""
+    location_ids = selection.take(store['PULocationID']).astype(np.intp)
+    counts = np.bincount(location_ids)
+    rows = []
+    for location_id in np.flatnonzero(counts):
+        zone = dimension_cache.zone(int(location_id))
+        if zone is None:
+            continue
+        rows.append({
+            'LocationID': int(location_id),
+            'Zone': zone['Zone'],
+            'Borough': zone['Borough'],
+            'trip_count': int(counts[location_id]),
+        })
+    return sorted(rows, key=lambda row: (-row['trip_count'], row['LocationID']))
+
+
+def tip_bracket_counts(tips):
+    """Trips per TIP_BRACKETS bracket, with the count of trips in none as the last element."""
+    # 0 -> no tip, (0,10] -> 1, ..., (25,inf) -> 5; NULL and negative -> no bracket
+    brackets = np.searchsorted(TIP_BRACKET_EDGES, tips, side='left')
+    no_bracket = np.isnan(tips) | (tips < 0)
+    counts = np.bincount(brackets[~no_bracket], minlength=len(TIP_BRACKETS))
+    return np.append(counts, np.count_nonzero(no_bracket))
+
+
+def tip_rows(counts):
+    """Rows of the tip distribution query from tip_bracket_counts()."""
+    total = int(counts.sum())
+    rows = []
+    missing = int(counts[-1])
+    if missing:
+        rows.append({'tip_bracket': None, 'trip_count': missing,
+                     'percentage': round(missing * 100.0 / total, 2)})
+    for bracket, label in enumerate(TIP_BRACKETS):
+        if counts[bracket]:
+            rows.append({'tip_bracket': label, 'trip_count': int(counts[bracket]),
+                         'percentage': round(int(counts[bracket]) * 100.0 / total, 2)})
+    return rows
+
+
+def tip_distribution(store, selection):
+    """Trip count and share per tip bracket (NULL bracket first, as MySQL orders it)."""
+    return tip_rows(tip_bracket_counts(selection.take(store['tip_percentage'])))
@@ -0,0 +1,182 @@
+"""
+Time series of trip count, revenue and average fare at 5 min, hour, day
+or week granularity.
+
+TimeSeriesIndex pre-aggregates the column store into 5-minute buckets.
+Because the store is sorted by pickup time, every bucket is a contiguous
+run of rows, so a pickup range is answered from the buckets it fully
+covers plus the few rows of the partial buckets at its edges. Coarser
+granularities are sums of 5-minute buckets. Long series are reduced to a
+maximum number of points with Largest-Triangle-Three-Buckets (LTTB).
+"""
+
+import numpy as np
+
+from analytics.stats import _round
+
+BASE_SECONDS = 300
+GRANULARITIES = {'5min': 300, 'hour': 3600, 'day': 86400, 'week': 7 * 86400}
+# Weeks start on Monday; 1970-01-01 was a Thursday
+GRANULARITY_OFFSETS = {'week': 3 * 86400}
+DEFAULT_GRANULARITY = 'day'
+DEFAULT_MAX_POINTS = 1000
+
+
+def bucket_keys(seconds, granularity):
+    """Bucket number of each epoch second at a granularity."""
+    return (seconds + GRANULARITY_OFFSETS.get(granularity, 0)) // GRANULARITIES[granularity]
+
+
+def bucket_starts(keys, granularity):
+    seconds = keys * GRANULARITIES[granularity] - GRANULARITY_OFFSETS.get(granularity, 0)
+    return seconds.astype('datetime64[s]')
+
+
+def _epoch_seconds(pickup):
+    return pickup.astype(np.int64)
+
+
+def _aggregate(keys, fare, cents):
+    """Sum count, revenue and fare per run of equal (sorted) keys."""
+    if len(keys) == 0:
+        return _empty()
+    boundaries = np.flatnonzero(np.diff(keys)) + 1
+    starts = np.concatenate([[0], boundaries])
+    valid = ~np.isnan(fare)
+    return {
+        'key': keys[starts],
+        'count': np.diff(np.concatenate([starts, [len(keys)]])),
+        'revenue_cents': np.add.reduceat(cents, starts),
+        'fare_sum': np.add.reduceat(np.where(valid, fare, 0).astype(np.float64), starts),
+        'fare_n': np.add.reduceat(valid.astype(np.int64), starts),
+    }
+
+
+def _empty():
+    return {'key': np.zeros(0, dtype=np.int64), 'count': np.zeros(0, dtype=np.int64),
+            'revenue_cents': np.zeros(0, dtype=np.int64), 'fare_sum': np.zeros(0),
+            'fare_n': np.zeros(0, dtype=np.int64)}
+
+
+def _combine(parts):
+    """Merge partial series that may share keys."""
+    parts = [part for part in parts if len(part['key'])]
+    if not parts:
+        return _empty()
+    merged = {name: np.concatenate([part[name] for part in parts]) for name in parts[0]}
+    keys, inverse = np.unique(merged['key'], return_inverse=True)
+    result = {'key': keys}
+    for name in ('count', 'revenue_cents', 'fare_n'):
+        result[name] = np.bincount(inverse, weights=merged[name], minlength=len(keys)).astype(np.int64)
+    result['fare_sum'] = np.bincount(inverse, weights=merged['fare_sum'], minlength=len(keys))
+    return result
+
+
+class TimeSeriesIndex:
+    """5-minute pre-aggregates of a TripColumnStore."""
+
+    def __init__(self, base, row_bounds):
+        self.base = base
+        # rows of base bucket i are row_bounds[i]:row_bounds[i + 1]
+        self.row_bounds = row_bounds
+
+    @classmethod
+    def build(cls, store):
+        keys = bucket_keys(_epoch_seconds(store['pickup']), '5min')
+        base = _aggregate(keys, store['fare_amount'], store['total_cents'])
+        row_bounds = np.concatenate([np.flatnonzero(np.diff(keys)) + 1, [len(keys)]])
+        row_bounds = np.concatenate([[0], row_bounds]) if len(keys) else np.zeros(1, dtype=np.int64)
+        return cls(base, row_bounds)
+
+    def nbytes(self):
+        return self.row_bounds.nbytes + sum(array.nbytes for array in self.base.values())
+
+    def series(self, store, lo, hi, granularity):
+        """Series over the rows [lo, hi) of the store."""
+        if lo >= hi:
+            return _empty()
+        # base buckets fully inside [lo, hi)
+        first = int(np.searchsorted(self.row_bounds, lo, side='left'))
+        last = int(np.searchsorted(self.row_bounds, hi, side='right')) - 1
+        parts = []
+        if first < last:
+            full = {name: values[first:last] for name, values in self.base.items()}
+            seconds = full['key'] * BASE_SECONDS
+            full['key'] = bucket_keys(seconds, granularity)
+            parts.append(self._regroup(full))
+            edges = [(lo, self.row_bounds[first]), (self.row_bounds[last], hi)]
+        else:
+            edges = [(lo, hi)]
+        for start, end in edges:
+            if start < end:
+                parts.append(series_from_rows(store, np.arange(start, end), granularity))
+        return _combine(parts)
+
+    @staticmethod
+    def _regroup(series):
+        """Sum consecutive base buckets that fall into the same coarser bucket."""
+        keys = series['key']
+        starts = np.concatenate([[0], np.flatnonzero(np.diff(keys)) + 1])
+        return {
+            'key': keys[starts],
+            'count': np.add.reduceat(series['count'], starts),
+            'revenue_cents': np.add.reduceat(series['revenue_cents'], starts),
+            'fare_sum': np.add.reduceat(series['fare_sum'], starts),
+            'fare_n': np.add.reduceat(series['fare_n'], starts),
+        }
+
+
+def series_from_rows(store, rows, granularity):
+    """Series of arbitrary (sorted) store rows, e.g. a filtered selection."""
+    keys = bucket_keys(_epoch_seconds(store['pickup'][rows]), granularity)
+    return _aggregate(keys, store['fare_amount'][rows], store['total_cents'][rows])
+
+
+def lttb(x, y, threshold):
+    """Indices of the points kept by Largest-Triangle-Three-Buckets."""
+    n = len(x)
+    if threshold >= n or threshold < 3:
+        return np.arange(n)
+    x = x.astype(np.float64)
+    y = y.astype(np.float64)
+    edges = np.linspace(1, n - 1, threshold - 1).astype(np.int64)
+    selected = np.zeros(threshold, dtype=np.int64)
+    previous = 0
+    for i in range(threshold - 2):
+        start, end = edges[i], edges[i + 1]
+        if i + 2 < threshold - 1:
+            next_end = edges[i + 2]
+            avg_x, avg_y = x[end:next_end].mean(), y[end:next_end].mean()
+        else:
+            avg_x, avg_y = x[n - 1], y[n - 1]
+        areas = np.abs((x[previous] - avg_x) * (y[start:end] - y[previous])
+                       - (x[previous] - x[start:end]) * (avg_y - y[previous]))
+        previous = start + int(np.argmax(areas))
+        selected[i + 1] = previous
+    selected[-1] = n - 1
+    return selected
+
+
+def to_rows(series, granularity, max_points=None):
+    """Response rows, downsampled with LTTB on trip_count when longer than max_points."""
+    keys = series['key']
+    if max_points and len(keys) > max_points:
+        keep = lttb(keys, series['count'], max_points)
+        series = {name: values[keep] for name, values in series.items()}
+        keys = series['key']
+
+    starts = bucket_starts(keys, granularity)
+    unit = 'D' if granularity in ('day', 'week') else 's'
+    labels = np.datetime_as_string(starts, unit=unit)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        avg_fare = series['fare_sum'] / series['fare_n']
+
+    return [
+        {
+            'date': label.replace('T', ' '),
+            'trip_count': int(count),
+            'total_revenue': _round(int(cents) / 100),
+            'avg_fare': _round(fare),
+        }
+        for label, count, cents, fare in zip(labels, series['count'], series['revenue_cents'], avg_fare)
+    ]
@@ -5,18 +5,30 @@ Provides REST endpoints for trip data, statistics, and visualizations
 
 from flask import Flask, jsonify, request, send_from_directory
 from flask_cors import CORS
-import mysql.connector
 from pathlib import Path
 import sys
 import json
+from datetime import datetime
 
 # Setup paths
 backend_dir = Path(__file__).resolve().parent
 project_root = backend_dir.parent
 sys.path.insert(0, str(backend_dir))
 
-from config import DB_HOST, DB_USER, DB_PASSWORD, DB_NAME
-from database.db_connection import get_connection, close_connection
+from config import DB_HOST, DB_USER, DB_PASSWORD, DB_NAME, DB_STATEMENT_TIMEOUT_MS
+from database.db_connection import (get_connection, close_connection, set_statement_timeout,
+                                    is_statement_timeout, QueryTimeout)
+from database.dimension_cache import dimension_cache
+from database.dataset_version import dataset_version, load_version
+from analytics.column_store import trip_store
+from analytics.aggregate_file import aggregate_file
+from analytics.estimator import estimator_table
+from analytics.filters import parse_trip_filters, FilterError
+from analytics import stats as trip_stats
+from analytics import time_series
+from utils.http_cache import enable_conditional_responses
+from utils.admission import AdmissionControl, AdmissionRejected, RETRY_AFTER_SECONDS
+from utils.geography import BOROUGH_CODES, NO_BOROUGH_CODE
 
 app = Flask(__name__)
 CORS(app)  # Enable CORS for frontend
@@ -34,20 +46,94 @@ def get_db():
     return get_connection()
 
 
-def execute_query(query, params=None, fetchone=False):
-    """Execute query and return results"""
+def execute_query(query, params=None, fetchone=False, timeout_ms=DB_STATEMENT_TIMEOUT_MS):
+    """Execute query and return results; raises QueryTimeout after timeout_ms"""
     conn = get_db()
+    set_statement_timeout(conn, timeout_ms)
     cursor = conn.cursor(dictionary=True)
     
     try:
         cursor.execute(query, params or ())
         result = cursor.fetchone() if fetchone else cursor.fetchall()
         return result
+    except Exception as error:
+        if is_statement_timeout(error):
+            raise QueryTimeout(f"Query exceeded {timeout_ms} ms") from error
+        raise
     finally:
         cursor.close()
         close_connection(conn)
 
 
+def bounded_limit(default, maximum):
+    """The limit query parameter, clamped to 1..maximum"""
+    limit = request.args.get('limit', default, type=int)
+    return min(max(limit, 1), maximum)
+
+
+def filtered_selection():
+    """
+    Trip column store, its bitmap index and the trips matching the filter
+    parameters of the request (see analytics/filters.py)
+    """
+    filters = parse_trip_filters(request.args)
+    store, index, _ = trip_store.get()
+    return store, index, index.select(store, filters)
+
+
+def unfiltered_aggregates():
+    """
+    The aggregate file when the request has no trip filter parameters and
+    one has been published, else None (the column store answers)
+    """
+    if parse_trip_filters(request.args):
+        return None
+    return aggregate_file.get()
+
+
+loaded_dataset_version = None
+
+
+def current_dataset_version():
+    """
+    Version of the data in the database (see database/dataset_version.py);
+    the in-memory caches are dropped when a new load is published and the
+    column store catches up when streamed trips are appended.
+    """
+    global loaded_dataset_version
+    version = dataset_version.get()
+    if version != loaded_dataset_version:
+        if (loaded_dataset_version is not None
+                and load_version(version) == load_version(loaded_dataset_version)):
+            # streamed trips were appended to the same load
+            trip_store.refresh()
+        else:
+            trip_store.invalidate()
+            dimension_cache.invalidate()
+        loaded_dataset_version = version
+    return version
+
+
+# ETag/304 and gzip/brotli compression for every GET /api/... response;
+# estimates also change when the ingest writes a new estimator table
+enable_conditional_responses(app, current_dataset_version, exclude_paths=('/api/status',),
+                             path_versions={'/api/estimate': estimator_table.version})
+
+# Concurrency limits of the endpoints that can run long SQL queries
+# (see utils/admission.py); QueryTimeout counts as a timed-out request
+admission = AdmissionControl(timeout_errors=(QueryTimeout,))
+
+# Axes of the /api/zones/heatmap/hourly array for each value of by=
+HEATMAP_DIMS = {
+    'hour': ['hour', 'location_id'],
+    'weekday': ['day_of_week', 'hour', 'location_id'],
+}
+
+# Largest page of /api/trips and longest top-N list served
+MAX_TRIPS_LIMIT = 1000
+MAX_TOP_LIMIT = 100
+
+
 # ============================================
 # CORE ENDPOINTS
 # ============================================
@@ -65,7 +151,10 @@ def home():
             "by_borough": "/api/stats/by-borough",
             "top_pickup": "/api/locations/top-pickup",
             "top_dropoff": "/api/locations/top-dropoff",
-            "zones_geojson": "/api/zones/geojson"
+            "zones_geojson": "/api/zones/geojson",
+            "zone_hourly_heatmap": "/api/zones/heatmap/hourly",
+            "estimate": "/api/estimate",
+            "status": "/api/status"
         }
     })
 
@@ -97,15 +186,25 @@ def serve_frontend_files(filename):
 # TRIP ENDPOINTS
 # ============================================
 
+# Columns of the trip_details view that live on trips itself; the zone and
+# rate-code names are added from the dimension cache
+TRIP_SELECT_COLUMNS = """
+    trip_id, VendorID, tpep_pickup_datetime, tpep_dropoff_datetime,
+    passenger_count, trip_distance, fare_amount, tip_amount, total_amount,
+    payment_type, trip_duration_minutes, average_speed_mph, tip_percentage,
+    RatecodeID, PULocationID, DOLocationID
+"""
+
 @app.route('/api/trips', methods=['GET'])
+@admission.limit('trips', max_concurrent=4, max_queued=8)
 def get_trips():
     """
     Get trips with optional filters
     Query params: limit, offset, start_date, end_date, borough, rate_code, min_fare, max_fare
     """
     # Get query parameters
-    limit = request.args.get('limit', 100, type=int)
-    offset = request.args.get('offset', 0, type=int)
+    limit = bounded_limit(100, MAX_TRIPS_LIMIT)
+    offset = max(request.args.get('offset', 0, type=int), 0)
     start_date = request.args.get('start_date')
     end_date = request.args.get('end_date')
     borough = request.args.get('borough')
@@ -115,8 +214,9 @@ def get_trips():
     sort_by = request.args.get('sort_by', 'tpep_pickup_datetime')
     sort_order = request.args.get('sort_order', 'DESC')
     
-    # Build query
-    query = "SELECT * FROM trip_details WHERE 1=1"
+    # Build query against trips directly; names are resolved to IDs/codes
+    # (dimension cache, utils/geography.py) so the trips indexes can be used
+    query = f"SELECT {TRIP_SELECT_COLUMNS} FROM trips WHERE 1=1"
     params = []
     
     if start_date:
@@ -128,12 +228,18 @@ def get_trips():
         params.append(end_date)
     
     if borough:
-        query += " AND pickup_borough = %s"
-        params.append(borough)
+        borough_code = BOROUGH_CODES.get(borough)
+        if borough_code is None:
+            return jsonify({"trips": [], "count": 0, "limit": limit, "offset": offset})
+        query += " AND pickup_borough_code = %s"
+        params.append(borough_code)
     
     if rate_code:
-        query += " AND rate_code_name = %s"
-        params.append(rate_code)
+        ratecode_id = dimension_cache.rate_code_id(rate_code)
+        if ratecode_id is None:
+            return jsonify({"trips": [], "count": 0, "limit": limit, "offset": offset})
+        query += " AND RatecodeID = %s"
+        params.append(ratecode_id)
     
     if min_fare:
         query += " AND fare_amount >= %s"
@@ -152,7 +258,7 @@ def get_trips():
     query += " LIMIT %s OFFSET %s"
     params.extend([limit, offset])
     
-    trips = execute_query(query, params)
+    trips = dimension_cache.decorate_trips(execute_query(query, params))
     
     return jsonify({
         "trips": trips,
@@ -167,8 +273,13 @@ def get_trips():
 # ============================================
 
 @app.route('/api/stats/overview', methods=['GET'])
+@admission.limit('overview', max_concurrent=2, max_queued=8)
 def get_overview():
     """Get overall statistics"""
+    aggregates = aggregate_file.get()
+    if aggregates is not None:
+        return jsonify(aggregates.overview())
+
     query = """
         SELECT 
             COUNT(*) as total_trips,
@@ -185,66 +296,57 @@ def get_overview():
 
 @app.route('/api/stats/by-rate-code', methods=['GET'])
 def get_by_rate_code():
-    """Get statistics grouped by rate code"""
-    query = "SELECT * FROM rate_code_statistics"
-    stats = execute_query(query)
-    return jsonify(stats)
+    """Get statistics grouped by rate code (accepts the trip filter params)"""
+    aggregates = unfiltered_aggregates()
+    if aggregates is not None:
+        return jsonify(aggregates.rate_code_statistics())
+    store, _, selection = filtered_selection()
+    return jsonify(trip_stats.rate_code_statistics(store, selection))
 
 
 @app.route('/api/stats/by-borough', methods=['GET'])
 def get_by_borough():
-    """Get statistics grouped by borough"""
-    query = "SELECT * FROM borough_statistics"
-    stats = execute_query(query)
-    return jsonify(stats)
+    """Get statistics grouped by borough (accepts the trip filter params)"""
+    aggregates = unfiltered_aggregates()
+    if aggregates is not None:
+        return jsonify(aggregates.borough_statistics())
+    store, _, selection = filtered_selection()
+    return jsonify(trip_stats.borough_statistics(store, selection))
 
 
 @app.route('/api/stats/by-hour', methods=['GET'])
 def get_by_hour():
-    """Get trip patterns by hour of day"""
-    query = """
-        SELECT 
-            HOUR(tpep_pickup_datetime) as hour,
-            COUNT(*) as trip_count,
-            ROUND(AVG(fare_amount), 2) as avg_fare,
-            ROUND(AVG(average_speed_mph), 2) as avg_speed
-        FROM trips
-        GROUP BY HOUR(tpep_pickup_datetime)
-        ORDER BY hour
-    """
-    stats = execute_query(query)
-    return jsonify(stats)
+    """Get trip patterns by hour of day (accepts the trip filter params)"""
+    aggregates = unfiltered_aggregates()
+    if aggregates is not None:
+        return jsonify(aggregates.hourly_statistics())
+    store, _, selection = filtered_selection()
+    return jsonify(trip_stats.hourly_statistics(store, selection))
 
 
 @app.route('/api/stats/time-series', methods=['GET'])
 def get_time_series():
-    """Get daily trip trends"""
-    start_date = request.args.get('start_date')
-    end_date = request.args.get('end_date')
-    
-    query = """
-        SELECT 
-            DATE(tpep_pickup_datetime) as date,
-            COUNT(*) as trip_count,
-            ROUND(SUM(total_amount), 2) as total_revenue,
-            ROUND(AVG(fare_amount), 2) as avg_fare
-        FROM trips
-        WHERE 1=1
     """
-    params = []
-    
-    if start_date:
-        query += " AND tpep_pickup_datetime >= %s"
-        params.append(start_date)
-    
-    if end_date:
-        query += " AND tpep_pickup_datetime <= %s"
-        params.append(end_date)
-    
-    query += " GROUP BY DATE(tpep_pickup_datetime) ORDER BY date"
-    
-    stats = execute_query(query, params)
-    return jsonify(stats)
+    Get trip trends per time bucket (accepts the trip filter params)
+    Query params: granularity (5min, hour, day, week), max_points
+    """
+    granularity = request.args.get('granularity', time_series.DEFAULT_GRANULARITY)
+    if granularity not in time_series.GRANULARITIES:
+        raise FilterError(f"granularity must be one of {', '.join(time_series.GRANULARITIES)}")
+    max_points = request.args.get('max_points', time_series.DEFAULT_MAX_POINTS, type=int)
+    if max_points < 3:
+        raise FilterError("max_points must be at least 3")
+
+    filters = parse_trip_filters(request.args)
+    store, index, time_index = trip_store.get()
+    if set(filters) <= {'start_date', 'end_date'}:
+        # pickup range only: served from the pre-bucketed aggregates
+        lo, hi = store.row_range(filters.get('start_date'), filters.get('end_date'))
+        series = time_index.series(store, lo, hi, granularity)
+    else:
+        selection = index.select(store, filters)
+        series = time_series.series_from_rows(store, selection.rows(), granularity)
+    return jsonify(time_series.to_rows(series, granularity, max_points))
 
 
 # ============================================
@@ -253,27 +355,21 @@ def get_time_series():
 
 @app.route('/api/locations/zones', methods=['GET'])
 def get_zones():
-    """Get all taxi zones"""
+    """Get all taxi zones (served from the dimension cache)"""
     borough = request.args.get('borough')
-    
-    query = "SELECT * FROM taxi_zones"
-    params = []
-    
-    if borough:
-        query += " WHERE Borough = %s"
-        params.append(borough)
-    
-    query += " ORDER BY Zone"
-    
-    zones = execute_query(query, params)
-    return jsonify(zones)
+    return jsonify(dimension_cache.zones(borough))
 
 
 @app.route('/api/locations/top-pickup', methods=['GET'])
+@admission.limit('top_pickup', max_concurrent=2, max_queued=8)
 def get_top_pickup():
     """Get top pickup locations"""
-    limit = request.args.get('limit', 10, type=int)
+    limit = bounded_limit(10, MAX_TOP_LIMIT)
     
+    aggregates = aggregate_file.get()
+    if aggregates is not None:
+        return jsonify(aggregates.top_locations('pickup', limit))
+
     query = """
         SELECT 
             tz.Zone,
@@ -291,10 +387,15 @@ def get_top_pickup():
 
 
 @app.route('/api/locations/top-dropoff', methods=['GET'])
+@admission.limit('top_dropoff', max_concurrent=2, max_queued=8)
 def get_top_dropoff():
     """Get top dropoff locations"""
-    limit = request.args.get('limit', 10, type=int)
+    limit = bounded_limit(10, MAX_TOP_LIMIT)
     
+    aggregates = aggregate_file.get()
+    if aggregates is not None:
+        return jsonify(aggregates.top_locations('dropoff', limit))
+
     query = """
         SELECT 
             tz.Zone,
@@ -312,10 +413,15 @@ def get_top_dropoff():
 
 
 @app.route('/api/locations/top-routes', methods=['GET'])
+@admission.limit('top_routes', max_concurrent=2, max_queued=8)
 def get_top_routes():
     """Get most common pickup-dropoff pairs"""
-    limit = request.args.get('limit', 10, type=int)
+    limit = bounded_limit(10, MAX_TOP_LIMIT)
     
+    aggregates = aggregate_file.get()
+    if aggregates is not None:
+        return jsonify(aggregates.top_routes(limit))
+
     query = """
         SELECT 
             pu_zone.Zone as pickup_zone,
@@ -357,20 +463,52 @@ def get_zones_geojson():
 
 @app.route('/api/zones/heatmap', methods=['GET'])
 def get_zone_heatmap():
-    """Get trip counts per zone for heatmap visualization"""
-    query = """
-        SELECT 
-            tz.LocationID,
-            tz.Zone,
-            tz.Borough,
-            COUNT(*) as trip_count
-        FROM trips t
-        JOIN taxi_zones tz ON t.PULocationID = tz.LocationID
-        GROUP BY tz.LocationID, tz.Zone, tz.Borough
-        ORDER BY trip_count DESC
+    """Get trip counts per zone for heatmap visualization (accepts the trip filter params)"""
+    store, _, selection = filtered_selection()
+    return jsonify(trip_stats.zone_heatmap(store, selection))
+
+
+@app.route('/api/zones/heatmap/hourly', methods=['GET'])
+def get_zone_hourly_heatmap():
+    """
+    Pickup counts per hour and LocationID in one dense array, for animating
+    the map over the day (accepts the trip filter params)
+    Query params: by=hour (24 x locations, default) or by=weekday (7 x 24 x locations),
+    format=json (default) or format=binary (little-endian uint32, row-major)
     """
-    heatmap_data = execute_query(query)
-    return jsonify(heatmap_data)
+    by = request.args.get('by', 'hour')
+    if by not in HEATMAP_DIMS:
+        raise FilterError(f"by must be one of {', '.join(HEATMAP_DIMS)}")
+    output = request.args.get('format', 'json')
+    if output not in ('json', 'binary'):
+        raise FilterError("format must be json or binary")
+    by_weekday = by == 'weekday'
+
+    # unfiltered counts come straight from the aggregate file's cube
+    aggregates = unfiltered_aggregates()
+    if aggregates is not None:
+        counts = aggregates.pickup_counts(by_weekday)
+    else:
+        filters = parse_trip_filters(request.args)
+        store, index, _ = trip_store.get()
+        n_locations = max([z['LocationID'] for z in dimension_cache.zones()] +
+                          [int(store['PULocationID'].max(initial=0))]) + 1
+        counts = trip_stats.pickup_counts(store, index.select(store, filters), by_weekday, n_locations)
+
+    dims = HEATMAP_DIMS[by]
+    if output == 'binary':
+        response = app.response_class(counts.astype('<u4').tobytes(), mimetype='application/octet-stream')
+        response.headers['X-Heatmap-Shape'] = ','.join(str(n) for n in counts.shape)
+        response.headers['X-Heatmap-Dims'] = ','.join(dims)
+        response.headers['Access-Control-Expose-Headers'] = 'X-Heatmap-Shape, X-Heatmap-Dims'
+        return response
+    return jsonify({
+        "dims": dims,
+        "shape": list(counts.shape),
+        "total": int(counts.sum()),
+        "max": int(counts.max(initial=0)),
+        "counts": counts.ravel().tolist()
+    })
 
 
 # ============================================
@@ -379,33 +517,63 @@ def get_zone_heatmap():
 
 @app.route('/api/tips/distribution', methods=['GET'])
 def get_tip_distribution():
-    """Get tip percentage distribution"""
-    query = """
-        SELECT 
-            CASE 
-                WHEN tip_percentage = 0 THEN '0% (No Tip)'
-                WHEN tip_percentage > 0 AND tip_percentage <= 10 THEN '1-10%'
-                WHEN tip_percentage > 10 AND tip_percentage <= 15 THEN '11-15%'
-                WHEN tip_percentage > 15 AND tip_percentage <= 20 THEN '16-20%'
-                WHEN tip_percentage > 20 AND tip_percentage <= 25 THEN '21-25%'
-                WHEN tip_percentage > 25 THEN '25%+'
-            END as tip_bracket,
-            COUNT(*) as trip_count,
-            ROUND((COUNT(*) * 100.0 / (SELECT COUNT(*) FROM trips)), 2) as percentage
-        FROM trips
-        GROUP BY tip_bracket
-        ORDER BY 
-            CASE tip_bracket
-                WHEN '0% (No Tip)' THEN 1
-                WHEN '1-10%' THEN 2
-                WHEN '11-15%' THEN 3
-                WHEN '16-20%' THEN 4
-                WHEN '21-25%' THEN 5
-                WHEN '25%+' THEN 6
-            END
+    """Get tip percentage distribution (accepts the trip filter params)"""
+    aggregates = unfiltered_aggregates()
+    if aggregates is not None:
+        return jsonify(aggregates.tip_distribution())
+    store, _, selection = filtered_selection()
+    return jsonify(trip_stats.tip_distribution(store, selection))
+
+
+# ============================================
+# ESTIMATE ENDPOINT
+# ============================================
+
+def zone_borough_code(location_id):
+    """Borough code of a LocationID, as stored on trips by the pipeline"""
+    zone = dimension_cache.zone(location_id)
+    return BOROUGH_CODES.get(zone['Borough'], NO_BOROUGH_CODE) if zone else NO_BOROUGH_CODE
+
+
+@app.route('/api/estimate', methods=['GET'])
+def get_estimate():
+    """
+    Expected trip duration and fare (median, p10, p90) from the estimator table
+    Query params: pickup, dropoff (LocationIDs), departure (ISO date and time)
     """
-    distribution = execute_query(query)
-    return jsonify(distribution)
+    pickup = request.args.get('pickup', type=int)
+    dropoff = request.args.get('dropoff', type=int)
+    if pickup is None or dropoff is None:
+        raise FilterError("pickup and dropoff must be LocationIDs")
+    try:
+        departure = datetime.fromisoformat(request.args.get('departure', ''))
+    except ValueError:
+        raise FilterError("departure must be an ISO date and time, e.g. 2024-01-15T08:30")
+
+    table = estimator_table.get()
+    if table is None:
+        return jsonify({"error": "Estimator table has not been built; run the ingest pipeline"}), 503
+
+    hour_of_week = departure.weekday() * 24 + departure.hour
+    estimate = table.estimate(pickup, dropoff, hour_of_week,
+                              zone_borough_code(pickup), zone_borough_code(dropoff))
+    if estimate is None:
+        return jsonify({"error": "No trips between these boroughs to estimate from"}), 404
+    return jsonify({"pickup": pickup, "dropoff": dropoff, "hour_of_week": hour_of_week, **estimate})
+
+
+# ============================================
+# STATUS ENDPOINT
+# ============================================
+
+@app.route('/api/status', methods=['GET'])
+def get_status():
+    """Dataset version and the admission counters of the limited endpoints"""
+    return jsonify({
+        "dataset_version": current_dataset_version(),
+        "statement_timeout_ms": DB_STATEMENT_TIMEOUT_MS,
+        "endpoints": admission.stats()
+    })
 
 
 # ============================================
@@ -417,6 +585,21 @@ def not_found(error):
     return jsonify({"error": "Endpoint not found"}), 404
 
 
+@app.errorhandler(FilterError)
+def bad_filter(error):
+    return jsonify({"error": str(error)}), 400
+
+
+@app.errorhandler(AdmissionRejected)
+def endpoint_busy(error):
+    return jsonify({"error": str(error)}), 503, {"Retry-After": str(RETRY_AFTER_SECONDS)}
+
+
+@app.errorhandler(QueryTimeout)
+def query_timed_out(error):
+    return jsonify({"error": str(error)}), 503, {"Retry-After": str(RETRY_AFTER_SECONDS)}
+
+
 @app.errorhandler(500)
 def internal_error(error):
     return jsonify({"error": "Internal server error"}), 500
@@ -0,0 +1,373 @@
+"""
+API load-test harness.
+
+Seeds an embedded SQLite stand-in database with synthetic trips, starts
+app.py against it in a separate process and replays a dashboard-like mix of
+endpoint calls at one or more concurrency levels. Reports throughput and
+p50/p95/p99 latency per endpoint and appends the results to
+Data/benchmarks/api_results.json.
+
+Usage (from backend/):
+    python -m benchmarks.api_load_test --rows 200k --concurrency 1 8 32
+    python -m benchmarks.api_load_test --url http://api-host:5000 --concurrency 16
+"""
+
+import argparse
+import contextlib
+import io
+import json
+import math
+import random
+import socket
+import subprocess
+import time
+import urllib.error
+import urllib.parse
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+from pathlib import Path
+import sys
+
+backend_dir = Path(__file__).resolve().parents[1]
+project_root = Path(__file__).resolve().parents[2]
+sys.path.insert(0, str(backend_dir))
+
+from config import SYNTHETIC_DATA_DIR, API_BENCHMARK_RESULTS_PATH
+
+# Relative weight of each endpoint in the replayed dashboard workload
+DEFAULT_MIX = {
+    "trips": 30,
+    "overview": 10,
+    "by_borough": 10,
+    "by_hour": 8,
+    "by_rate_code": 5,
+    "time_series": 7,
+    "heatmap": 12,
+    "geojson": 8,
+    "top_pickup": 5,
+    "top_routes": 5,
+}
+
+ENDPOINTS = {
+    "trips": "/api/trips",
+    "overview": "/api/stats/overview",
+    "by_borough": "/api/stats/by-borough",
+    "by_hour": "/api/stats/by-hour",
+    "by_rate_code": "/api/stats/by-rate-code",
+    "time_series": "/api/stats/time-series",
+    "heatmap": "/api/zones/heatmap",
+    "geojson": "/api/zones/geojson",
+    "top_pickup": "/api/locations/top-pickup",
+    "top_routes": "/api/locations/top-routes",
+}
+
+RATE_CODE_NAMES = ['Standard rate', 'JFK', 'Newark', 'Nassau or Westchester',
+                   'Negotiated fare', 'Group ride']
+
+
+# ============================================
+# DATABASE SEEDING
+# ============================================
+
+def seed_database(rows, seed, reseed=False):
+    """
+    Build the SQLite stand-in for `rows` synthetic trips (cached by size/seed).
+    Returns (db_path, geojson_path).
+    """
+    from benchmarks.synthetic_data import generate_dataset, format_row_count, write_zone_geojson
+    from Pipeline.data_integration import intergrate_data
+    from database.db_connection import configure_backend
+    from database.sqlite_compat import create_schema
+    from database.insert_data import main as insert_main
+
+    work_dir = project_root / SYNTHETIC_DATA_DIR / "api_bench"
+    work_dir.mkdir(parents=True, exist_ok=True)
+    size = format_row_count(rows)
+    db_path = work_dir / f"urban_mobility_{size}_seed{seed}.sqlite"
+    geojson_path = work_dir / f"taxi_zones_seed{seed}.geojson"
+
+    if not geojson_path.exists():
+        write_zone_geojson(geojson_path, seed)
+
+    if db_path.exists() and not reseed:
+        print(f"Reusing seeded database: {db_path}")
+        return db_path, geojson_path
+
+    trip_path, zone_path = generate_dataset(rows, seed=seed)
+    processed_path = work_dir / f"processed_{size}"
+
+    print("Running the pipeline on synthetic trips...")
+    with contextlib.redirect_stdout(io.StringIO()):
+        intergrate_data(trip_path, zone_path, processed_path, work_dir / "logs", use_cache=False,
+                        estimator_path=work_dir / f"trip_estimates_{size}.npz")
+
+    print(f"Seeding SQLite database: {db_path}")
+    tmp_path = db_path.with_suffix('.tmp')
+    create_schema(tmp_path)
+    configure_backend("sqlite", tmp_path)
+    with contextlib.redirect_stdout(io.StringIO()):
+        insert_main(processed_path)
+    tmp_path.replace(db_path)
+    return db_path, geojson_path
+
+
+# ============================================
+# SERVER
+# ============================================
+
+def serve(db_path, geojson_path, host, port):
+    """Run app.py against the SQLite stand-in (used in the server subprocess)."""
+    import logging
+    from werkzeug.serving import make_server
+    from database.db_connection import configure_backend
+
+    configure_backend("sqlite", db_path)
+    import app as api
+
+    if geojson_path:
+        api.GEOJSON_PATH = Path(geojson_path)
+    logging.getLogger('werkzeug').setLevel(logging.ERROR)
+    make_server(host, port, api.app, threaded=True).serve_forever()
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+def start_server(db_path, geojson_path):
+    """Start the API in a child process so client threads don't share its GIL."""
+    port = free_port()
+    process = subprocess.Popen(
+        [sys.executable, '-m', 'benchmarks.api_load_test', '--serve-only',
+         '--sqlite', str(db_path), '--geojson', str(geojson_path), '--port', str(port)],
+        cwd=str(backend_dir), stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+    )
+    base_url = f"http://127.0.0.1:{port}"
+    deadline = time.time() + 30
+    while time.time() < deadline:
+        if process.poll() is not None:
+            raise RuntimeError("API server exited during startup")
+        try:
+            with urllib.request.urlopen(base_url + "/", timeout=1):
+                return process, base_url
+        except OSError:
+            time.sleep(0.2)
+    process.terminate()
+    raise RuntimeError("API server did not start within 30 seconds")
+
+
+# ============================================
+# WORKLOAD
+# ============================================
+
+def build_path(name, rng, context):
+    """Pick randomised, dashboard-like query parameters for an endpoint."""
+    params = {}
+    if name == "trips":
+        params["limit"] = rng.choice([10, 20, 20, 100])
+        if rng.random() < 0.5 and context["boroughs"]:
+            params["borough"] = rng.choice(context["boroughs"])
+        if rng.random() < 0.4:
+            start = context["start"] + timedelta(days=rng.randrange(context["days"]))
+            params["start_date"] = start.strftime("%Y-%m-%d")
+            params["end_date"] = (start + timedelta(days=rng.randint(1, 7))).strftime("%Y-%m-%d")
+        if rng.random() < 0.15:
+            params["rate_code"] = rng.choice(RATE_CODE_NAMES)
+        if rng.random() < 0.3:
+            low = rng.choice([0, 5, 10, 20])
+            params["min_fare"] = low
+            params["max_fare"] = low + rng.choice([10, 25, 50])
+        params["sort_by"] = rng.choices(
+            ["tpep_pickup_datetime", "fare_amount", "trip_distance", "trip_duration_minutes"],
+            weights=[60, 20, 10, 10])[0]
+    elif name == "time_series" and rng.random() < 0.5:
+        start = context["start"] + timedelta(days=rng.randrange(context["days"]))
+        params["start_date"] = start.strftime("%Y-%m-%d")
+        params["end_date"] = (start + timedelta(days=7)).strftime("%Y-%m-%d")
+    elif name in ("top_pickup", "top_routes"):
+        params["limit"] = rng.choice([5, 10, 20])
+
+    path = ENDPOINTS[name]
+    return f"{path}?{urllib.parse.urlencode(params)}" if params else path
+
+
+def fetch(url):
+    start = time.perf_counter()
+    try:
+        with urllib.request.urlopen(url, timeout=120) as response:
+            response.read()
+            status = response.status
+    except urllib.error.HTTPError as error:
+        status = error.code
+    except OSError:
+        status = 0
+    return time.perf_counter() - start, status
+
+
+def load_context(base_url, start, days):
+    """Boroughs for the filters are read from the API itself."""
+    with urllib.request.urlopen(base_url + "/api/locations/zones", timeout=60) as response:
+        zones = json.load(response)
+    boroughs = sorted({z["Borough"] for z in zones if z.get("Borough")})
+    return {"boroughs": boroughs, "start": datetime.strptime(start, "%Y-%m-%d"), "days": days}
+
+
+def run_load(base_url, mix, concurrency, duration, context, seed=0):
+    """Replay the mix with `concurrency` closed-loop clients for `duration` seconds."""
+    names = list(mix)
+    weights = [mix[n] for n in names]
+    deadline = time.perf_counter() + duration
+
+    def client(client_id):
+        rng = random.Random(seed * 1000 + client_id)
+        samples = []
+        while time.perf_counter() < deadline:
+            name = rng.choices(names, weights)[0]
+            latency, status = fetch(base_url + build_path(name, rng, context))
+            samples.append((name, latency, status))
+        return samples
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        results = list(pool.map(client, range(concurrency)))
+    elapsed = time.perf_counter() - started
+    return [s for samples in results for s in samples], elapsed
+
+
+def percentile(sorted_values, p):
+    """Nearest-rank percentile of an already sorted list."""
+    if not sorted_values:
+        return None
+    rank = min(len(sorted_values), max(1, math.ceil(p / 100 * len(sorted_values)))) - 1
+    return sorted_values[rank]
+
+
+def summarise(samples, elapsed):
+    per_endpoint = {}
+    for name in sorted({s[0] for s in samples}):
+        latencies = sorted(s[1] * 1000 for s in samples if s[0] == name)
+        errors = sum(1 for s in samples if s[0] == name and (s[2] == 0 or s[2] >= 400))
+        per_endpoint[name] = {
+            "requests": len(latencies),
+            "errors": errors,
+            "rps": round(len(latencies) / elapsed, 2),
+            "p50_ms": round(percentile(latencies, 50), 2),
+            "p95_ms": round(percentile(latencies, 95), 2),
+            "p99_ms": round(percentile(latencies, 99), 2),
+            "max_ms": round(latencies[-1], 2),
+        }
+    return {
+        "requests": len(samples),
+        "errors": sum(e["errors"] for e in per_endpoint.values()),
+        "throughput_rps": round(len(samples) / elapsed, 2),
+        "elapsed_s": round(elapsed, 2),
+        "endpoints": per_endpoint,
+    }
+
+
+def print_summary(summary, concurrency):
+    print(f"\n{'='*86}")
+    print(f"Concurrency {concurrency}: {summary['requests']:,} requests in "
+          f"{summary['elapsed_s']}s -> {summary['throughput_rps']:,.1f} req/s "
+          f"({summary['errors']} errors)")
+    print(f"{'='*86}")
+    print(f"  {'endpoint':<16}{'requests':>10}{'errors':>8}{'req/s':>10}"
+          f"{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}{'max ms':>10}")
+    for name, stats in summary["endpoints"].items():
+        print(f"  {name:<16}{stats['requests']:>10,}{stats['errors']:>8}{stats['rps']:>10.1f}"
+              f"{stats['p50_ms']:>10.1f}{stats['p95_ms']:>10.1f}{stats['p99_ms']:>10.1f}"
+              f"{stats['max_ms']:>10.1f}")
+    print(f"{'='*86}")
+
+
+def parse_mix(overrides):
+    """Apply name=weight overrides (weight 0 removes an endpoint)."""
+    mix = dict(DEFAULT_MIX)
+    for item in overrides or []:
+        name, _, weight = item.partition('=')
+        if name not in ENDPOINTS:
+            raise SystemExit(f"Unknown endpoint in --mix: {name} (choose from {', '.join(ENDPOINTS)})")
+        mix[name] = float(weight)
+    return {name: weight for name, weight in mix.items() if weight > 0}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Load-test the API with a dashboard workload.")
+    parser.add_argument('--rows', default='200k', help="synthetic trips to seed (e.g. 100k, 1M)")
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--reseed', action='store_true', help="rebuild the seeded database")
+    parser.add_argument('--url', help="test an already running API instead of a local SQLite one")
+    parser.add_argument('--concurrency', nargs='+', type=int, default=[1, 8, 32])
+    parser.add_argument('--duration', type=float, default=20, help="seconds per concurrency level")
+    parser.add_argument('--mix', nargs='*', help="endpoint weight overrides, e.g. geojson=0 trips=50")
+    parser.add_argument('--start', default='2024-01-01', help="first day of the data (for date filters)")
+    parser.add_argument('--days', type=int, default=31)
+    parser.add_argument('--no-save', action='store_true', help="do not store this run")
+    # internal: server subprocess
+    parser.add_argument('--serve-only', action='store_true', help=argparse.SUPPRESS)
+    parser.add_argument('--sqlite', help=argparse.SUPPRESS)
+    parser.add_argument('--geojson', help=argparse.SUPPRESS)
+    parser.add_argument('--port', type=int, default=5001, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.serve_only:
+        serve(args.sqlite, args.geojson, '127.0.0.1', args.port)
+        return
+
+    from benchmarks.synthetic_data import parse_row_count
+
+    mix = parse_mix(args.mix)
+    process = None
+    if args.url:
+        base_url = args.url.rstrip('/')
+        rows = None
+    else:
+        rows = parse_row_count(args.rows)
+        db_path, geojson_path = seed_database(rows, args.seed, args.reseed)
+        process, base_url = start_server(db_path, geojson_path)
+
+    runs = []
+    try:
+        context = load_context(base_url, args.start, args.days)
+        # warm up every endpoint once so first-hit costs are not measured
+        rng = random.Random(args.seed)
+        for name in mix:
+            fetch(base_url + build_path(name, rng, context))
+
+        for concurrency in args.concurrency:
+            samples, elapsed = run_load(base_url, mix, concurrency, args.duration,
+                                        context, seed=args.seed)
+            summary = summarise(samples, elapsed)
+            print_summary(summary, concurrency)
+            runs.append({"concurrency": concurrency, **summary})
+    finally:
+        if process:
+            process.terminate()
+            process.wait(timeout=10)
+
+    if not args.no_save:
+        results_path = project_root / API_BENCHMARK_RESULTS_PATH
+        results_path.parent.mkdir(parents=True, exist_ok=True)
+        history = []
+        if results_path.exists():
+            with open(results_path) as f:
+                history = json.load(f)
+        history.append({
+            "timestamp": datetime.now().isoformat(timespec='seconds'),
+            "target": args.url or "local-sqlite",
+            "rows": rows,
+            "seed": args.seed,
+            "duration_s": args.duration,
+            "mix": mix,
+            "runs": runs,
+        })
+        with open(results_path, 'w') as f:
+            json.dump(history, f, indent=2)
+        print(f"Results saved to: {results_path}")
+
+
+if __name__ == "__main__":
+    main()
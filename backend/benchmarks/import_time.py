@@ -0,0 +1,75 @@
+"""
+Import-time check of the entry points.
+
+Imports each entry module in a fresh interpreter with -X importtime and
+reports its cumulative import time and which heavy dependencies it pulled
+in. The API (app) must not load pandas, pyarrow or geopandas at startup.
+
+Usage (from backend/):
+    python -m benchmarks.import_time
+"""
+
+import argparse
+import subprocess
+from pathlib import Path
+import sys
+
+backend_dir = Path(__file__).resolve().parents[1]
+project_root = Path(__file__).resolve().parents[2]
+sys.path.insert(0, str(backend_dir))
+
+ENTRY_MODULES = ['app', 'backend.__main__', 'Pipeline.data_integration', 'database.insert_data',
+                 'scripts.convert_shapefile']
+HEAVY_MODULES = ['numpy', 'pandas', 'pyarrow', 'geopandas', 'mysql.connector']
+# Dependencies each entry point must not load at import time
+FORBIDDEN = {
+    'app': ['pandas', 'pyarrow', 'geopandas'],
+    'backend.__main__': ['numpy', 'pandas', 'pyarrow', 'geopandas', 'mysql.connector'],
+    'scripts.convert_shapefile': ['geopandas'],
+}
+
+
+def measure(module, repeat=3):
+    """(best cumulative import time in ms, heavy modules loaded) for one module."""
+    statement = f"import sys; sys.path.insert(0, 'backend'); import {module}"
+    best = None
+    loaded = []
+    for _ in range(repeat):
+        result = subprocess.run(
+            [sys.executable, '-X', 'importtime', '-c', statement], cwd=project_root,
+            capture_output=True, text=True)
+        total = 0
+        seen = set()
+        for line in result.stderr.splitlines():
+            if not line.startswith('import time:') or 'cumulative' in line:
+                continue
+            _, cumulative, package = (part.strip() for part in line[len('import time:'):].split('|'))
+            if package == module:
+                total = int(cumulative)
+            seen.add(package)
+        best = total if best is None else min(best, total)
+        loaded = [heavy for heavy in HEAVY_MODULES if heavy in seen]
+    return best / 1000, loaded
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure the import time of the entry points.")
+    parser.add_argument('--repeat', type=int, default=3, help="best of N fresh interpreters")
+    args = parser.parse_args()
+
+    print(f"\n{'='*78}")
+    print(f"  {'entry module':<30}{'import ms':>10}  heavy dependencies loaded")
+    print(f"{'='*78}")
+    failures = 0
+    for module in ENTRY_MODULES:
+        milliseconds, loaded = measure(module, args.repeat)
+        forbidden = [heavy for heavy in loaded if heavy in FORBIDDEN.get(module, [])]
+        failures += bool(forbidden)
+        flag = f"  <- must not load {', '.join(forbidden)}" if forbidden else ""
+        print(f"  {module:<30}{milliseconds:>10.1f}  {', '.join(loaded) or '-'}{flag}")
+    print(f"{'='*78}")
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,214 @@
+"""
+Pipeline benchmark suite.
+
+Times load_trip_data, clean_data, engineer_features, intergrate_data, a
+pushed-down read of the processed store and the insert path on synthetic
+data, appends the results to
+Data/benchmarks/pipeline_results.json and compares them with the previous
+run of the same size.
+
+Usage (from backend/):
+    python -m benchmarks.pipeline_benchmark --rows 100k 1M
+    python -m benchmarks.pipeline_benchmark --rows 1M --db   # real MySQL inserts
+"""
+
+import argparse
+import contextlib
+import io
+import json
+import platform
+import subprocess
+import time
+from datetime import datetime
+from pathlib import Path
+import sys
+
+import pandas as pd
+
+backend_dir = Path(__file__).resolve().parents[1]
+project_root = Path(__file__).resolve().parents[2]
+sys.path.insert(0, str(backend_dir))
+
+from config import SYNTHETIC_DATA_DIR, BENCHMARK_RESULTS_PATH
+from benchmarks.synthetic_data import generate_dataset, parse_row_count, format_row_count
+from Pipeline.data_loader import load_trip_data
+from Pipeline.data_cleaning import clean_data
+from Pipeline.feature_engineering import engineer_features
+from Pipeline.data_integration import intergrate_data
+from Pipeline.processed_store import iter_processed_batches, read_processed_trips, processed_months
+from database.insert_data import TRIP_COLUMNS, prepare_trip_rows
+from utils.helpers import memory_usage_mb
+
+STAGES = ['load_trip_data', 'clean_data', 'engineer_features', 'intergrate_data',
+          'read_processed', 'insert']
+REGRESSION_THRESHOLD = 0.10
+
+
+@contextlib.contextmanager
+def quiet(enabled=True):
+    """Silence the pipeline's progress prints while timing."""
+    if not enabled:
+        yield
+        return
+    with contextlib.redirect_stdout(io.StringIO()):
+        yield
+
+
+def timed(func, *args, **kwargs):
+    start = time.perf_counter()
+    result = func(*args, **kwargs)
+    return result, time.perf_counter() - start
+
+
+def read_one_month(processed_path):
+    """Typical analytics read: a few columns of a single month."""
+    year, month = processed_months(processed_path)[0]
+    return read_processed_trips(processed_path, year=year, month=month,
+                                columns=['tpep_pickup_datetime', 'PULocationID', 'fare_amount'])
+
+
+def prepare_insert_rows(processed_path):
+    """
+    Client-side half of insert_trips_chunked without a database: read the
+    processed store in batches and build the executemany tuples.
+    """
+    valid_location_ids = set(range(1, 266))
+    valid_rate_codes = set(range(1, 7))
+    rows = 0
+    for chunk in iter_processed_batches(processed_path, columns=TRIP_COLUMNS, batch_size=10000):
+        values, _ = prepare_trip_rows(chunk, valid_location_ids, valid_rate_codes)
+        rows += len(values)
+    return rows
+
+
+def insert_into_database(processed_path):
+    """Full insert path against the configured MySQL database."""
+    from database.insert_data import main as insert_main
+    insert_main(processed_path)
+
+
+def benchmark_size(rows, seed, work_dir, use_db=False, verbose=False):
+    trip_path, zone_path = generate_dataset(rows, seed=seed)
+    processed_path = work_dir / f"processed_{format_row_count(rows)}"
+    timings = {}
+
+    with quiet(not verbose):
+        df, timings['load_trip_data'] = timed(load_trip_data, trip_path)
+        (df, _), timings['clean_data'] = timed(clean_data, df)
+        df, timings['engineer_features'] = timed(engineer_features, df)
+        cleaned_rows = len(df)
+        frame_mb = memory_usage_mb(df)
+        del df
+
+        _, timings['intergrate_data'] = timed(
+            intergrate_data, trip_path, zone_path, processed_path, work_dir / "logs", use_cache=False,
+            estimator_path=work_dir / "trip_estimates.npz")
+        _, timings['read_processed'] = timed(read_one_month, processed_path)
+
+        if use_db:
+            _, timings['insert'] = timed(insert_into_database, processed_path)
+        else:
+            _, timings['insert'] = timed(prepare_insert_rows, processed_path)
+
+    return {
+        "rows": rows,
+        "cleaned_rows": cleaned_rows,
+        "frame_mb": round(frame_mb, 2),
+        "seed": seed,
+        "insert_mode": "mysql" if use_db else "prepare-only",
+        "stages": {stage: round(seconds, 4) for stage, seconds in timings.items()},
+    }
+
+
+def git_commit():
+    try:
+        return subprocess.check_output(
+            ['git', 'rev-parse', '--short', 'HEAD'], cwd=project_root,
+            stderr=subprocess.DEVNULL, text=True).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def load_results(path):
+    if path.exists():
+        with open(path) as f:
+            return json.load(f)
+    return []
+
+
+def previous_result(history, result):
+    """Most recent stored run with the same size, seed and insert mode."""
+    for run in reversed(history):
+        if (run["rows"] == result["rows"] and run["seed"] == result["seed"]
+                and run["insert_mode"] == result["insert_mode"]):
+            return run
+    return None
+
+
+def print_report(result, baseline, threshold):
+    print(f"\n{'='*70}")
+    print(f"Pipeline benchmark: {result['rows']:,} rows "
+          f"({result['cleaned_rows']:,} after cleaning, insert={result['insert_mode']})")
+    print(f"  cleaned frame: {result['frame_mb']:,.1f} MB in memory")
+    print(f"{'='*70}")
+    print(f"  {'stage':<20}{'seconds':>10}{'rows/s':>14}{'baseline':>11}{'change':>10}")
+    regressions = []
+    for stage in STAGES:
+        seconds = result["stages"][stage]
+        rate = result["rows"] / seconds if seconds else float('inf')
+        line = f"  {stage:<20}{seconds:>10.3f}{rate:>14,.0f}"
+        if baseline and baseline["stages"].get(stage):
+            before = baseline["stages"][stage]
+            change = (seconds - before) / before if before else 0.0
+            flag = "  REGRESSION" if change > threshold else ""
+            line += f"{before:>11.3f}{change:>+10.1%}{flag}"
+            if flag:
+                regressions.append(stage)
+        print(line)
+    print(f"{'='*70}")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the data pipeline on synthetic trips.")
+    parser.add_argument('--rows', nargs='+', default=['100k'], help="sizes, e.g. 100k 1M 10M")
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--db', action='store_true',
+                        help="insert into the configured MySQL database instead of preparing rows only")
+    parser.add_argument('--threshold', type=float, default=REGRESSION_THRESHOLD,
+                        help="slowdown fraction reported as a regression (default 0.10)")
+    parser.add_argument('--no-save', action='store_true', help="do not store this run")
+    parser.add_argument('--verbose', action='store_true', help="show pipeline output")
+    args = parser.parse_args()
+
+    results_path = project_root / BENCHMARK_RESULTS_PATH
+    results_path.parent.mkdir(parents=True, exist_ok=True)
+    work_dir = project_root / SYNTHETIC_DATA_DIR / "bench_output"
+    work_dir.mkdir(parents=True, exist_ok=True)
+
+    history = load_results(results_path)
+    any_regression = False
+
+    for size in args.rows:
+        result = benchmark_size(parse_row_count(size), args.seed, work_dir,
+                                use_db=args.db, verbose=args.verbose)
+        result.update({
+            "timestamp": datetime.now().isoformat(timespec='seconds'),
+            "commit": git_commit(),
+            "python": platform.python_version(),
+            "pandas": pd.__version__,
+        })
+        regressions = print_report(result, previous_result(history, result), args.threshold)
+        any_regression = any_regression or bool(regressions)
+        history.append(result)
+
+    if not args.no_save:
+        with open(results_path, 'w') as f:
+            json.dump(history, f, indent=2)
+        print(f"Results saved to: {results_path}")
+
+    sys.exit(1 if any_regression else 0)
+
+
+if __name__ == "__main__":
+    main()
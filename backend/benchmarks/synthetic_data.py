@@ -0,0 +1,456 @@
+"""
+Synthetic NYC Yellow Taxi trip generator.
+
+Produces a Tripdata.csv-shaped file (and a matching taxi_zone_lookup.csv)
+so the pipeline can be benchmarked without the real TLC data.
+Every outlier class checked by remove_outliners is injected at a controlled
+fraction, together with duplicates and missing values.
+
+Usage (from backend/):
+    python -m benchmarks.synthetic_data --rows 1M
+"""
+
+import argparse
+import json
+import numpy as np
+import pandas as pd
+from pathlib import Path
+import sys
+
+backend_dir = Path(__file__).resolve().parents[1]
+project_root = Path(__file__).resolve().parents[2]
+sys.path.insert(0, str(backend_dir))
+
+from config import SYNTHETIC_DATA_DIR
+
+
+TRIP_COLUMNS = [
+    'VendorID', 'tpep_pickup_datetime', 'tpep_dropoff_datetime',
+    'passenger_count', 'trip_distance', 'RatecodeID', 'store_and_fwd_flag',
+    'PULocationID', 'DOLocationID', 'payment_type', 'fare_amount',
+    'extra', 'mta_tax', 'tip_amount', 'tolls_amount',
+    'improvement_surcharge', 'total_amount', 'congestion_surcharge'
+]
+
+# One entry per rule in remove_outliners, plus the missing/duplicate phases.
+# Each class gets this fraction of the rows unless overridden.
+DEFAULT_OUTLIER_FRACTION = 0.002
+OUTLIER_CLASSES = [
+    'invalid_datetime',
+    'zero_distance',
+    'zero_fare',
+    'dropoff_before_pickup',
+    'unrealistic_duration',
+    'unrealistic_distance',
+    'excessive_fare',
+    'invalid_passenger_count',
+    'unrealistic_speed',
+    'negative_fare_component',
+    'inconsistent_total',
+    'cash_with_tip',
+    'zero_distance_with_fare',
+]
+DEFAULT_MISSING_FRACTION = 0.005
+DEFAULT_DUPLICATE_FRACTION = 0.005
+# TLC files leave passenger_count, RatecodeID, store_and_fwd_flag and
+# congestion_surcharge empty together on a share of rows.
+DEFAULT_NULL_META_FRACTION = 0.01
+
+# Relative pickup volume per hour of day (NYC yellow taxi shape)
+HOURLY_PROFILE = np.array([
+    3.0, 2.0, 1.4, 1.0, 0.8, 0.9, 1.8, 3.2, 4.2, 4.3, 4.3, 4.5,
+    4.8, 4.9, 5.2, 5.4, 5.5, 6.0, 6.4, 6.0, 5.4, 5.2, 4.8, 3.9
+])
+
+# Borough sizes of the real 265-row zone lookup
+BOROUGH_ZONE_COUNTS = [
+    ('Manhattan', 69), ('Brooklyn', 61), ('Queens', 67),
+    ('Bronx', 43), ('Staten Island', 20),
+]
+AIRPORT_ZONES = {1: ('EWR', 'Newark Airport', 'EWR'),
+                 132: ('Queens', 'JFK Airport', 'Airports'),
+                 138: ('Queens', 'LaGuardia Airport', 'Airports')}
+UNKNOWN_ZONES = {264: ('Unknown', 'NV', 'N/A'),
+                 265: ('N/A', 'Outside of NYC', 'N/A')}
+
+CHUNK_ROWS = 1_000_000
+
+# Rough NYC bounding box (lon/lat) tiled by the synthetic zone polygons
+NYC_BOUNDS = (-74.26, 40.49, -73.70, 40.92)
+
+
+def parse_row_count(text):
+    """Parse sizes such as 100k, 1M or 10M into an integer."""
+    text = str(text).strip().lower().replace('_', '')
+    multiplier = 1
+    if text.endswith('k'):
+        multiplier, text = 1_000, text[:-1]
+    elif text.endswith('m'):
+        multiplier, text = 1_000_000, text[:-1]
+    return int(float(text) * multiplier)
+
+
+def format_row_count(rows):
+    """Inverse of parse_row_count, used in file names (100k, 1M, ...)."""
+    if rows % 1_000_000 == 0:
+        return f"{rows // 1_000_000}M"
+    if rows % 1_000 == 0:
+        return f"{rows // 1_000}k"
+    return str(rows)
+
+
+def build_zone_lookup(seed=42):
+    """
+    Build a 265-row zone lookup with the real borough sizes.
+    Airports (1, 132, 138) and the unknown zones (264, 265) keep their real IDs.
+    """
+    rng = np.random.default_rng(seed)
+    fixed = {**AIRPORT_ZONES, **UNKNOWN_ZONES}
+    free_ids = [i for i in range(1, 266) if i not in fixed]
+
+    boroughs = []
+    for borough, count in BOROUGH_ZONE_COUNTS:
+        boroughs.extend([borough] * count)
+    boroughs = rng.permutation(boroughs)
+
+    rows = []
+    for location_id, borough in zip(free_ids, boroughs):
+        service_zone = 'Yellow Zone' if borough == 'Manhattan' else 'Boro Zone'
+        rows.append((location_id, borough, f"Synthetic Zone {location_id}", service_zone))
+    for location_id, (borough, zone, service_zone) in fixed.items():
+        rows.append((location_id, borough, zone, service_zone))
+
+    zones = pd.DataFrame(rows, columns=['LocationID', 'Borough', 'Zone', 'service_zone'])
+    return zones.sort_values('LocationID').reset_index(drop=True)
+
+
+def zone_squares(zones):
+    """LocationID -> (min_lon, min_lat, width, height) of its synthetic square."""
+    min_lon, min_lat, max_lon, max_lat = NYC_BOUNDS
+    cols = int(np.ceil(np.sqrt(len(zones))))
+    rows = int(np.ceil(len(zones) / cols))
+    width = (max_lon - min_lon) / cols
+    height = (max_lat - min_lat) / rows
+    return {
+        int(location_id): (min_lon + (position % cols) * width,
+                           min_lat + (position // cols) * height, width, height)
+        for position, location_id in enumerate(zones['LocationID'])
+    }
+
+
+def build_zone_geojson(zones, vertices_per_side=75):
+    """
+    Tile the NYC bounding box with one square polygon per zone.
+    Edges are densified so the payload is about as large as the real
+    taxi_zones.geojson (a few MB).
+    """
+    squares = zone_squares(zones)
+    steps = np.linspace(0, 1, vertices_per_side, endpoint=False)
+
+    features = []
+    for zone in zones.itertuples(index=False):
+        x0, y0, width, height = squares[int(zone.LocationID)]
+        ring = (
+            [(x0 + t * width, y0) for t in steps]
+            + [(x0 + width, y0 + t * height) for t in steps]
+            + [(x0 + width - t * width, y0 + height) for t in steps]
+            + [(x0, y0 + height - t * height) for t in steps]
+        )
+        ring.append(ring[0])
+        features.append({
+            "type": "Feature",
+            "properties": {
+                "LocationID": int(zone.LocationID),
+                "zone": zone.Zone,
+                "borough": zone.Borough,
+            },
+            "geometry": {
+                "type": "Polygon",
+                "coordinates": [[[round(x, 6), round(y, 6)] for x, y in ring]],
+            },
+        })
+    return {"type": "FeatureCollection", "features": features}
+
+
+def write_zone_geojson(path, seed=42):
+    """Write the synthetic zone polygons for the zone lookup of this seed."""
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with open(path, 'w') as f:
+        json.dump(build_zone_geojson(build_zone_lookup(seed)), f)
+    return path
+
+
+def ids_to_coordinates(df, zones, rng):
+    """
+    Replace PULocationID/DOLocationID with a random point inside the zone's
+    square, the shape of older coordinate-based TLC files. Missing IDs
+    become missing coordinates.
+    """
+    squares = zone_squares(zones)
+    for id_col, prefix in (('PULocationID', 'pickup'), ('DOLocationID', 'dropoff')):
+        ids = df[id_col].to_numpy()
+        known = ~np.isnan(ids)
+        boxes = np.full((len(df), 4), np.nan)
+        boxes[known] = [squares[int(location_id)] for location_id in ids[known]]
+        df[f'{prefix}_longitude'] = (boxes[:, 0] + rng.random(len(df)) * boxes[:, 2]).round(6)
+        df[f'{prefix}_latitude'] = (boxes[:, 1] + rng.random(len(df)) * boxes[:, 3]).round(6)
+    return df.drop(columns=['PULocationID', 'DOLocationID'])
+
+
+def random_points(n, seed=42):
+    """n uniform lon/lat points over NYC_BOUNDS (for zone assignment benchmarks)."""
+    rng = np.random.default_rng(seed)
+    min_lon, min_lat, max_lon, max_lat = NYC_BOUNDS
+    return rng.uniform(min_lon, max_lon, n), rng.uniform(min_lat, max_lat, n)
+
+
+def zone_weights(zones, seed=42):
+    """Pickup/dropoff popularity per LocationID: Manhattan and airports dominate."""
+    rng = np.random.default_rng(seed + 1)
+    base = {'Manhattan': 25.0, 'Queens': 3.0, 'Brooklyn': 2.5, 'Bronx': 0.6,
+            'Staten Island': 0.05, 'EWR': 0.3, 'Unknown': 0.5, 'N/A': 0.1}
+    weights = zones['Borough'].map(base).fillna(0.1).to_numpy()
+    weights = weights * rng.lognormal(0, 0.8, size=len(weights))
+    weights[zones['LocationID'].isin([132, 138]).to_numpy()] = 150.0
+    return zones['LocationID'].to_numpy(), weights / weights.sum()
+
+
+def generate_clean_trips(n, rng, zone_ids, zone_probs, start, days):
+    """Generate n valid trips that pass every cleaning rule."""
+    # pickup time: uniform day, hour drawn from the daily profile
+    day = rng.integers(0, days, size=n)
+    hour = rng.choice(24, size=n, p=HOURLY_PROFILE / HOURLY_PROFILE.sum())
+    second = rng.integers(0, 3600, size=n)
+    pickup = (np.datetime64(start, 's')
+              + (day * 86400 + hour * 3600 + second).astype('timedelta64[s]'))
+
+    duration_min = np.clip(rng.lognormal(np.log(12), 0.6, size=n), 2, 180)
+    speed_mph = np.clip(rng.lognormal(np.log(11), 0.35, size=n), 2, 55)
+    distance = np.round(speed_mph * duration_min / 60, 2)
+    distance = np.maximum(distance, 0.1)
+    dropoff = pickup + (duration_min * 60).astype('timedelta64[s]')
+
+    rate_code = rng.choice([1, 2, 3, 4, 5, 6], size=n,
+                           p=[0.94, 0.035, 0.004, 0.002, 0.018, 0.001])
+    fare = np.round(3.0 + 2.5 * distance + 0.5 * duration_min, 2)
+    fare = np.where(rate_code == 2, 70.0, fare)
+    fare = np.minimum(fare, 450.0)
+
+    payment_type = rng.choice([1, 2, 3, 4], size=n, p=[0.78, 0.18, 0.02, 0.02])
+    tipped = (payment_type == 1) & (rng.random(n) < 0.85)
+    tip = np.where(tipped, np.round(fare * rng.uniform(0.1, 0.3, size=n), 2), 0.0)
+
+    extra = rng.choice([0.0, 1.0, 2.5], size=n, p=[0.5, 0.3, 0.2])
+    mta_tax = np.full(n, 0.5)
+    improvement = np.full(n, 1.0)
+    tolls = np.where(rng.random(n) < 0.05, 6.94, 0.0)
+    congestion = np.where(rng.random(n) < 0.9, 2.5, 0.0)
+    total = np.round(fare + extra + mta_tax + tip + tolls + improvement + congestion, 2)
+
+    return pd.DataFrame({
+        'VendorID': rng.choice([1, 2], size=n, p=[0.27, 0.73]),
+        'tpep_pickup_datetime': pickup,
+        'tpep_dropoff_datetime': dropoff,
+        'passenger_count': rng.choice([1, 2, 3, 4, 5, 6], size=n,
+                                      p=[0.72, 0.15, 0.05, 0.03, 0.03, 0.02]).astype(float),
+        'trip_distance': distance,
+        'RatecodeID': rate_code.astype(float),
+        'store_and_fwd_flag': np.where(rng.random(n) < 0.995, 'N', 'Y').astype(object),
+        'PULocationID': rng.choice(zone_ids, size=n, p=zone_probs).astype(float),
+        'DOLocationID': rng.choice(zone_ids, size=n, p=zone_probs).astype(float),
+        'payment_type': payment_type,
+        'fare_amount': fare,
+        'extra': extra,
+        'mta_tax': mta_tax,
+        'tip_amount': tip,
+        'tolls_amount': tolls,
+        'improvement_surcharge': improvement,
+        'total_amount': total,
+        'congestion_surcharge': congestion,
+    }, columns=TRIP_COLUMNS)
+
+
+def _recompute_total(df, idx):
+    components = ['fare_amount', 'extra', 'mta_tax', 'tip_amount', 'tolls_amount',
+                  'improvement_surcharge', 'congestion_surcharge']
+    df.loc[idx, 'total_amount'] = df.loc[idx, components].sum(axis=1).round(2)
+
+
+def inject_outliers(df, rng, fractions):
+    """
+    Corrupt disjoint slices of df, one slice per outlier class.
+    Each corruption is chosen so the row trips exactly the intended rule first.
+    """
+    n = len(df)
+    order = rng.permutation(n)
+    cursor = 0
+
+    def take(fraction):
+        nonlocal cursor
+        count = int(round(n * fraction))
+        idx = df.index[order[cursor:cursor + count]]
+        cursor += count
+        return idx
+
+    pickup = 'tpep_pickup_datetime'
+    dropoff = 'tpep_dropoff_datetime'
+
+    idx = take(fractions['invalid_datetime'])
+    df.loc[idx, pickup] = pd.NaT
+
+    idx = take(fractions['zero_distance'])
+    df.loc[idx, 'trip_distance'] = -df.loc[idx, 'trip_distance'] * rng.integers(0, 2, len(idx))
+
+    idx = take(fractions['zero_fare'])
+    df.loc[idx, 'fare_amount'] = -df.loc[idx, 'fare_amount'] * rng.integers(0, 2, len(idx))
+
+    idx = take(fractions['dropoff_before_pickup'])
+    df.loc[idx, [pickup, dropoff]] = df.loc[idx, [dropoff, pickup]].to_numpy()
+
+    idx = take(fractions['unrealistic_duration'])
+    df.loc[idx, dropoff] = df.loc[idx, pickup] + pd.Timedelta(hours=25)
+
+    idx = take(fractions['unrealistic_distance'])
+    df.loc[idx, 'trip_distance'] = rng.uniform(101, 400, len(idx)).round(2)
+
+    idx = take(fractions['excessive_fare'])
+    df.loc[idx, 'fare_amount'] = rng.uniform(501, 2000, len(idx)).round(2)
+    _recompute_total(df, idx)
+
+    idx = take(fractions['invalid_passenger_count'])
+    df.loc[idx, 'passenger_count'] = rng.choice([0, 7, 8, 9], len(idx))
+
+    idx = take(fractions['unrealistic_speed'])
+    df.loc[idx, dropoff] = df.loc[idx, pickup] + pd.Timedelta(minutes=10)
+    df.loc[idx, 'trip_distance'] = rng.uniform(20, 99, len(idx)).round(2)
+
+    idx = take(fractions['negative_fare_component'])
+    df.loc[idx, 'extra'] = -1.0
+    _recompute_total(df, idx)
+
+    idx = take(fractions['inconsistent_total'])
+    df.loc[idx, 'total_amount'] = df.loc[idx, 'total_amount'] + rng.uniform(2, 20, len(idx)).round(2)
+
+    idx = take(fractions['cash_with_tip'])
+    df.loc[idx, 'payment_type'] = 2
+    df.loc[idx, 'tip_amount'] = rng.uniform(1.5, 10, len(idx)).round(2)
+    _recompute_total(df, idx)
+
+    # Rule 11 runs after rule 1 in remove_outliners, so these rows are
+    # reported under "Zero/Negative trip distance"; they are still generated
+    # so the rule is exercised.
+    idx = take(fractions['zero_distance_with_fare'])
+    df.loc[idx, 'trip_distance'] = 0.0
+    df.loc[idx, 'fare_amount'] = rng.uniform(6, 40, len(idx)).round(2)
+    _recompute_total(df, idx)
+
+    return order[cursor:]
+
+
+def generate_trip_chunk(n, seed, zone_ids, zone_probs, start='2024-01-01', days=31,
+                        outlier_fractions=None, missing_fraction=DEFAULT_MISSING_FRACTION,
+                        duplicate_fraction=DEFAULT_DUPLICATE_FRACTION,
+                        null_meta_fraction=DEFAULT_NULL_META_FRACTION):
+    """Generate one chunk of n rows (duplicates included) with injected dirt."""
+    rng = np.random.default_rng(seed)
+    fractions = {name: DEFAULT_OUTLIER_FRACTION for name in OUTLIER_CLASSES}
+    fractions.update(outlier_fractions or {})
+
+    n_duplicates = int(round(n * duplicate_fraction))
+    df = generate_clean_trips(n - n_duplicates, rng, zone_ids, zone_probs, start, days)
+    remaining = inject_outliers(df, rng, fractions)
+
+    # Missing values in the critical columns
+    count = int(round(len(df) * missing_fraction))
+    idx = df.index[remaining[:count]]
+    remaining = remaining[count:]
+    critical = ['PULocationID', 'DOLocationID', 'trip_distance', 'fare_amount']
+    for col, rows in zip(critical, np.array_split(idx, len(critical))):
+        df.loc[rows, col] = np.nan
+
+    # Rows with the optional metadata columns left empty
+    count = int(round(len(df) * null_meta_fraction))
+    idx = df.index[remaining[:count]]
+    df.loc[idx, ['passenger_count', 'RatecodeID', 'store_and_fwd_flag',
+                 'congestion_surcharge']] = np.nan
+
+    # Exact duplicates of random rows
+    duplicates = df.iloc[rng.integers(0, len(df), n_duplicates)]
+    df = pd.concat([df, duplicates], ignore_index=True)
+    return df.iloc[rng.permutation(len(df))]
+
+
+def generate_dataset(rows, output_dir=None, seed=42, start='2024-01-01', days=31,
+                     force=False, coordinates=False, **options):
+    """
+    Write trips_<rows>_seed<seed>.csv and the matching zone lookup.
+    With coordinates=True the file carries pickup/dropoff lon/lat instead of
+    LocationIDs (trips_<rows>_seed<seed>_coords.csv).
+    Existing files are reused unless force=True.
+    Returns (trip_path, zone_path).
+    """
+    output_dir = Path(output_dir) if output_dir else project_root / SYNTHETIC_DATA_DIR
+    output_dir.mkdir(parents=True, exist_ok=True)
+    suffix = "_coords" if coordinates else ""
+    trip_path = output_dir / f"trips_{format_row_count(rows)}_seed{seed}{suffix}.csv"
+    zone_path = output_dir / f"taxi_zone_lookup_seed{seed}.csv"
+
+    zones = build_zone_lookup(seed)
+    if force or not zone_path.exists():
+        zones.to_csv(zone_path, index=False)
+
+    if trip_path.exists() and not force:
+        print(f"Reusing synthetic trips: {trip_path}")
+        return trip_path, zone_path
+
+    print(f"Generating {rows:,} synthetic trips -> {trip_path}")
+    zone_ids, zone_probs = zone_weights(zones, seed)
+    tmp_path = trip_path.with_suffix('.csv.tmp')
+    written = 0
+    chunk_num = 0
+    while written < rows:
+        n = min(CHUNK_ROWS, rows - written)
+        chunk = generate_trip_chunk(n, seed + chunk_num, zone_ids, zone_probs,
+                                    start=start, days=days, **options)
+        if coordinates:
+            chunk = ids_to_coordinates(chunk, zones, np.random.default_rng(seed + chunk_num))
+        chunk.to_csv(tmp_path, mode='w' if chunk_num == 0 else 'a',
+                     header=chunk_num == 0, index=False,
+                     date_format='%Y-%m-%d %H:%M:%S')
+        written += n
+        chunk_num += 1
+        print(f"  {written:,} / {rows:,} rows written")
+    tmp_path.replace(trip_path)
+    return trip_path, zone_path
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Generate synthetic TLC yellow taxi trips.")
+    parser.add_argument('--rows', nargs='+', default=['100k'],
+                        help="row counts, e.g. 100k 1M 10M")
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--start', default='2024-01-01', help="first pickup day")
+    parser.add_argument('--days', type=int, default=31, help="days covered by the pickups")
+    parser.add_argument('--outlier-fraction', type=float, default=DEFAULT_OUTLIER_FRACTION,
+                        help="fraction of rows per outlier class")
+    parser.add_argument('--missing-fraction', type=float, default=DEFAULT_MISSING_FRACTION)
+    parser.add_argument('--duplicate-fraction', type=float, default=DEFAULT_DUPLICATE_FRACTION)
+    parser.add_argument('--coordinates', action='store_true',
+                        help="write pickup/dropoff lon/lat instead of LocationIDs")
+    parser.add_argument('--output-dir', default=None)
+    parser.add_argument('--force', action='store_true', help="regenerate existing files")
+    args = parser.parse_args()
+
+    for size in args.rows:
+        generate_dataset(
+            parse_row_count(size), args.output_dir, seed=args.seed,
+            start=args.start, days=args.days, force=args.force, coordinates=args.coordinates,
+            outlier_fractions={name: args.outlier_fraction for name in OUTLIER_CLASSES},
+            missing_fraction=args.missing_fraction,
+            duplicate_fraction=args.duplicate_fraction,
+        )
+
+
+if __name__ == "__main__":
+    main()
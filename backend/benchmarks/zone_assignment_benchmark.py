@@ -0,0 +1,83 @@
+"""
+Zone assignment benchmark.
+
+Builds the zone grid index over the synthetic zone polygons and maps
+uniform random lon/lat points to LocationIDs, reporting points/s. Every
+answer is checked against the synthetic squares the points fall in.
+
+Usage (from backend/):
+    python -m benchmarks.zone_assignment_benchmark --points 1M 10M
+"""
+
+import argparse
+import time
+from pathlib import Path
+import sys
+
+import numpy as np
+
+backend_dir = Path(__file__).resolve().parents[1]
+project_root = Path(__file__).resolve().parents[2]
+sys.path.insert(0, str(backend_dir))
+
+from config import SYNTHETIC_DATA_DIR
+from benchmarks.synthetic_data import (build_zone_lookup, write_zone_geojson, zone_squares,
+                                       random_points, parse_row_count)
+from Pipeline.zone_assignment import ZoneGridIndex, load_zone_polygons, GRID_SIZE
+
+
+# The GeoJSON rounds vertices to 6 decimals; points closer than this to a
+# square edge are not checked
+EDGE_TOLERANCE = 1e-6
+
+
+def expected_zones(x, y, squares):
+    """Ground truth from the square tiling (NaN outside every square or on an edge)."""
+    expected = np.full(len(x), np.nan, dtype=np.float32)
+    tol = EDGE_TOLERANCE
+    for location_id, (x0, y0, width, height) in squares.items():
+        inside = ((x > x0 + tol) & (x < x0 + width - tol)
+                  & (y > y0 + tol) & (y < y0 + height - tol))
+        expected[inside] = location_id
+    return expected
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark point-in-polygon zone assignment.")
+    parser.add_argument('--points', nargs='+', default=['1M'], help="point counts, e.g. 1M 10M")
+    parser.add_argument('--grid-size', type=int, default=GRID_SIZE)
+    parser.add_argument('--seed', type=int, default=42)
+    args = parser.parse_args()
+
+    geojson_path = project_root / SYNTHETIC_DATA_DIR / f"taxi_zones_seed{args.seed}.geojson"
+    if not geojson_path.exists():
+        write_zone_geojson(geojson_path, args.seed)
+
+    started = time.perf_counter()
+    index = ZoneGridIndex(load_zone_polygons(geojson_path), grid_size=args.grid_size)
+    build_seconds = time.perf_counter() - started
+    boundary_share = index.boundary.mean()
+    squares = zone_squares(build_zone_lookup(args.seed))
+
+    print(f"\n{'='*70}")
+    print(f"Zone grid: {len(index.edges)} zones, {args.grid_size}x{args.grid_size} cells "
+          f"({boundary_share:.1%} boundary), built in {build_seconds:.2f}s")
+    print(f"{'='*70}")
+    print(f"  {'points':>12}{'seconds':>10}{'points/s':>14}{'matched':>10}{'errors':>9}")
+    for size in args.points:
+        n = parse_row_count(size)
+        x, y = random_points(n, args.seed)
+        started = time.perf_counter()
+        zones = index.lookup(x, y)
+        seconds = time.perf_counter() - started
+
+        expected = expected_zones(x, y, squares)
+        checked = ~np.isnan(expected)
+        errors = int(np.count_nonzero(zones[checked] != expected[checked]))
+        matched = np.count_nonzero(~np.isnan(zones)) / n
+        print(f"  {n:>12,}{seconds:>10.3f}{n / seconds:>14,.0f}{matched:>10.1%}{errors:>9,}")
+    print(f"{'='*70}")
+
+
+if __name__ == "__main__":
+    main()
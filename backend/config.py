@@ -6,12 +6,37 @@ This stores the file paths in one place.
 TRIP_DATA_PATH = "Data/raw/Tripdata.csv"
 ZONE_LOOKUP_PATH = "Data/raw/taxi_zone_lookup.csv"
 
-PROCESSED_DATA_PATH = "Data/processed/cleaned_trips.csv"
+# Parquet dataset partitioned by pickup_year/pickup_month
+PROCESSED_DATA_PATH = "Data/processed/trips/"
+# Memory-mapped aggregates of the loaded trips (analytics/aggregate_file.py)
+AGGREGATE_FILE_PATH = "Data/processed/trip_aggregates.bin"
+# Stratified development samples (Pipeline/sampling.py) and their processed store
+SAMPLE_DATA_DIR = "Data/sample/"
+SAMPLE_PROCESSED_PATH = "Data/sample/processed/"
+# Duration/fare quantiles per zone pair and hour of week (analytics/estimator.py)
+ESTIMATOR_TABLE_PATH = "Data/processed/trip_estimates.npz"
+SAMPLE_ESTIMATOR_TABLE_PATH = "Data/sample/trip_estimates.npz"
 LOG_DIR = "Data/Logs/"
+# Trip CSVs dropped here are ingested by the micro-batch service (Pipeline/streaming.py)
+STREAM_DROP_DIR = "Data/incoming/"
+# Bumped by database/insert_data.py after every load; the API's ETags and
+# in-memory caches follow it
+DATASET_VERSION_PATH = "Data/dataset_version"
+# Feather outputs of the pipeline stages, keyed by a hash of their inputs
+STAGE_CACHE_DIR = "Data/cache/stages/"
 ZONES_SHP_PATH = "Data/raw/taxi_zones (1)/taxi_zones.shp"
+# Written from the shapefile by scripts/convert_shapefile.py
+ZONES_GEOJSON_PATH = "Data/raw/taxi_zones (1)/taxi_zones.geojson"
+
+SYNTHETIC_DATA_DIR = "Data/synthetic/"
+BENCHMARK_RESULTS_PATH = "Data/benchmarks/pipeline_results.json"
+API_BENCHMARK_RESULTS_PATH = "Data/benchmarks/api_results.json"
 
 DB_HOST = "localhost"
 DB_USER = "taxi_user"
 DB_PASSWORD = "taxi_pass"
 DB_NAME = "urban_mobility"
+# Execution time limit of the API's SQL queries; longer ones are stopped
+# and answered with a 503
+DB_STATEMENT_TIMEOUT_MS = 5000
 
@@ -0,0 +1,75 @@
+"""
+Version of the data loaded into the database.
+
+insert_data bumps it after every load. The API reads it on each request
+(one stat() call) to build ETags and to know when its in-memory caches
+are stale, so every API worker sees a reload without a restart.
+
+The streaming ingestor publishes "<load>+<batch>" versions: the trips of
+the load are unchanged and new ones were appended, so the API adds those
+to its column store instead of reloading it.
+"""
+
+import os
+from pathlib import Path
+import sys
+import time
+
+backend_dir = Path(__file__).resolve().parents[1]
+project_root = Path(__file__).resolve().parents[2]
+sys.path.insert(0, str(backend_dir))
+
+from config import DATASET_VERSION_PATH
+
+# version reported before the first load has written the file
+INITIAL_VERSION = "0"
+
+
+def version_path():
+    return project_root / DATASET_VERSION_PATH
+
+
+def new_dataset_version():
+    return f"{time.time_ns():x}"
+
+
+def appended_version(version):
+    """New version for trips appended to the data of version."""
+    return f"{load_version(version)}+{new_dataset_version()}"
+
+
+def load_version(version):
+    """The load a version belongs to (the same for every batch appended to it)."""
+    return version.split('+', 1)[0]
+
+
+def bump_dataset_version(version=None):
+    """Publish version (default: a new one), atomically replacing the file; returns it."""
+    path = version_path()
+    path.parent.mkdir(parents=True, exist_ok=True)
+    version = version or new_dataset_version()
+    tmp_path = path.with_suffix('.tmp')
+    tmp_path.write_text(version)
+    os.replace(tmp_path, path)
+    return version
+
+
+class DatasetVersion:
+    """Current version, re-read only when the file's mtime changes."""
+
+    def __init__(self):
+        self._mtime = None
+        self._version = INITIAL_VERSION
+
+    def get(self):
+        try:
+            mtime = os.stat(version_path()).st_mtime_ns
+        except FileNotFoundError:
+            return INITIAL_VERSION
+        if mtime != self._mtime:
+            self._version = version_path().read_text().strip() or INITIAL_VERSION
+            self._mtime = mtime
+        return self._version
+
+
+dataset_version = DatasetVersion()
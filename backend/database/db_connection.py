@@ -1,5 +1,3 @@
-import mysql.connector
-from mysql.connector import Error
 import sys
 from pathlib import Path
 
@@ -8,10 +6,43 @@ sys.path.insert(0, str(backend_dir))
 
 from config import DB_HOST, DB_USER, DB_PASSWORD, DB_NAME
 
+# "mysql" in normal use; the benchmarks switch to an embedded SQLite file
+DB_BACKEND = "mysql"
+SQLITE_PATH = None
+
+# MySQL error ER_QUERY_TIMEOUT: statement ran past MAX_EXECUTION_TIME
+MYSQL_QUERY_TIMEOUT_ERRNO = 3024
+
+
+class QueryTimeout(Exception):
+    """A statement was stopped by its execution timeout."""
+
+
+def configure_backend(backend, sqlite_path=None):
+    """
+    Select the database used by get_connection().
+    backend is "mysql" or "sqlite" (sqlite_path required for the latter).
+    """
+    global DB_BACKEND, SQLITE_PATH
+    if backend not in ("mysql", "sqlite"):
+        raise ValueError(f"Unknown database backend: {backend}")
+    if backend == "sqlite" and not sqlite_path:
+        raise ValueError("sqlite backend needs a database file path")
+    DB_BACKEND = backend
+    SQLITE_PATH = sqlite_path
+
+
 def get_connection():
     """
     Create a connection to the MySQL database using credentials from config.py
     """
+    if DB_BACKEND == "sqlite":
+        from database.sqlite_compat import SQLiteConnection
+        return SQLiteConnection(SQLITE_PATH)
+
+    import mysql.connector
+    from mysql.connector import Error
+
     try:
         connection = mysql.connector.connect(
             host=DB_HOST,
@@ -19,11 +50,11 @@ def get_connection():
             password=DB_PASSWORD,
             database=DB_NAME
         )
-        
+
         if connection.is_connected():
             print(f"Successfully connected to MySQL database: {DB_NAME}")
             return connection
-            
+
     except Error as error:
         raise RuntimeError(f"MySQL connection failed: {error}")
 
@@ -33,4 +64,28 @@ def close_connection(connection):
     """
     if connection and connection.is_connected():
         connection.close()
-        print("MySQL connection closed")
+        if DB_BACKEND == "mysql":
+            print("MySQL connection closed")
+
+
+def set_statement_timeout(connection, timeout_ms):
+    """
+    Limit the run time of the SELECT statements executed on connection
+    (MAX_EXECUTION_TIME for MySQL); None or 0 removes the limit.
+    """
+    if DB_BACKEND == "sqlite":
+        connection.set_statement_timeout(timeout_ms)
+        return
+    cursor = connection.cursor()
+    try:
+        cursor.execute("SET SESSION MAX_EXECUTION_TIME = %s", (int(timeout_ms or 0),))
+    finally:
+        cursor.close()
+
+
+def is_statement_timeout(error):
+    """True if error is a database error raised by the statement timeout."""
+    if DB_BACKEND == "sqlite":
+        import sqlite3
+        return isinstance(error, sqlite3.OperationalError) and "interrupted" in str(error)
+    return getattr(error, "errno", None) == MYSQL_QUERY_TIMEOUT_ERRNO
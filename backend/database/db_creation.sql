@@ -12,6 +12,7 @@ DROP VIEW IF EXISTS borough_statistics;
 DROP TABLE IF EXISTS trips ;
 DROP TABLE IF EXISTS rate_codes ;
 DROP TABLE IF EXISTS taxi_zones ;
+DROP TABLE IF EXISTS boroughs ;
 
 
 -- DIMENSION TABLE: rate_codes
@@ -23,6 +24,16 @@ CREATE TABLE rate_codes (
     description TEXT NOT NULL
 );
 
+-- DIMENSION TABLE: boroughs
+-- Codes of trips.pickup_borough_code / dropoff_borough_code
+-- (filled by insert_data.py from utils/geography.py)
+
+
+CREATE TABLE boroughs (
+    borough_code INTEGER PRIMARY KEY,
+    Borough VARCHAR(50) NOT NULL
+);
+
 -- DIMENSION TABLE: taxi_zones
 
 
@@ -72,6 +83,16 @@ CREATE TABLE trips (
     trip_duration_minutes DECIMAL(10, 2),
     average_speed_mph DECIMAL(10, 2),
     tip_percentage DECIMAL(5, 2),
+
+    -- Materialised time and geography features (filter/group on these
+    -- instead of HOUR()/DATE() of the pickup time or a taxi_zones join)
+    pickup_date DATE,
+    pickup_hour TINYINT UNSIGNED,
+    pickup_weekday TINYINT UNSIGNED,          -- 0 = Monday .. 6 = Sunday
+    is_weekend BOOLEAN,
+    pickup_borough_code TINYINT UNSIGNED,     -- boroughs.borough_code
+    dropoff_borough_code TINYINT UNSIGNED,
+    is_airport_trip BOOLEAN,
     
     -- Foreign Key Constraints
     CONSTRAINT fk_rate_code 
@@ -129,6 +150,11 @@ CREATE INDEX idx_trips_payment_type ON trips(payment_type);
 -- Composite index for common location-based time queries
 CREATE INDEX idx_trips_pickup_datetime_location ON trips(tpep_pickup_datetime, PULocationID);
 
+-- Materialised features: borough filter with a pickup range/sort
+-- (/api/trips?borough=...), and per-day / per-hour grouping
+CREATE INDEX idx_trips_borough_pickup ON trips(pickup_borough_code, tpep_pickup_datetime);
+CREATE INDEX idx_trips_date_hour ON trips(pickup_date, pickup_hour);
+
 CREATE INDEX idx_trips_fare_amount ON trips(fare_amount);
 
 CREATE INDEX idx_trips_distance ON trips(trip_distance);
@@ -209,7 +235,7 @@ ORDER BY trip_count DESC;
 -- GET /api/stats/by-borough
 CREATE VIEW borough_statistics AS
 SELECT 
-    tz.Borough as pickup_borough,
+    b.Borough as pickup_borough,
     COUNT(*) as trip_count,
     ROUND(AVG(t.fare_amount), 2) as avg_fare,
     ROUND(AVG(t.trip_distance), 2) as avg_distance,
@@ -217,9 +243,8 @@ SELECT
     ROUND(AVG(t.trip_duration_minutes), 2) as avg_duration,
     ROUND(SUM(t.total_amount), 2) as total_revenue
 FROM trips t
-JOIN taxi_zones tz ON t.PULocationID = tz.LocationID
-WHERE tz.Borough IS NOT NULL
-GROUP BY tz.Borough
+JOIN boroughs b ON t.pickup_borough_code = b.borough_code
+GROUP BY b.Borough
 ORDER BY trip_count DESC;
 
 
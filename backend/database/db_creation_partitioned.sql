@@ -0,0 +1,254 @@
+-- Partitioned schema mode.
+-- Same tables and views as db_creation.sql, but trips is RANGE-partitioned
+-- by pickup month and carries an index set derived from the API queries.
+
+CREATE DATABASE IF NOT EXISTS urban_mobility;
+USE urban_mobility;
+
+
+-- Drop views first (they depend on tables)
+DROP VIEW IF EXISTS trip_details;
+DROP VIEW IF EXISTS rate_code_statistics;
+DROP VIEW IF EXISTS borough_statistics;
+
+
+-- Drop tables if they exist (for clean recreation)
+DROP TABLE IF EXISTS trips ;
+DROP TABLE IF EXISTS rate_codes ;
+DROP TABLE IF EXISTS taxi_zones ;
+DROP TABLE IF EXISTS boroughs ;
+
+
+-- DIMENSION TABLE: rate_codes
+
+
+CREATE TABLE rate_codes (
+    RatecodeID INTEGER PRIMARY KEY,
+    rate_code_name VARCHAR(50) NOT NULL,
+    description TEXT NOT NULL
+);
+
+-- DIMENSION TABLE: boroughs
+-- Codes of trips.pickup_borough_code / dropoff_borough_code
+-- (filled by insert_data.py from utils/geography.py)
+
+
+CREATE TABLE boroughs (
+    borough_code INTEGER PRIMARY KEY,
+    Borough VARCHAR(50) NOT NULL
+);
+
+-- DIMENSION TABLE: taxi_zones
+
+
+CREATE TABLE taxi_zones (
+    LocationID INTEGER PRIMARY KEY,
+    Borough VARCHAR(50),
+    Zone VARCHAR(100) NOT NULL,
+    service_zone VARCHAR(50)
+    
+);
+
+-- Indexes for efficient location lookups
+CREATE INDEX idx_taxi_zones_borough ON taxi_zones(Borough);
+CREATE INDEX idx_taxi_zones_service_zone ON taxi_zones(service_zone);
+
+-- FACT TABLE: trips (partitioned by pickup month)
+--
+-- MySQL requires the partitioning column in every unique key, so the
+-- primary key is (trip_id, tpep_pickup_datetime), and partitioned InnoDB
+-- tables cannot have foreign keys: insert_data.py only inserts trips whose
+-- LocationIDs/RatecodeIDs exist in the dimension tables.
+--
+-- Only p_future exists at creation. database/partitions.py splits it into
+-- one partition per month as months are ingested (insert_data.py does this
+-- automatically), e.g.
+--     python -m database.partitions --add 2024-01 2024-02
+
+CREATE TABLE trips (
+    -- Primary Key
+    trip_id BIGINT UNSIGNED AUTO_INCREMENT,
+    
+    -- Trip Metadata
+    VendorID INTEGER,
+    tpep_pickup_datetime DATETIME NOT NULL,
+    tpep_dropoff_datetime DATETIME NOT NULL,
+    passenger_count INTEGER,
+    trip_distance DECIMAL(10, 2),
+    store_and_fwd_flag CHAR(1),
+    
+    -- Dimension keys (not enforced, see above)
+    RatecodeID INTEGER,
+    PULocationID INTEGER,
+    DOLocationID INTEGER,
+    
+    -- Payment Information
+    payment_type INTEGER,
+    fare_amount DECIMAL(10, 2),
+    extra DECIMAL(10, 2),
+    mta_tax DECIMAL(10, 2),
+    tip_amount DECIMAL(10, 2),
+    tolls_amount DECIMAL(10, 2),
+    improvement_surcharge DECIMAL(10, 2),
+    total_amount DECIMAL(10, 2),
+    congestion_surcharge DECIMAL(10, 2),
+    
+    -- Engineered Features (Derived Columns)
+    trip_duration_minutes DECIMAL(10, 2),
+    average_speed_mph DECIMAL(10, 2),
+    tip_percentage DECIMAL(5, 2),
+
+    -- Materialised time and geography features (filter/group on these
+    -- instead of HOUR()/DATE() of the pickup time or a taxi_zones join)
+    pickup_date DATE,
+    pickup_hour TINYINT UNSIGNED,
+    pickup_weekday TINYINT UNSIGNED,          -- 0 = Monday .. 6 = Sunday
+    is_weekend BOOLEAN,
+    pickup_borough_code TINYINT UNSIGNED,     -- boroughs.borough_code
+    dropoff_borough_code TINYINT UNSIGNED,
+    is_airport_trip BOOLEAN,
+    
+    PRIMARY KEY (trip_id, tpep_pickup_datetime),
+
+    -- Data Integrity Constraints
+    
+    CONSTRAINT chk_passenger_count 
+        CHECK (passenger_count >= 0 AND passenger_count <= 9),
+    
+    CONSTRAINT chk_trip_distance 
+        CHECK (trip_distance >= 0),
+    
+    CONSTRAINT chk_fare_amount 
+        CHECK (fare_amount >= 0),
+    
+    CONSTRAINT chk_total_amount 
+        CHECK (total_amount >= 0)
+)
+PARTITION BY RANGE COLUMNS (tpep_pickup_datetime) (
+    PARTITION p_future VALUES LESS THAN (MAXVALUE)
+);
+
+-- INDEXES MATCHED TO THE API QUERIES
+-- Each index serves specific endpoints and covers the columns they read,
+-- so those queries never touch the table rows. database/explain_check.py
+-- verifies the plans. Single-column indexes on dropoff time, vendor,
+-- payment type and total_amount are not created: no endpoint filters,
+-- groups or sorts on them.
+
+-- /api/trips date range + default sort, /api/stats/time-series
+CREATE INDEX idx_trips_pickup_cover
+    ON trips(tpep_pickup_datetime, PULocationID, fare_amount, total_amount);
+
+-- /api/trips?borough=... date range + default sort within the borough
+CREATE INDEX idx_trips_borough_pickup
+    ON trips(pickup_borough_code, tpep_pickup_datetime);
+
+-- /api/zones/heatmap, /api/locations/top-pickup, /api/locations/top-routes
+CREATE INDEX idx_trips_route_cover
+    ON trips(PULocationID, DOLocationID, fare_amount, trip_duration_minutes);
+
+-- /api/locations/top-dropoff
+CREATE INDEX idx_trips_dropoff_fare
+    ON trips(DOLocationID, fare_amount);
+
+-- /api/stats/by-rate-code (rate_code_statistics view)
+CREATE INDEX idx_trips_ratecode_cover
+    ON trips(RatecodeID, fare_amount, tip_percentage, trip_distance,
+             trip_duration_minutes, total_amount);
+
+-- /api/trips?sort_by=fare_amount (overview tab: top fares)
+CREATE INDEX idx_trips_fare_amount ON trips(fare_amount);
+
+-- /api/trips?sort_by=trip_distance
+CREATE INDEX idx_trips_distance ON trips(trip_distance);
+
+-- /api/trips?sort_by=trip_duration_minutes
+CREATE INDEX idx_trips_duration ON trips(trip_duration_minutes);
+
+-- VIEWS FOR CRITICAL API ENDPOINTS
+
+-- View 1: trip_details
+
+-- GET /api/trips (with filters)
+CREATE VIEW trip_details AS
+SELECT 
+    -- Trip IDs and timestamps
+    t.trip_id,
+    t.VendorID,
+    t.tpep_pickup_datetime,
+    t.tpep_dropoff_datetime,
+    
+    -- Trip metrics
+    t.passenger_count,
+    t.trip_distance,
+    t.fare_amount,
+    t.tip_amount,
+    t.total_amount,
+    t.payment_type,
+    
+    -- Engineered features
+    t.trip_duration_minutes,
+    t.average_speed_mph,
+    t.tip_percentage,
+    
+    -- Rate code details (from rate_codes dimension)
+    rc.RatecodeID,
+    rc.rate_code_name,
+    rc.description as rate_description,
+    
+    -- Pickup location details (from taxi_zones dimension)
+    t.PULocationID,
+    pu_zone.Borough as pickup_borough,
+    pu_zone.Zone as pickup_zone,
+    pu_zone.service_zone as pickup_service_zone,
+    
+    -- Dropoff location details (from taxi_zones dimension)
+    t.DOLocationID,
+    do_zone.Borough as dropoff_borough,
+    do_zone.Zone as dropoff_zone,
+    do_zone.service_zone as dropoff_service_zone
+    
+FROM trips t
+LEFT JOIN rate_codes rc ON t.RatecodeID = rc.RatecodeID
+LEFT JOIN taxi_zones pu_zone ON t.PULocationID = pu_zone.LocationID
+LEFT JOIN taxi_zones do_zone ON t.DOLocationID = do_zone.LocationID;
+
+
+-- View 2: rate_code_statistics
+--  GET /api/stats/by-rate-code
+
+CREATE VIEW rate_code_statistics AS
+SELECT 
+    rc.RatecodeID,
+    rc.rate_code_name,
+    COUNT(*) as trip_count,
+    ROUND(AVG(t.fare_amount), 2) as avg_fare,
+    ROUND(AVG(t.tip_percentage), 2) as avg_tip_percentage,
+    ROUND(AVG(t.trip_distance), 2) as avg_distance,
+    ROUND(AVG(t.trip_duration_minutes), 2) as avg_duration,
+    ROUND(SUM(t.total_amount), 2) as total_revenue
+FROM trips t
+JOIN rate_codes rc ON t.RatecodeID = rc.RatecodeID
+GROUP BY rc.RatecodeID, rc.rate_code_name
+ORDER BY trip_count DESC;
+
+
+-- View 3: borough_statistics
+-- GET /api/stats/by-borough
+CREATE VIEW borough_statistics AS
+SELECT 
+    b.Borough as pickup_borough,
+    COUNT(*) as trip_count,
+    ROUND(AVG(t.fare_amount), 2) as avg_fare,
+    ROUND(AVG(t.trip_distance), 2) as avg_distance,
+    ROUND(AVG(t.tip_percentage), 2) as avg_tip_percentage,
+    ROUND(AVG(t.trip_duration_minutes), 2) as avg_duration,
+    ROUND(SUM(t.total_amount), 2) as total_revenue
+FROM trips t
+JOIN boroughs b ON t.pickup_borough_code = b.borough_code
+GROUP BY b.Borough
+ORDER BY trip_count DESC;
+
+
+
+
@@ -0,0 +1,112 @@
+"""
+In-memory cache of the dimension tables (taxi_zones, rate_codes).
+
+The dimensions are tiny (265 zones, 6 rate codes), so the API keeps them in
+memory: name filters are translated into ID filters on trips, and result
+rows are decorated with zone/borough/rate names in Python instead of
+joining the dimension tables in SQL.
+"""
+
+import threading
+import time
+from pathlib import Path
+import sys
+
+backend_dir = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(backend_dir))
+
+from database.db_connection import get_connection, close_connection
+
+DEFAULT_TTL_SECONDS = 300
+
+
+class DimensionCache:
+    """Zone and rate-code lookups, reloaded from the database every ttl_seconds."""
+
+    def __init__(self, ttl_seconds=DEFAULT_TTL_SECONDS):
+        self.ttl_seconds = ttl_seconds
+        self._lock = threading.Lock()
+        self._loaded_at = None
+        self._zones = {}
+        self._rate_codes = {}
+        self._rate_code_ids = {}
+
+    def refresh(self):
+        """Reload both dimension tables from the database."""
+        conn = get_connection()
+        cursor = conn.cursor(dictionary=True)
+        try:
+            cursor.execute("SELECT LocationID, Borough, Zone, service_zone FROM taxi_zones")
+            zone_rows = cursor.fetchall()
+            cursor.execute("SELECT RatecodeID, rate_code_name, description FROM rate_codes")
+            rate_rows = cursor.fetchall()
+        finally:
+            cursor.close()
+            close_connection(conn)
+
+        zones = {row['LocationID']: row for row in zone_rows}
+        rate_codes = {row['RatecodeID']: row for row in rate_rows}
+        rate_code_ids = {row['rate_code_name']: row['RatecodeID'] for row in rate_rows}
+
+        # swap in complete dictionaries so readers never see a partial load
+        self._zones = zones
+        self._rate_codes, self._rate_code_ids = rate_codes, rate_code_ids
+        self._loaded_at = time.monotonic()
+
+    def invalidate(self):
+        """Force a reload on the next lookup."""
+        self._loaded_at = None
+
+    def _ensure_fresh(self):
+        loaded_at = self._loaded_at
+        if loaded_at is not None and time.monotonic() - loaded_at < self.ttl_seconds:
+            return
+        with self._lock:
+            # another thread may have refreshed while we waited
+            if self._loaded_at is None or time.monotonic() - self._loaded_at >= self.ttl_seconds:
+                self.refresh()
+
+    # ---- lookups -------------------------------------------------------
+
+    def rate_code_id(self, rate_code_name):
+        """RatecodeID for a rate code name, or None if unknown."""
+        self._ensure_fresh()
+        return self._rate_code_ids.get(rate_code_name)
+
+    def zone(self, location_id):
+        self._ensure_fresh()
+        return self._zones.get(location_id)
+
+    def rate_code(self, ratecode_id):
+        self._ensure_fresh()
+        return self._rate_codes.get(ratecode_id)
+
+    def zones(self, borough=None):
+        """All zones (optionally of one borough) ordered by Zone name."""
+        self._ensure_fresh()
+        rows = [z for z in self._zones.values() if borough is None or z['Borough'] == borough]
+        return sorted(rows, key=lambda z: z['Zone'])
+
+    def decorate_trips(self, trips):
+        """
+        Add the columns the trip_details view used to join in:
+        rate_code_name, rate_description and pickup_/dropoff_ borough, zone
+        and service_zone.
+        """
+        self._ensure_fresh()
+        zones, rate_codes = self._zones, self._rate_codes
+        for trip in trips:
+            rate = rate_codes.get(trip.get('RatecodeID'))
+            trip['rate_code_name'] = rate['rate_code_name'] if rate else None
+            trip['rate_description'] = rate['description'] if rate else None
+            if rate is None:
+                trip['RatecodeID'] = None
+            for prefix, key in (('pickup', 'PULocationID'), ('dropoff', 'DOLocationID')):
+                zone = zones.get(trip.get(key))
+                trip[f'{prefix}_borough'] = zone['Borough'] if zone else None
+                trip[f'{prefix}_zone'] = zone['Zone'] if zone else None
+                trip[f'{prefix}_service_zone'] = zone['service_zone'] if zone else None
+        return trips
+
+
+dimension_cache = DimensionCache()
@@ -0,0 +1,208 @@
+"""
+EXPLAIN-based plan check for the API queries.
+
+Runs EXPLAIN for the query behind each endpoint and reports, for the trips
+table, which index MySQL picked and which partitions it reads. A check fails
+when the intended index is not used, or when a query with a pickup date
+range is not pruned to the matching month partitions.
+
+Keep the queries here in step with app.py.
+
+Usage (from backend/):
+    python -m database.explain_check --month 2024-01
+"""
+
+import argparse
+from datetime import date, timedelta
+from pathlib import Path
+import sys
+
+backend_dir = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(backend_dir))
+
+from database.db_connection import get_connection, close_connection
+from database.partitions import is_partitioned, list_partitions, parse_upper_bound
+
+TRIPS_ALIASES = ("t", "trips")
+
+# expected_index None means the endpoint aggregates the whole table and a
+# full scan is expected. prune=True means the query has a pickup date range.
+CHECKS = [
+    {
+        "endpoint": "/api/trips (date range)",
+        "query": """
+            SELECT * FROM trips
+            WHERE tpep_pickup_datetime >= %s AND tpep_pickup_datetime <= %s
+            ORDER BY tpep_pickup_datetime DESC LIMIT 100 OFFSET 0
+        """,
+        "dates": True,
+        "expected_index": "idx_trips_pickup_cover",
+        "prune": True,
+    },
+    {
+        "endpoint": "/api/trips (date range + borough)",
+        "query": """
+            SELECT * FROM trips
+            WHERE tpep_pickup_datetime >= %s AND tpep_pickup_datetime <= %s
+              AND pickup_borough_code = 4
+            ORDER BY tpep_pickup_datetime DESC LIMIT 100 OFFSET 0
+        """,
+        "dates": True,
+        "expected_index": "idx_trips_borough_pickup",
+        "prune": True,
+    },
+    {
+        "endpoint": "/api/trips?sort_by=fare_amount",
+        "query": "SELECT * FROM trips ORDER BY fare_amount DESC LIMIT 10 OFFSET 0",
+        "expected_index": "idx_trips_fare_amount",
+    },
+    {
+        "endpoint": "/api/trips?sort_by=trip_distance",
+        "query": "SELECT * FROM trips ORDER BY trip_distance DESC LIMIT 10 OFFSET 0",
+        "expected_index": "idx_trips_distance",
+    },
+    {
+        "endpoint": "/api/trips?sort_by=trip_duration_minutes",
+        "query": "SELECT * FROM trips ORDER BY trip_duration_minutes DESC LIMIT 10 OFFSET 0",
+        "expected_index": "idx_trips_duration",
+    },
+    {
+        "endpoint": "/api/locations/top-pickup",
+        "query": """
+            SELECT tz.Zone, tz.Borough, COUNT(*) as trip_count, ROUND(AVG(t.fare_amount), 2) as avg_fare
+            FROM trips t JOIN taxi_zones tz ON t.PULocationID = tz.LocationID
+            GROUP BY tz.Zone, tz.Borough ORDER BY trip_count DESC LIMIT 10
+        """,
+        "expected_index": "idx_trips_route_cover",
+    },
+    {
+        "endpoint": "/api/locations/top-dropoff",
+        "query": """
+            SELECT tz.Zone, tz.Borough, COUNT(*) as trip_count, ROUND(AVG(t.fare_amount), 2) as avg_fare
+            FROM trips t JOIN taxi_zones tz ON t.DOLocationID = tz.LocationID
+            GROUP BY tz.Zone, tz.Borough ORDER BY trip_count DESC LIMIT 10
+        """,
+        "expected_index": "idx_trips_dropoff_fare",
+    },
+    {
+        "endpoint": "/api/locations/top-routes",
+        "query": """
+            SELECT pu_zone.Zone, pu_zone.Borough, do_zone.Zone, do_zone.Borough,
+                   COUNT(*) as trip_count, ROUND(AVG(t.fare_amount), 2) as avg_fare,
+                   ROUND(AVG(t.trip_duration_minutes), 2) as avg_duration
+            FROM trips t
+            JOIN taxi_zones pu_zone ON t.PULocationID = pu_zone.LocationID
+            JOIN taxi_zones do_zone ON t.DOLocationID = do_zone.LocationID
+            GROUP BY pu_zone.Zone, pu_zone.Borough, do_zone.Zone, do_zone.Borough
+            ORDER BY trip_count DESC LIMIT 10
+        """,
+        "expected_index": "idx_trips_route_cover",
+    },
+    {
+        "endpoint": "/api/stats/overview",
+        "query": """
+            SELECT COUNT(*), AVG(fare_amount), AVG(trip_distance), AVG(trip_duration_minutes),
+                   SUM(total_amount), AVG(tip_percentage)
+            FROM trips
+        """,
+        "expected_index": None,
+    },
+]
+
+
+def trips_plan_row(plan):
+    """The EXPLAIN row for the trips table (aliased t in most queries)."""
+    for row in plan:
+        if row.get("table") in TRIPS_ALIASES:
+            return row
+    return None
+
+
+def run_checks(conn, start, end):
+    cursor = conn.cursor()
+    partitioned = is_partitioned(cursor)
+    total_partitions = len(list_partitions(cursor)) if partitioned else 0
+    cursor.close()
+
+    explain_cursor = conn.cursor(dictionary=True)
+    results = []
+    for check in CHECKS:
+        params = (start, end) if check.get("dates") else ()
+        explain_cursor.execute("EXPLAIN " + check["query"], params)
+        row = trips_plan_row(explain_cursor.fetchall())
+
+        key = row.get("key") if row else None
+        partitions = (row.get("partitions") or "") if row else ""
+        used = [p for p in partitions.split(",") if p]
+
+        index_ok = key == check["expected_index"]
+        if not partitioned or not check.get("prune"):
+            prune_ok = None
+        else:
+            prune_ok = 0 < len(used) < total_partitions
+
+        results.append({
+            "endpoint": check["endpoint"],
+            "key": key or "(full scan)",
+            "expected": check["expected_index"] or "(full scan)",
+            "partitions": ",".join(used) if partitioned else "n/a",
+            "index_ok": index_ok,
+            "prune_ok": prune_ok,
+        })
+    explain_cursor.close()
+    return partitioned, results
+
+
+def default_month(conn):
+    """First monthly partition (or the current month), used when --month is not given."""
+    cursor = conn.cursor()
+    try:
+        if is_partitioned(cursor):
+            for _, description, _ in list_partitions(cursor):
+                upper = parse_upper_bound(description)
+                if upper is not None:
+                    last_day = upper - timedelta(days=1)
+                    return last_day.year, last_day.month
+    finally:
+        cursor.close()
+    today = date.today()
+    return today.year, today.month
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Check the query plans of the API endpoints.")
+    parser.add_argument('--month', help="YYYY-MM used for the date-range queries")
+    args = parser.parse_args()
+
+    conn = get_connection()
+    try:
+        if args.month:
+            year, month = (int(x) for x in args.month.split("-"))
+        else:
+            year, month = default_month(conn)
+        start = date(year, month, 1)
+        end = start + timedelta(days=6)
+        partitioned, results = run_checks(conn, start.isoformat(), end.isoformat())
+    finally:
+        close_connection(conn)
+
+    print(f"\n{'='*114}")
+    print(f"EXPLAIN check (date range {start} .. {end}, trips "
+          f"{'partitioned' if partitioned else 'NOT partitioned'})")
+    print(f"{'='*114}")
+    print(f"  {'endpoint':<42}{'index used':<28}{'expected':<28}{'pruning':<10}")
+    failures = 0
+    for r in results:
+        prune = {None: "-", True: "ok", False: "FAIL"}[r["prune_ok"]]
+        mark = "" if r["index_ok"] else "  <- index"
+        failures += (not r["index_ok"]) + (r["prune_ok"] is False)
+        print(f"  {r['endpoint']:<42}{r['key']:<28}{r['expected']:<28}{prune:<10}{mark}")
+        if partitioned and r["partitions"]:
+            print(f"  {'':<42}partitions: {r['partitions']}")
+    print(f"{'='*114}")
+    print(f"{failures} problem(s) found" if failures else "All plans use the intended index and pruning")
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,5 +1,6 @@
 """
 Insert cleaned data into the database.
+Reads the partitioned Parquet processed store (only the columns needed).
 Handles NaN values and foreign key constraints.
 """
 
@@ -13,7 +14,18 @@ project_root = Path(__file__).resolve().parents[2]
 sys.path.insert(0, str(backend_dir))
 
 from config import PROCESSED_DATA_PATH
+from database import db_connection
 from database.db_connection import get_connection, close_connection
+from database.partitions import is_partitioned, ensure_month_partitions
+from database.dataset_version import new_dataset_version, bump_dataset_version
+from analytics.aggregate_file import publish_aggregates
+from Pipeline.processed_store import iter_processed_batches, processed_months
+from utils.geography import BOROUGHS, BOROUGH_CODES
+
+# Months with fewer trips than this (stray timestamps) get no partition of their own
+MIN_PARTITION_ROWS = 1000
+
+ZONE_COLUMNS = ['LocationID', 'Borough', 'Zone', 'service_zone']
 
 
 def insert_rate_codes(cursor):
@@ -40,24 +52,38 @@ def insert_rate_codes(cursor):
     print(f"  ✓ {len(rate_codes)} rate codes inserted.")
 
 
-def insert_taxi_zones_chunked(cursor, csv_path):
-    """Insert taxi zones by reading CSV in chunks."""
+def insert_boroughs(cursor):
+    """Insert the borough codes used by trips.pickup_borough_code / dropoff_borough_code."""
+    print("Inserting boroughs...")
+
+    for borough in BOROUGHS:
+        cursor.execute("""
+            INSERT INTO boroughs (borough_code, Borough)
+            VALUES (%s, %s)
+            ON DUPLICATE KEY UPDATE
+                Borough = VALUES(Borough)
+        """, (BOROUGH_CODES[borough], borough))
+
+    print(f"  ✓ {len(BOROUGHS)} boroughs inserted.")
+
+
+def insert_taxi_zones_chunked(cursor, processed_path):
+    """Insert taxi zones by reading the zone columns of the processed store in batches."""
     print("Inserting taxi zones...")
     
     zones_seen = set()
     zone_count = 0
     skipped = 0
     
-    for chunk in pd.read_csv(csv_path, chunksize=50000, 
-                             usecols=['LocationID', 'Borough', 'Zone', 'service_zone']):
+    for chunk in iter_processed_batches(processed_path, columns=ZONE_COLUMNS, batch_size=500000):
         
         # Drop rows where Zone is null (required field)
         chunk = chunk.dropna(subset=['Zone'])
         
+        zones = chunk[ZONE_COLUMNS].drop_duplicates()
+
         # Replace remaining NaN with None
-        chunk = chunk.replace({np.nan: None})
-        
-        zones = chunk[['LocationID', 'Borough', 'Zone', 'service_zone']].drop_duplicates()
+        zones = zones.astype(object).where(zones.notna(), None)
         
         for _, row in zones.iterrows():
             location_id = int(row['LocationID'])
@@ -85,8 +111,87 @@ def insert_taxi_zones_chunked(cursor, csv_path):
     print(f"  ✓ {zone_count} taxi zones inserted.")
 
 
-def insert_trips_chunked(cursor, conn, csv_path):
-    """Insert trips by reading CSV in chunks."""
+TRIP_COLUMNS = [
+    'VendorID', 'tpep_pickup_datetime', 'tpep_dropoff_datetime',
+    'passenger_count', 'trip_distance', 'RatecodeID', 'store_and_fwd_flag',
+    'PULocationID', 'DOLocationID', 'payment_type', 'fare_amount',
+    'extra', 'mta_tax', 'tip_amount', 'tolls_amount',
+    'improvement_surcharge', 'total_amount', 'congestion_surcharge',
+    'trip_duration_minutes', 'average-speed_mph', 'tip_percentage',
+    'pickup_date', 'pickup_hour', 'pickup_weekday', 'is_weekend',
+    'pickup_borough_code', 'dropoff_borough_code', 'is_airport_trip'
+]
+
+INSERT_TRIP_SQL = """
+    INSERT INTO trips (
+        VendorID, tpep_pickup_datetime, tpep_dropoff_datetime,
+        passenger_count, trip_distance, RatecodeID, store_and_fwd_flag,
+        PULocationID, DOLocationID, payment_type, fare_amount,
+        extra, mta_tax, tip_amount, tolls_amount,
+        improvement_surcharge, total_amount, congestion_surcharge,
+        trip_duration_minutes, average_speed_mph, tip_percentage,
+        pickup_date, pickup_hour, pickup_weekday, is_weekend,
+        pickup_borough_code, dropoff_borough_code, is_airport_trip
+    ) VALUES (
+        %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s,
+        %s, %s, %s, %s, %s, %s, %s, %s, %s, %s,
+        %s, %s, %s, %s, %s, %s, %s
+    )
+"""
+
+
+FLOAT_COLUMNS = [
+    'trip_distance', 'fare_amount', 'extra', 'mta_tax', 'tip_amount', 'tolls_amount',
+    'improvement_surcharge', 'total_amount', 'congestion_surcharge',
+    'trip_duration_minutes', 'average-speed_mph', 'tip_percentage'
+]
+
+
+def prepare_trip_rows(chunk, valid_location_ids, valid_rate_codes):
+    """
+    Turn one chunk of processed trips into insert-ready tuples.
+    Returns (values, skipped) where skipped counts rows with invalid IDs.
+    """
+    # Drop rows with missing required fields
+    chunk = chunk[TRIP_COLUMNS].dropna(subset=['tpep_pickup_datetime', 'tpep_dropoff_datetime'])
+    
+    # Filter out invalid LocationIDs
+    initial_count = len(chunk)
+    chunk = chunk[
+        chunk['PULocationID'].isin(valid_location_ids) & 
+        chunk['DOLocationID'].isin(valid_location_ids) &
+        (chunk['RatecodeID'].isin(valid_rate_codes) | chunk['RatecodeID'].isna())
+    ]
+    skipped = initial_count - len(chunk)
+
+    # Replace infinite values first
+    chunk['tip_percentage'] = chunk['tip_percentage'].replace(
+        [np.inf, -np.inf], np.nan
+    )
+
+    # Cap unrealistic percentages (0% to 100%)
+    chunk['tip_percentage'] = chunk['tip_percentage'].clip(lower=0, upper=100)
+
+    # The store keeps compact dtypes; the DB driver needs plain Python values.
+    # float32 is widened and rounded to the 2 decimals the schema stores.
+    for col in ['tpep_pickup_datetime', 'tpep_dropoff_datetime']:
+        chunk[col] = pd.to_datetime(chunk[col]).dt.strftime('%Y-%m-%d %H:%M:%S')
+    chunk['pickup_date'] = pd.to_datetime(chunk['pickup_date']).dt.strftime('%Y-%m-%d')
+    for col in ['is_weekend', 'is_airport_trip']:
+        chunk[col] = chunk[col].astype('uint8')
+    chunk[FLOAT_COLUMNS] = chunk[FLOAT_COLUMNS].astype('float64').round(2)
+
+    # Replace remaining NaN with None
+    chunk = chunk.astype(object).where(chunk.notna(), None)
+    
+    # Prepare batch insert
+    values = list(chunk.itertuples(index=False, name=None))
+
+    return values, skipped
+
+
+def insert_trips_chunked(cursor, conn, processed_path):
+    """Insert trips by reading the processed store in batches."""
     print("Inserting trips in batches...")
     
     # Get valid LocationIDs once
@@ -99,72 +204,21 @@ def insert_trips_chunked(cursor, conn, csv_path):
     valid_rate_codes = {row[0] for row in cursor.fetchall()}
     print(f"  Found {len(valid_rate_codes)} valid rate codes")
     
-
-    trip_columns = [
-        'VendorID', 'tpep_pickup_datetime', 'tpep_dropoff_datetime',
-        'passenger_count', 'trip_distance', 'RatecodeID', 'store_and_fwd_flag',
-        'PULocationID', 'DOLocationID', 'payment_type', 'fare_amount',
-        'extra', 'mta_tax', 'tip_amount', 'tolls_amount',
-        'improvement_surcharge', 'total_amount', 'congestion_surcharge',
-        'trip_duration_minutes', 'average-speed_mph', 'tip_percentage'
-    ]
-    
     chunk_size = 10000
     total_inserted = 0
     total_skipped = 0
     
-    for chunk_num, chunk in enumerate(pd.read_csv(csv_path, chunksize=chunk_size, 
-                                                    usecols=trip_columns), 1):
+    for chunk_num, chunk in enumerate(iter_processed_batches(processed_path, columns=TRIP_COLUMNS,
+                                                             batch_size=chunk_size), 1):
         
-        # Drop rows with missing required fields
-        chunk = chunk.dropna(subset=['tpep_pickup_datetime', 'tpep_dropoff_datetime'])
-        
-        # Filter out invalid LocationIDs
-        initial_count = len(chunk)
-        chunk = chunk[
-            chunk['PULocationID'].isin(valid_location_ids) & 
-            chunk['DOLocationID'].isin(valid_location_ids) &
-            (chunk['RatecodeID'].isin(valid_rate_codes) | chunk['RatecodeID'].isna())
-        ]
-        skipped_in_chunk = initial_count - len(chunk)
+        values, skipped_in_chunk = prepare_trip_rows(chunk, valid_location_ids, valid_rate_codes)
         total_skipped += skipped_in_chunk
-
-         # Replace infinite values first
-        chunk['tip_percentage'] = chunk['tip_percentage'].replace(
-            [np.inf, -np.inf], np.nan
-        )
-
-         # Cap unrealistic percentages (0% to 100%)
-        chunk['tip_percentage'] = chunk['tip_percentage'].clip(lower=0, upper=100)
-
-        # Replace remaining NaN with None
-        chunk = chunk.replace({np.nan: None})
-        
-        # Rename column to match database
-        chunk = chunk.rename(columns={'average-speed_mph': 'average_speed_mph'})
-        
-        # Prepare batch insert
-        values = []
-        for _, row in chunk.iterrows():
-            values.append(tuple(row))
         
         if not values:
             continue
         
         # Batch insert
-        cursor.executemany("""
-            INSERT INTO trips (
-                VendorID, tpep_pickup_datetime, tpep_dropoff_datetime,
-                passenger_count, trip_distance, RatecodeID, store_and_fwd_flag,
-                PULocationID, DOLocationID, payment_type, fare_amount,
-                extra, mta_tax, tip_amount, tolls_amount,
-                improvement_surcharge, total_amount, congestion_surcharge,
-                trip_duration_minutes, average_speed_mph, tip_percentage
-            ) VALUES (
-                %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s,
-                %s, %s, %s, %s, %s, %s, %s, %s, %s, %s
-            )
-        """, values)
+        cursor.executemany(INSERT_TRIP_SQL, values)
         
         total_inserted += len(values)
         
@@ -179,28 +233,40 @@ def insert_trips_chunked(cursor, conn, csv_path):
     print(f"  ✓ {total_inserted:,} trips inserted successfully.")
 
 
-def main():
+def main(processed_path=None):
     print("=" * 60)
     print("Starting data insertion process...")
     print("=" * 60)
 
-    csv_path = project_root / PROCESSED_DATA_PATH
-    print(f"\nCSV Path: {csv_path}")
+    processed_path = Path(processed_path) if processed_path else project_root / PROCESSED_DATA_PATH
+    print(f"\nProcessed store: {processed_path}")
     
-    if not csv_path.exists():
-        raise FileNotFoundError(f"File not found: {csv_path}")
+    if not processed_path.exists():
+        raise FileNotFoundError(f"File not found: {processed_path}")
 
     conn = get_connection()
     cursor = conn.cursor()
 
     try:
         insert_rate_codes(cursor)
+        insert_boroughs(cursor)
         conn.commit()
         
-        insert_taxi_zones_chunked(cursor, csv_path)
+        insert_taxi_zones_chunked(cursor, processed_path)
         conn.commit()
+
+        if db_connection.DB_BACKEND == "mysql" and is_partitioned(cursor):
+            added = ensure_month_partitions(
+                cursor, processed_months(processed_path, min_rows=MIN_PARTITION_ROWS))
+            print(f"  ✓ Month partitions added: {', '.join(added) if added else 'none needed'}")
         
-        insert_trips_chunked(cursor, conn, csv_path)
+        insert_trips_chunked(cursor, conn, processed_path)
+
+        # the aggregates are in place before the API sees the new version
+        version = new_dataset_version()
+        publish_aggregates(version)
+        bump_dataset_version(version)
+        print(f"  ✓ Dataset version: {version}")
 
         print("\n" + "=" * 60)
         print("✓ All data inserted successfully!")
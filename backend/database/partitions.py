@@ -0,0 +1,153 @@
+"""
+Monthly partition management for the partitioned trips schema
+(db_creation_partitioned.sql).
+
+New months are added by splitting the catch-all p_future partition, which
+is instant as long as p_future is still empty - insert_data.py therefore
+adds the partitions for a load before inserting its trips. A month older
+than the existing ones is split out of the partition that covers it.
+
+Usage (from backend/):
+    python -m database.partitions --list
+    python -m database.partitions --add 2024-01 2024-02
+"""
+
+import argparse
+from datetime import date
+from pathlib import Path
+import sys
+
+backend_dir = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(backend_dir))
+
+from database.db_connection import get_connection, close_connection
+
+FUTURE_PARTITION = "p_future"
+
+
+def partition_name(year, month):
+    return f"p{year:04d}{month:02d}"
+
+
+def next_month(year, month):
+    return (year + 1, 1) if month == 12 else (year, month + 1)
+
+
+def is_partitioned(cursor):
+    """True if the trips table in the current database is partitioned."""
+    cursor.execute("""
+        SELECT COUNT(*) FROM information_schema.PARTITIONS
+        WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = 'trips'
+          AND PARTITION_NAME IS NOT NULL
+    """)
+    return cursor.fetchone()[0] > 0
+
+
+def list_partitions(cursor):
+    """[(name, upper bound expression, approximate rows)] in partition order."""
+    cursor.execute("""
+        SELECT PARTITION_NAME, PARTITION_DESCRIPTION, TABLE_ROWS
+        FROM information_schema.PARTITIONS
+        WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = 'trips'
+          AND PARTITION_NAME IS NOT NULL
+        ORDER BY PARTITION_ORDINAL_POSITION
+    """)
+    return cursor.fetchall()
+
+
+def parse_upper_bound(description):
+    """Parse a RANGE COLUMNS bound such as '2024-02-01 00:00:00' into a date."""
+    text = description.strip("'")
+    if text.upper() == "MAXVALUE":
+        return None
+    return date.fromisoformat(text[:10])
+
+
+def ensure_month_partitions(cursor, months):
+    """
+    Make sure every (year, month) in months has its own partition. The
+    partition whose range covers a month is split at the month's bounds
+    with REORGANIZE PARTITION; the part left after the last new month keeps
+    the partition's name (p_future stays p_future) and other parts are
+    named p_until_<bound>. Splitting a partition that already holds trips
+    copies its rows. Returns the names added.
+    """
+    months = sorted(set(months))
+    partitions, lower = [], None
+    for name, description, _ in list_partitions(cursor):
+        upper = parse_upper_bound(description)
+        partitions.append((name, lower, upper))
+        lower = upper
+
+    def covers(lower, upper, day):
+        return (lower is None or day >= lower) and (upper is None or day < upper)
+
+    added = []
+    for name, lower, upper in partitions:
+        # the months in this partition's range that are not already all of it
+        starts = {date(year, month, 1) for year, month in months
+                  if covers(lower, upper, date(year, month, 1))
+                  and (lower, upper) != (date(year, month, 1), date(*next_month(year, month), 1))}
+        if not starts:
+            continue
+        bounds = starts | {date(*next_month(start.year, start.month), 1) for start in starts}
+        bounds = sorted(bound for bound in bounds if bound != lower and covers(lower, upper, bound))
+
+        pieces, piece_lower = [], lower
+        for bound in bounds + [upper]:
+            if piece_lower in starts:
+                piece = partition_name(piece_lower.year, piece_lower.month)
+                added.append(piece)
+            elif bound == upper:
+                piece = name
+            else:
+                piece = f"p_until_{bound:%Y%m%d}"
+            pieces.append((piece, bound))
+            piece_lower = bound
+
+        definitions = ",\n        ".join(
+            f"PARTITION {piece} VALUES LESS THAN "
+            + ("(MAXVALUE)" if bound is None else f"('{bound.isoformat()}')")
+            for piece, bound in pieces)
+        cursor.execute(f"""
+            ALTER TABLE trips REORGANIZE PARTITION {name} INTO (
+            {definitions}
+            )
+        """)
+    return added
+
+
+def parse_month(text):
+    year, month = text.split("-")
+    return int(year), int(month)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Manage monthly partitions of the trips table.")
+    parser.add_argument('--add', nargs='*', default=[], metavar='YYYY-MM',
+                        help="months to add partitions for")
+    parser.add_argument('--list', action='store_true', help="show the current partitions")
+    args = parser.parse_args()
+
+    conn = get_connection()
+    cursor = conn.cursor()
+    try:
+        if not is_partitioned(cursor):
+            print("trips is not partitioned (created from db_creation.sql).")
+            print("Recreate it from db_creation_partitioned.sql to use monthly partitions.")
+            return
+
+        if args.add:
+            added = ensure_month_partitions(cursor, [parse_month(m) for m in args.add])
+            print(f"Added partitions: {', '.join(added) if added else 'none needed'}")
+
+        if args.list or not args.add:
+            for name, description, rows in list_partitions(cursor):
+                print(f"  {name:<12} < {description:<24} ~{rows or 0:,} rows")
+    finally:
+        cursor.close()
+        close_connection(conn)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,154 @@
+"""
+SQLite stand-in for the MySQL database.
+
+Used by the benchmarks to run the API and insert path without a MySQL
+server. The wrapper only covers what this codebase calls on a
+mysql.connector connection: cursor(dictionary=...), execute, executemany,
+fetchone/fetchall, commit, rollback, is_connected and close, plus
+set_statement_timeout in place of MySQL's MAX_EXECUTION_TIME. Queries are
+rewritten from MySQL syntax where the two dialects differ.
+"""
+
+import re
+import sqlite3
+import time
+from datetime import date, datetime
+from pathlib import Path
+
+SCHEMA_PATH = Path(__file__).resolve().parent / "db_creation_sqlite.sql"
+
+_ON_DUPLICATE = re.compile(r"ON\s+DUPLICATE\s+KEY\s+UPDATE", re.IGNORECASE)
+_VALUES_REF = re.compile(r"VALUES\((\w+)\)", re.IGNORECASE)
+
+# SQLite VM instructions between two statement timeout checks
+PROGRESS_INTERVAL = 10_000
+
+
+def translate_query(query):
+    """Rewrite the MySQL-only parts of a query for SQLite."""
+    query = query.replace("%s", "?")
+    match = _ON_DUPLICATE.search(query)
+    if match:
+        head, tail = query[:match.start()], query[match.end():]
+        query = head + "ON CONFLICT DO UPDATE SET" + _VALUES_REF.sub(r"excluded.\1", tail)
+    return query
+
+
+def _hour(value):
+    if value is None:
+        return None
+    return int(str(value)[11:13])
+
+
+def _register_adapters():
+    sqlite3.register_adapter(datetime, lambda v: v.strftime("%Y-%m-%d %H:%M:%S"))
+    sqlite3.register_adapter(date, lambda v: v.isoformat())
+    try:
+        import numpy as np
+    except ImportError:
+        return
+    for np_type in (np.int8, np.int16, np.int32, np.int64,
+                    np.uint8, np.uint16, np.uint32, np.uint64):
+        sqlite3.register_adapter(np_type, int)
+    for np_type in (np.float16, np.float32, np.float64):
+        sqlite3.register_adapter(np_type, float)
+    sqlite3.register_adapter(np.bool_, bool)
+
+
+_register_adapters()
+
+
+class SQLiteCursor:
+    """Cursor with the mysql.connector calling conventions used here."""
+
+    def __init__(self, connection, dictionary=False):
+        self._connection = connection
+        self._cursor = connection._conn.cursor()
+        self._dictionary = dictionary
+
+    def execute(self, query, params=()):
+        self._connection._start_statement()
+        self._cursor.execute(translate_query(query), tuple(params or ()))
+
+    def executemany(self, query, seq_of_params):
+        self._connection._start_statement()
+        self._cursor.executemany(translate_query(query), seq_of_params)
+
+    def _convert(self, row):
+        if row is None or not self._dictionary:
+            return row
+        columns = [col[0] for col in self._cursor.description]
+        return dict(zip(columns, row))
+
+    def fetchone(self):
+        return self._convert(self._cursor.fetchone())
+
+    def fetchall(self):
+        return [self._convert(row) for row in self._cursor.fetchall()]
+
+    def fetchmany(self, size):
+        return [self._convert(row) for row in self._cursor.fetchmany(size)]
+
+    @property
+    def rowcount(self):
+        return self._cursor.rowcount
+
+    def close(self):
+        self._cursor.close()
+
+
+class SQLiteConnection:
+    """Connection wrapper mirroring the mysql.connector methods used here."""
+
+    def __init__(self, path):
+        self._conn = sqlite3.connect(str(path), timeout=30)
+        self._conn.create_function("HOUR", 1, _hour, deterministic=True)
+        self._open = True
+        self._timeout = None
+        self._deadline = None
+
+    def cursor(self, dictionary=False):
+        return SQLiteCursor(self, dictionary=dictionary)
+
+    def set_statement_timeout(self, timeout_ms):
+        """
+        Interrupt statements running longer than timeout_ms (None or 0 to
+        disable); they fail with sqlite3.OperationalError("interrupted").
+        """
+        self._timeout = timeout_ms / 1000 if timeout_ms else None
+        if self._timeout is None:
+            self._conn.set_progress_handler(None, PROGRESS_INTERVAL)
+        else:
+            self._conn.set_progress_handler(self._past_deadline, PROGRESS_INTERVAL)
+
+    def _start_statement(self):
+        if self._timeout is not None:
+            self._deadline = time.monotonic() + self._timeout
+
+    def _past_deadline(self):
+        return time.monotonic() > self._deadline
+
+    def commit(self):
+        self._conn.commit()
+
+    def rollback(self):
+        self._conn.rollback()
+
+    def is_connected(self):
+        return self._open
+
+    def close(self):
+        self._conn.close()
+        self._open = False
+
+
+def create_schema(path):
+    """Create (or recreate) the SQLite version of db_creation.sql at path."""
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    conn = sqlite3.connect(str(path))
+    try:
+        conn.executescript(SCHEMA_PATH.read_text())
+        conn.commit()
+    finally:
+        conn.close()
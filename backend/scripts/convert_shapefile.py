@@ -1,5 +1,4 @@
 # backend/scripts/convert_shapefile.py
-import geopandas as gpd
 from pathlib import Path
 import sys
 
@@ -11,19 +10,31 @@ sys.path.insert(0, str(backend_dir))
 
 from config import ZONES_SHP_PATH
 
-shapefile_path = project_root / ZONES_SHP_PATH
-
-print("Looking for shapefile:")
-print(f"  {shapefile_path}")
-if not shapefile_path.exists():
-    print("\nShapefile not found.")
-    print("Please check that the Data folder exists and that the shapefile path is correct.")
-    print(f"Expected at: {shapefile_path}")
-    sys.exit(1)
-
-print("Reading shapefile...")
-gdf = gpd.read_file(str(shapefile_path))
-gdf = gdf.to_crs(epsg=4326)
-geojson_path = shapefile_path.with_suffix('.geojson')
-gdf.to_file(str(geojson_path), driver='GeoJSON')
-print(f"Saved GeoJSON to: {geojson_path}")
\ No newline at end of file
+
+def convert(shapefile_path=None):
+    """Write taxi_zones.geojson (EPSG:4326) next to the shapefile; returns its path or None."""
+    # geopandas is slow to import, so only load it when converting
+    import geopandas as gpd
+
+    shapefile_path = Path(shapefile_path) if shapefile_path else project_root / ZONES_SHP_PATH
+
+    print("Looking for shapefile:")
+    print(f"  {shapefile_path}")
+    if not shapefile_path.exists():
+        print("\nShapefile not found.")
+        print("Please check that the Data folder exists and that the shapefile path is correct.")
+        print(f"Expected at: {shapefile_path}")
+        return None
+
+    print("Reading shapefile...")
+    gdf = gpd.read_file(str(shapefile_path))
+    gdf = gdf.to_crs(epsg=4326)
+    geojson_path = shapefile_path.with_suffix('.geojson')
+    gdf.to_file(str(geojson_path), driver='GeoJSON')
+    print(f"Saved GeoJSON to: {geojson_path}")
+    return geojson_path
+
+
+if __name__ == "__main__":
+    if convert() is None:
+        sys.exit(1)
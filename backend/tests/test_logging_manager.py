@@ -0,0 +1,39 @@
+import io
+from pathlib import Path
+import sys
+
+import pandas as pd
+
+backend_dir = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(backend_dir))
+
+from Pipeline.data_cleaning import remove_missing_values, remove_duplicates, remove_outliners
+from Pipeline.data_loader import TRIP_DTYPES
+from Pipeline.logging_manager import REJECTION_RULES, rejection_records
+
+TRIPS_CSV = """\
+VendorID,tpep_pickup_datetime,tpep_dropoff_datetime,passenger_count,trip_distance,RatecodeID,store_and_fwd_flag,PULocationID,DOLocationID,payment_type,fare_amount,extra,mta_tax,tip_amount,tolls_amount,improvement_surcharge,total_amount,congestion_surcharge
+1,2024-01-31 12:17:50,2024-01-31 12:28:06,1.0,3.97,1.0,N,26.0,21.0,1,18.06,1.0,0.5,0.0,0.0,1.0,23.06,2.5
+1,2024-01-31 12:17:50,2024-01-31 12:28:06,1.0,3.97,1.0,N,26.0,21.0,1,,1.0,0.5,0.0,0.0,1.0,23.06,2.5
+1,2024-01-31 12:17:50,2024-01-31 12:28:06,1.0,3.97,1.0,N,26.0,21.0,1,-18.06,1.0,0.5,0.0,0.0,1.0,-13.06,2.5
+"""
+
+
+def rejection_masks(raw):
+    cleaned, _ = remove_outliners(remove_duplicates(remove_missing_values(raw)))
+    records = rejection_records(raw, cleaned)
+    return dict(zip(records['row'], records['mask']))
+
+
+def test_missing_fare_only_sets_missing_bit():
+    raw = pd.read_csv(io.StringIO(TRIPS_CSV), dtype=TRIP_DTYPES)
+    masks = rejection_masks(raw)
+
+    assert set(masks) == {1, 2}
+    assert masks[1] == 1 << REJECTION_RULES.index('Missing critical value')
+    assert masks[2] & (1 << REJECTION_RULES.index('Zero/Negative fare amount'))
+    assert not masks[2] & (1 << REJECTION_RULES.index('Missing critical value'))
+
+
+def test_rules_fit_mask():
+    assert len(REJECTION_RULES) <= 16
@@ -0,0 +1,115 @@
+"""
+Admission control for the API's SQL-backed endpoints.
+
+Each limited endpoint runs at most max_concurrent requests at a time; up to
+max_queued more wait QUEUE_TIMEOUT_SECONDS for a slot and anything beyond
+that is turned away at once with AdmissionRejected (a 503 with Retry-After),
+so a burst of expensive queries cannot occupy every database connection and
+stall the cheap endpoints. Limits are per process.
+"""
+
+from contextlib import contextmanager
+from functools import wraps
+import threading
+
+QUEUE_TIMEOUT_SECONDS = 2.0
+RETRY_AFTER_SECONDS = 1
+
+
+class AdmissionRejected(Exception):
+    """The endpoint is at its concurrency limit and its queue is full."""
+
+
+class AdmissionLimit:
+    """Concurrency limit, queue and counters of one endpoint."""
+
+    def __init__(self, name, max_concurrent, max_queued, queue_timeout=QUEUE_TIMEOUT_SECONDS):
+        self.name = name
+        self.max_concurrent = max_concurrent
+        self.max_queued = max_queued
+        self.queue_timeout = queue_timeout
+        self._slots = threading.BoundedSemaphore(max_concurrent)
+        self._lock = threading.Lock()
+        self.active = 0
+        self.queued = 0
+        self.admitted = 0
+        self.rejected = 0
+        self.timed_out = 0
+
+    def _reject(self):
+        with self._lock:
+            self.rejected += 1
+        raise AdmissionRejected(f"{self.name} is busy, retry shortly")
+
+    def _wait_for_slot(self):
+        """Queue for a slot; False when the queue is full or the wait times out."""
+        with self._lock:
+            if self.queued >= self.max_queued:
+                return False
+            self.queued += 1
+        try:
+            return self._slots.acquire(timeout=self.queue_timeout)
+        finally:
+            with self._lock:
+                self.queued -= 1
+
+    @contextmanager
+    def admit(self):
+        if not self._slots.acquire(blocking=False) and not self._wait_for_slot():
+            self._reject()
+        with self._lock:
+            self.active += 1
+            self.admitted += 1
+        try:
+            yield
+        finally:
+            with self._lock:
+                self.active -= 1
+            self._slots.release()
+
+    def record_timeout(self):
+        with self._lock:
+            self.timed_out += 1
+
+    def stats(self):
+        with self._lock:
+            return {
+                "max_concurrent": self.max_concurrent,
+                "max_queued": self.max_queued,
+                "active": self.active,
+                "queued": self.queued,
+                "admitted": self.admitted,
+                "rejected": self.rejected,
+                "timed_out": self.timed_out,
+            }
+
+
+class AdmissionControl:
+    """
+    Registry of endpoint limits. timeout_errors are the exceptions counted
+    as timed-out requests when they leave a limited endpoint.
+    """
+
+    def __init__(self, timeout_errors=()):
+        self.timeout_errors = tuple(timeout_errors)
+        self.limits = {}
+
+    def limit(self, name, max_concurrent, max_queued):
+        """Decorator applying an AdmissionLimit to a view function."""
+        limit = self.limits[name] = AdmissionLimit(name, max_concurrent, max_queued)
+
+        def decorator(view):
+            @wraps(view)
+            def limited(*args, **kwargs):
+                with limit.admit():
+                    try:
+                        return view(*args, **kwargs)
+                    except self.timeout_errors:
+                        limit.record_timeout()
+                        raise
+            return limited
+
+        return decorator
+
+    def stats(self):
+        return {name: limit.stats() for name, limit in self.limits.items()}
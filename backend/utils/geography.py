@@ -0,0 +1,16 @@
+"""
+Fixed codes of the geographic trip features.
+
+The pipeline stores pickup_borough_code / dropoff_borough_code on every
+trip, insert_data fills the boroughs dimension table from BOROUGHS and the
+API translates borough names with BOROUGH_CODES, so all three agree
+without a lookup at query time.
+"""
+
+# borough_code = position + 1; NO_BOROUGH_CODE for zones missing from the lookup
+BOROUGHS = ['Bronx', 'Brooklyn', 'EWR', 'Manhattan', 'Queens', 'Staten Island', 'Unknown', 'N/A']
+BOROUGH_CODES = {name: code for code, name in enumerate(BOROUGHS, start=1)}
+NO_BOROUGH_CODE = 0
+
+# service_zone of the airport zones: JFK and LaGuardia ('Airports'), Newark ('EWR')
+AIRPORT_SERVICE_ZONES = ['Airports', 'EWR']
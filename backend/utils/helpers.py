@@ -0,0 +1,8 @@
+"""
+Small shared helpers for the pipeline and API.
+"""
+
+
+def memory_usage_mb(df):
+    """Deep memory usage of a DataFrame in megabytes."""
+    return df.memory_usage(deep=True).sum() / 1024 ** 2
@@ -0,0 +1,111 @@
+"""
+Conditional requests and compression for the JSON API.
+
+The API's responses only change when the data is reloaded, so the ETag of
+a GET /api/... request is a hash of the dataset version, the path and the
+query parameters. It is known before the endpoint runs: a request whose
+If-None-Match matches gets a 304 without touching the database or the
+column store. Other responses get the ETag and Cache-Control: no-cache
+(the browser may store them but revalidates every time), and JSON and
+binary bodies above MIN_COMPRESS_BYTES are brotli- (if the brotli package
+is installed) or gzip-compressed per Accept-Encoding.
+"""
+
+import gzip
+import hashlib
+
+from flask import g, request
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+MIN_COMPRESS_BYTES = 1024
+GZIP_LEVEL = 6
+BROTLI_QUALITY = 5
+API_PREFIX = '/api/'
+COMPRESSIBLE_MIMETYPES = ('application/json', 'application/octet-stream')
+
+
+def request_etag(version):
+    """Weak ETag of the current request: the same for every encoding of the body."""
+    digest = hashlib.blake2b(digest_size=12)
+    digest.update(version.encode())
+    digest.update(request.path.encode())
+    for name, value in sorted(request.args.items(multi=True)):
+        digest.update(f"\0{name}={value}".encode())
+    return f'W/"{digest.hexdigest()}"'
+
+
+def etag_matches(etag, if_none_match):
+    """If-None-Match uses weak comparison: W/ prefixes are ignored."""
+    if not if_none_match:
+        return False
+    candidates = [tag.strip() for tag in if_none_match.split(',')]
+    return '*' in candidates or etag.removeprefix('W/') in (tag.removeprefix('W/') for tag in candidates)
+
+
+def choose_encoding(accept_encoding):
+    accepted = {part.split(';')[0].strip().lower() for part in accept_encoding.split(',')}
+    if brotli is not None and 'br' in accepted:
+        return 'br'
+    if 'gzip' in accepted:
+        return 'gzip'
+    return None
+
+
+def compress(body, encoding):
+    if encoding == 'br':
+        return brotli.compress(body, quality=BROTLI_QUALITY)
+    return gzip.compress(body, compresslevel=GZIP_LEVEL)
+
+
+def enable_conditional_responses(app, get_version, exclude_paths=(), path_versions=None):
+    """
+    Register the ETag/304 and compression hooks on app. get_version()
+    returns the current dataset version string; responses of exclude_paths
+    do not follow it (live counters) and get no ETag. path_versions maps a
+    path to a function returning the version of other data its responses
+    depend on, which is added to its ETags.
+    """
+    path_versions = path_versions or {}
+
+    def cacheable():
+        return (request.method in ('GET', 'HEAD') and request.path.startswith(API_PREFIX)
+                and request.path not in exclude_paths)
+
+    @app.before_request
+    def answer_not_modified():
+        if not cacheable():
+            return None
+        version = get_version()
+        if request.path in path_versions:
+            version += '/' + path_versions[request.path]()
+        g.etag = request_etag(version)
+        if etag_matches(g.etag, request.headers.get('If-None-Match')):
+            response = app.response_class(status=304)
+            response.headers['ETag'] = g.etag
+            response.headers['Cache-Control'] = 'no-cache'
+            return response
+        return None
+
+    @app.after_request
+    def add_etag_and_compress(response):
+        if not cacheable() or response.status_code != 200 or response.direct_passthrough:
+            return response
+
+        response.headers['ETag'] = g.etag
+        response.headers['Cache-Control'] = 'no-cache'
+        response.vary.add('Accept-Encoding')
+
+        if response.content_encoding or response.mimetype not in COMPRESSIBLE_MIMETYPES:
+            return response
+        encoding = choose_encoding(request.headers.get('Accept-Encoding', ''))
+        body = response.get_data()
+        if encoding is None or len(body) < MIN_COMPRESS_BYTES:
+            return response
+
+        response.set_data(compress(body, encoding))
+        response.headers['Content-Encoding'] = encoding
+        return response